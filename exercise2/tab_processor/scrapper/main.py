@@ -1,8 +1,12 @@
 import datetime
 import click
 import logging as log
+import utils.catalog as catalog
+import utils.enrichment as enrichment
 import utils.files as files
+import utils.session as session
 import utils.songs as songs
+from utils.downloader import DEFAULT_RATE, DEFAULT_WORKERS
 
 # -- Configuration ---
 OUTPUT_DIRECTORY = "./files/"
@@ -15,14 +19,20 @@ INDEX = "abcdefghijklmnopqrstuvwxyz"
 # --- Logging config---
 logger = log.getLogger(__name__)
 
-log.basicConfig(
-    filename=f"{LOGS_DIRECTORY}scrapper.log",
-    filemode="w",
-    encoding="utf-8",
-    format="%(asctime)s %(levelname)-8s %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    level=log.INFO,
-)
+
+def setup_logging(log_name: str = "scrapper", force: bool = False):
+    log.basicConfig(
+        filename=f"{LOGS_DIRECTORY}{log_name}.log",
+        filemode="w",
+        encoding="utf-8",
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        level=log.INFO,
+        force=force,
+    )
+
+
+setup_logging()
 
 
 # --- Logic --------------------
@@ -39,7 +49,7 @@ log.basicConfig(
     "--update_catalog",
     is_flag=True,
     default=False,
-    help="Regenerates the catalog.",
+    help="Regenerates the catalog, resuming an interrupted crawl of the same letters.",
 )
 @click.option(
     "--start_char", "-sc", default="a", help="Starting letter for updating the catalog."
@@ -47,14 +57,76 @@ log.basicConfig(
 @click.option(
     "--end_char", "-ec", default="z", help="Ending letter for updating the catalog."
 )
-def main(reset, update_catalog, start_char, end_char):
+@click.option(
+    "--enrich",
+    is_flag=True,
+    default=False,
+    help="Add MusicBrainz genres and albums to the catalog (1 request per second, cached).",
+)
+@click.option(
+    "--metadata_ttl",
+    default=enrichment.DEFAULT_TTL_DAYS,
+    show_default=True,
+    help="Days before cached MusicBrainz metadata is fetched again.",
+)
+@click.option(
+    "--shard",
+    default=None,
+    help="Crawl only shard K/N of the letter range (e.g. 2/4), so N processes can share the catalog update.",
+)
+@click.option(
+    "--workers", "-w", default=DEFAULT_WORKERS, show_default=True, help="Pages downloaded in parallel."
+)
+@click.option(
+    "--rate",
+    default=DEFAULT_RATE,
+    show_default=True,
+    help="Maximum requests per second to each host.",
+)
+@click.option(
+    "--root", default=ROOT, help="Site root to scrape (e.g. a local stand-in server)."
+)
+@click.option(
+    "--pool_size",
+    default=session.DEFAULT_POOL_SIZE,
+    show_default=True,
+    help="Keep-alive connections per host (raised to --workers if lower).",
+)
+@click.option(
+    "--retries",
+    default=session.DEFAULT_RETRIES,
+    show_default=True,
+    help="Retries of a failed request, with exponential backoff.",
+)
+@click.option(
+    "--no_cache",
+    is_flag=True,
+    default=False,
+    help="Do not use the on-disk HTTP cache for artist pages.",
+)
+def main(reset, update_catalog, enrich, metadata_ttl, start_char, end_char, shard, workers, rate, root, pool_size, retries, no_cache):
     """Main function to run the scrapper. Can reset data, update catalog, or fetch songs."""
     print("Starting scrapper...")
 
+    if shard:
+        try:
+            start_char, end_char = catalog.shard_range(start_char, end_char, shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--shard")
+        # Every shard process gets its own log file
+        setup_logging(f"scrapper_{start_char}-{end_char}", force=True)
+        print(f"Shard {shard}: letters {start_char}-{end_char}")
+
     # Start time tracking
     start_time = datetime.datetime.now()
     log.info(f"Scrapper started at {start_time}")
 
+    session.configure(
+        pool_size=max(pool_size, workers),
+        retries=retries,
+        cache_dir=None if no_cache else session.DEFAULT_CACHE_DIR,
+    )
+
     # Reset data if required
     if reset:
         log.info("Remove all downloaded files. Fresh start...")
@@ -63,19 +135,41 @@ def main(reset, update_catalog, start_char, end_char):
     # Update catalog if required
     if update_catalog or not files.check_file_exists(OUTPUT_DIRECTORY, "catalog.json"):
         log.info("Updating catalog...")
-        catalog = songs.get_catalog(
+        _, complete = songs.get_catalog(
             OUTPUT_DIRECTORY,
             start_char=start_char,
             end_char=end_char,
+            root=root,
+            workers=workers,
+            rate=rate,
         )
-        files.save_to_json(catalog, OUTPUT_DIRECTORY, "catalog.json")
+        if not complete:
+            # The previous catalog.json is kept until the range can be crawled in full
+            print("Catalog crawl incomplete, catalog.json not updated. Run --update_catalog again to resume.")
+            return
+        # catalog.json gathers the checkpoints of every letter range crawled so far,
+        # with the metadata already cached (no MusicBrainz calls), in a single write
+        catalog.save_catalog(
+            OUTPUT_DIRECTORY,
+            "catalog.json",
+            prepare=lambda artists: enrichment.apply_cached_metadata(OUTPUT_DIRECTORY, artists),
+        )
+        songs.import_catalog(OUTPUT_DIRECTORY)
         log.info("Catalog updated.")
 
         return 200
 
+    # Enrich the catalog with MusicBrainz metadata if required
+    if enrich:
+        log.info("Enriching catalog...")
+        stats = enrichment.enrich_catalog(OUTPUT_DIRECTORY, ttl_days=metadata_ttl)
+        songs.import_catalog(OUTPUT_DIRECTORY)
+        print(f"Enriched {stats.get('enriched', 0)} of {stats.get('artists', 0)} artists.")
+        return 200
+
     # Get songs lyrics
     log.info(f"Starting to download lyrics...")
-    songs.get_songs(OUTPUT_DIRECTORY, version=SONG_VERSION)
+    songs.get_songs(OUTPUT_DIRECTORY, version=SONG_VERSION, workers=workers, rate=rate)
 
     duration = datetime.datetime.now() - start_time
     log.info(f"Total duration: {duration}")
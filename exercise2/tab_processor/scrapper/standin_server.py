@@ -0,0 +1,178 @@
+import hashlib
+import json
+import random
+import threading
+import time
+import click
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Configuration ---
+HOST = "127.0.0.1"
+PORT = 8000
+INDEX = "abcdefghijklmnopqrstuvwxyz"
+
+
+# --- Logic ---
+class Site:
+    """Fake lacuerda.net catalog: `artists` artists per letter with `songs` songs each.
+
+    Also records how it was used (requests, concurrency) so a scrapper run can be
+    checked against its politeness limits through the /_stats endpoint.
+    Pages carry an ETag and a Last-Modified header and conditional requests
+    that still match are answered with 304 Not Modified.
+    """
+
+    def __init__(self, artists: int = 2, songs: int = 3, latency: float = 0.0, fail_rate: float = 0.0):
+        self.artists = artists
+        self.songs = songs
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.not_modified = 0
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.first_request = None
+        self.last_request = None
+
+    def artist_names(self, char: str) -> list[str]:
+        return [f"{char}_artist_{i}" for i in range(self.artists)]
+
+    def song_names(self, artist: str) -> list[str]:
+        return [f"{artist}_song_{i}" for i in range(self.songs)]
+
+    def begin(self):
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.first_request = self.first_request or now
+            self.last_request = now
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            span = (self.last_request - self.first_request) if self.requests else 0.0
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "not_modified": self.not_modified,
+                "max_in_flight": self.max_in_flight,
+                "seconds": round(span, 3),
+            }
+
+    def page(self, path: str) -> tuple[int, str]:
+        """Returns the status and HTML of a site path."""
+        parts = [p for p in path.split("/") if p]
+
+        # /tabs/<char>: artist index
+        if len(parts) == 2 and parts[0] == "tabs" and parts[1] in INDEX:
+            items = "".join(f'<li><a href="/{a}/">{a}</a></li>' for a in self.artist_names(parts[1]))
+            return 200, f"<html><body><ul>{items}</ul></body></html>"
+
+        if not parts or parts[0][0] not in INDEX or parts[0] not in self.artist_names(parts[0][0]):
+            return 404, "<html><body>Not found</body></html>"
+        artist = parts[0]
+
+        # /<artist>/: song list with relative links
+        if len(parts) == 1:
+            items = "".join(f'<li><a href="{s}">{s}</a></li>' for s in self.song_names(artist))
+            return 200, f"<html><body><ul>{items}</ul></body></html>"
+
+        # /<artist>/<song>.shtml (or <song>-<version>.shtml): lyrics
+        if len(parts) == 2 and parts[1].endswith(".shtml"):
+            song = parts[1][: -len(".shtml")].rsplit("-", 1)[0]
+            if song in self.song_names(artist):
+                return 200, f"<html><body><pre>{song}\nC G Am F\nLa la la</pre></body></html>"
+
+        return 404, "<html><body>Not found</body></html>"
+
+
+def make_handler(site: Site):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/_stats":
+                self._send(200, json.dumps(site.stats()), "application/json")
+                return
+
+            site.begin()
+            try:
+                if site.latency:
+                    time.sleep(site.latency)
+                if site.fail_rate and random.random() < site.fail_rate:
+                    with site._lock:
+                        site.failures += 1
+                    self._send(503, "Service unavailable")
+                    return
+                status, body = site.page(self.path)
+                if status != 200:
+                    self._send(status, body)
+                    return
+
+                etag = f'"{hashlib.md5(body.encode("utf-8")).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag or (
+                    self.headers.get("If-None-Match") is None
+                    and self.headers.get("If-Modified-Since") == site.last_modified
+                ):
+                    with site._lock:
+                        site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(status, body, headers={"ETag": etag, "Last-Modified": site.last_modified})
+            finally:
+                site.end()
+
+        def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8", headers: dict = None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(site: Site, host: str = HOST, port: int = PORT) -> ThreadingHTTPServer:
+    """Starts the stand-in server in a background thread and returns it (port 0 picks a free one)."""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@click.command()
+@click.option("--port", "-p", default=PORT, show_default=True, help="Port to listen on.")
+@click.option("--artists", default=2, show_default=True, help="Artists per letter.")
+@click.option("--songs", default=3, show_default=True, help="Songs per artist.")
+@click.option("--latency", default=0.0, show_default=True, help="Seconds to wait before every response.")
+@click.option("--fail_rate", default=0.0, show_default=True, help="Fraction of requests answered with 503.")
+def main(port, artists, songs, latency, fail_rate):
+    """Serves a local lacuerda.net stand-in for testing the scrapper without hitting the real site."""
+    site = Site(artists=artists, songs=songs, latency=latency, fail_rate=fail_rate)
+    server = ThreadingHTTPServer((HOST, port), make_handler(site))
+    print(f"Serving on http://{HOST}:{port} (stats at /_stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(site.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import random
+import sys
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+# The scrapper modules are imported as `utils.x`, as when running scrapper/main.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import utils.session as session  # noqa: E402
+from standin_server import Site, serve  # noqa: E402
+from utils.downloader import Downloader, Job  # noqa: E402
+
+WORKERS = 3
+RATE = 20.0
+
+
+@pytest.fixture
+def site():
+    # Same 503s on every run
+    random.seed(7)
+    site = Site(artists=2, songs=3, latency=0.02, fail_rate=0.3)
+    server = serve(site, port=0)
+    site.root = f"http://127.0.0.1:{server.server_address[1]}"
+    yield site
+    server.shutdown()
+    server.server_close()
+    session.configure()
+
+
+def _stats(site: Site) -> dict:
+    with urllib.request.urlopen(f"{site.root}/_stats") as response:
+        return json.load(response)
+
+
+def test_downloads_respect_limits_and_retry(site, tmp_path):
+    session.configure(retries=8, backoff=0.01, cache_dir=None)
+    jobs = [
+        Job(song, f"{site.root}/{artist}/{song}.shtml", str(tmp_path / f"{song}.txt"))
+        for char in "ab"
+        for artist in site.artist_names(char)
+        for song in site.song_names(artist)
+    ]
+    downloader = Downloader(
+        fetch=lambda url, wait: session.get_text(url, cache=False, wait=wait),
+        write=lambda path, text: Path(path).write_text(text, encoding="utf-8"),
+        workers=WORKERS,
+        rate=RATE,
+    )
+
+    result = downloader.run(jobs)
+    stats = _stats(site)
+
+    assert result.downloaded == len(jobs)
+    assert stats["failures"] > 0
+    # Every retry is a request of its own and goes through the rate limit too
+    assert stats["requests"] == len(jobs) + stats["failures"]
+    assert stats["max_in_flight"] <= WORKERS
+    assert stats["seconds"] >= (stats["requests"] - 1) / RATE * 0.9
+
+
+def test_conditional_requests_get_304(site, tmp_path):
+    site.fail_rate = 0.0
+    session.configure(cache_dir=str(tmp_path / "http_cache"))
+    url = f"{site.root}/tabs/a"
+
+    first = session.get_text(url)
+    second = session.get_text(url)
+
+    assert second == first
+    assert _stats(site)["not_modified"] == 1
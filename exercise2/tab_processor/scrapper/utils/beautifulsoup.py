@@ -1,19 +1,22 @@
 import requests
 import logging as log
+import utils.session as session
 from bs4 import BeautifulSoup
 
 
-def get_soup(url) -> BeautifulSoup | None:
+def get_soup(url, cache: bool = True, wait=None) -> BeautifulSoup | None:
     """Fetches a URL and returns a BeautifulSoup object.
+    Requests go through the shared keep-alive session, with retries and the
+    conditional-request cache (see utils.session).
     Args:
         url (str): The URL to fetch.
+        cache (bool, optional): Revalidate against the on-disk cache. Defaults to True.
+        wait (callable, optional): Called with the URL before every attempt, e.g. a rate limiter.
     Returns:
         BeautifulSoup | None: A BeautifulSoup object if the request is successful, None otherwise.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-        return BeautifulSoup(response.text, "html.parser")
+        return BeautifulSoup(session.get_text(url, cache=cache, wait=wait), "html.parser")
     except requests.exceptions.RequestException as e:
         log.error(f"Error fetching {url}: {e}")
         return None
@@ -0,0 +1,176 @@
+import json
+import logging as log
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+# --- Configuration ---
+CHECKPOINT_DIRECTORY = "catalog_checkpoints/"
+
+
+# --- Shards ---
+def split_range(start_char: str, end_char: str, shards: int) -> list[tuple[str, str]]:
+    """Splits a letter range into `shards` contiguous, non-empty ranges.
+    Args:
+        start_char (str): First letter of the range (e.g., 'a').
+        end_char (str): Last letter of the range (e.g., 'z').
+        shards (int): Number of ranges to split into.
+    Returns:
+        list[tuple[str, str]]: (start_char, end_char) of each shard, in order.
+    """
+    letters = [chr(c) for c in range(ord(start_char.lower()), ord(end_char.lower()) + 1)]
+    shards = max(1, min(shards, len(letters)))
+    size, extra = divmod(len(letters), shards)
+
+    ranges, i = [], 0
+    for n in range(shards):
+        j = i + size + (1 if n < extra else 0)
+        ranges.append((letters[i], letters[j - 1]))
+        i = j
+    return ranges
+
+
+def shard_range(start_char: str, end_char: str, shard: str) -> tuple[str, str]:
+    """Returns the letter range of shard "K/N" (1-based) of start_char..end_char.
+    Raises:
+        ValueError: If `shard` is not "K/N" with 1 <= K <= N.
+    """
+    try:
+        k, n = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {shard!r}, expected K/N (e.g. 2/4)")
+    if not 1 <= k <= n:
+        raise ValueError(f"Invalid shard {shard!r}, K must be between 1 and N")
+
+    ranges = split_range(start_char, end_char, n)
+    if k > len(ranges):
+        raise ValueError(f"Shard {shard} is empty: {start_char}-{end_char} has only {len(ranges)} letters")
+    return ranges[k - 1]
+
+
+# --- Checkpoints ---
+class CatalogCheckpoint:
+    """Append-only record of the artists already crawled for one letter range.
+
+    A crawl appends every finished artist as a JSON line to `<range>.jsonl.partial`
+    and flushes it, so an interrupted crawl resumes where it stopped. Once the
+    whole range is done a completion marker is written and the file replaces
+    `<range>.jsonl`, the finished crawl merged into catalog.json; until then the
+    previous finished crawl of the range is kept. Each range has its own files,
+    so shards crawled by separate processes never write to the same file.
+    """
+
+    def __init__(self, output_directory: str, start_char: str, end_char: str):
+        self.directory = Path(output_directory) / CHECKPOINT_DIRECTORY
+        self.path = self.directory / f"catalog_{start_char}-{end_char}.jsonl"
+        self.partial = self.path.with_name(f"{self.path.name}.partial")
+        self._lock = threading.Lock()
+
+    def load(self) -> dict[str, dict]:
+        """Returns the artists of an interrupted crawl keyed by URL (empty if there is none)."""
+        artists, _ = _read(self.partial)
+        if artists:
+            log.info(f"Resuming from {self.partial}: {len(artists)} artists already crawled")
+        elif self.path.is_file():
+            log.info(f"Previous crawl of {self.path.name} finished. Starting over.")
+        return artists
+
+    def add(self, artist: dict):
+        """Appends a crawled artist (as returned by Artist.to_dict)."""
+        line = json.dumps(artist, ensure_ascii=False, default=str)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.partial, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def complete(self):
+        """Marks the range as fully crawled and replaces its previous finished crawl."""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.partial, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"complete": True}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(self.partial, self.path)
+
+
+def _read(path: Path) -> tuple[dict[str, dict], bool]:
+    artists, complete = {}, False
+    if not path.is_file():
+        return artists, complete
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                # Last line cut short by a crash
+                continue
+            if data.get("complete"):
+                complete = True
+            elif data.get("url"):
+                artists[data["url"]] = data
+    return artists, complete
+
+
+def merge(output_directory: str) -> list[dict]:
+    """Merges the artists of the finished crawl of every letter range (all shards).
+
+    Crawls still in progress (`.partial` files) are left out. An artist found
+    in several files (overlapping ranges) is taken from the most recent one.
+    Artists are sorted by URL so the result does not depend on the order in
+    which shards or workers finished, and artist and song ids are renumbered:
+    the ids in the checkpoints come from per-process counters and repeat
+    across shards and resumed crawls.
+    """
+    directory = Path(output_directory) / CHECKPOINT_DIRECTORY
+    paths = sorted(directory.glob("catalog_*.jsonl"), key=lambda p: p.stat().st_mtime)
+
+    artists = {}
+    for path in paths:
+        artists.update(_read(path)[0])
+
+    catalog, song_id = [], 0
+    for artist_id, url in enumerate(sorted(artists), start=1):
+        artist = {**artists[url], "id": artist_id}
+        songs = []
+        for song in artist.get("songs", []):
+            song_id += 1
+            songs.append({**song, "id": song_id})
+        artist["songs"] = songs
+        catalog.append(artist)
+    return catalog
+
+
+def write_catalog(output_directory: str, catalog: list[dict], file_name: str = "catalog.json"):
+    """Writes a catalog to a temporary file and renames it, so processes
+    finishing at the same time never leave a half-written catalog."""
+    path = Path(output_directory) / file_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{file_name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+    print(f"Successfully saved {len(catalog)} artists to {path}")
+
+
+def save_catalog(
+    output_directory: str,
+    file_name: str = "catalog.json",
+    prepare: Callable[[list[dict]], object] | None = None,
+) -> int:
+    """Writes the merged checkpoints to `file_name` and returns the number of artists.
+
+    `prepare` can edit the merged artists in place before the single write
+    (e.g. add cached metadata), so the file is never read back and rewritten
+    while other shards may be saving it too.
+    """
+    catalog = merge(output_directory)
+    if prepare:
+        prepare(catalog)
+    write_catalog(output_directory, catalog, file_name)
+    return len(catalog)
@@ -1,13 +1,7 @@
-import musicbrainzngs
 import utils.files as files
 from dataclasses import dataclass, asdict, field
 from pathlib import Path
 
-# --- Config ---
-
-# Initialize MusicBrainz client
-musicbrainzngs.set_useragent("MyMusicApp", "1.0", "myemail@example.com")
-
 
 # --- Data Structures ---
 @dataclass
@@ -77,6 +71,10 @@ class Artist:
         genres (list[str]): List of genres/tags associated with the artist.
         albums (list[str]): List of album titles by the artist.
         songs (list[Song]): List of Song objects associated with the artist.
+        mbid (str): MusicBrainz ID, empty until the artist is enriched.
+
+    Genres, albums and mbid are filled by the enrichment stage
+    (utils.enrichment), never when an Artist is created or loaded.
     """
 
     id: int = field(init=False)  # Auto-generated ID
@@ -87,20 +85,16 @@ class Artist:
     songs: list[Song] = field(
         default_factory=list
     )  # Use default_factory for mutable defaults
+    mbid: str = ""
 
     # Class variable to track next available ID
     _id_counter = 1
 
     def __post_init__(self):
-        """Automatically assign an incremental ID after initialization.
-        Also fetches metadata from MusicBrainz.
-        """
+        """Automatically assign an incremental ID after initialization."""
         self.id = Artist._id_counter
         Artist._id_counter += 1
 
-        # Fetch metadata automatically from MusicBrainz
-        self.fetch_metadata()
-
     def to_dict(self):
         """Converts the Artist object to a dictionary, including its nested songs."""
         data = asdict(self)
@@ -113,29 +107,29 @@ class Artist:
         data.pop("songs", None)
         return data
 
-    def fetch_metadata(self):
-        """Fetch artist metadata like tags (genres), albums, and description."""
-        try:
-            results = musicbrainzngs.search_artists(artist=self.name, limit=1)
-            if results["artist-list"]:
-                artist_data = results["artist-list"][0]
-                mbid = artist_data["id"]  # MusicBrainz ID
-
-                # Get detailed info: tags (genres), releases (albums)
-                details = musicbrainzngs.get_artist_by_id(
-                    mbid, includes=["tags", "releases"]
-                )
-
-                # Genres/tags
-                if "tag-list" in details["artist"]:
-                    self.genres = [tag["name"] for tag in details["artist"]["tag-list"]]
-
-                # Albums/releases
-                if "release-list" in details:
-                    self.albums = list({r["title"] for r in details["release-list"]})
+    def fetch_metadata(self, enricher=None):
+        """Fetch artist metadata like tags (genres) and albums, on demand.
+        Args:
+            enricher (Enricher, optional): Enricher to use. Defaults to one over the
+                                           cache in the default output directory.
+        """
+        # Imported here so loading a catalog never needs the MusicBrainz client
+        from utils.enrichment import CACHE_FILE, Enricher, MetadataCache
 
+        own_enricher = enricher is None
+        if own_enricher:
+            enricher = Enricher(MetadataCache(f"./files/{CACHE_FILE}"))
+        try:
+            metadata = enricher.metadata(self.name)
         except Exception as e:
             print(f"Error fetching data for {self.name}: {e}")
+            return
+        if own_enricher and enricher.requests:
+            enricher.cache.save()
+        if metadata:
+            self.mbid = metadata["mbid"]
+            self.genres = metadata["genres"]
+            self.albums = metadata["albums"]
 
     @staticmethod
     def from_dict(data):
@@ -0,0 +1,200 @@
+import logging as log
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+from urllib.parse import urlparse
+
+# --- Configuration ---
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 2.0  # Requests per second and host (the old fixed sleep was 0.5 s)
+DEFAULT_BURST = 1
+DEFAULT_WRITE_QUEUE = 64
+
+_STOP = object()
+
+
+# --- Rate limiting ---
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` saved.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (int): Maximum number of tokens that can accumulate while idle.
+    """
+
+    def __init__(self, rate: float, burst: int = DEFAULT_BURST):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One token bucket per host, so every site gets its own politeness limit."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """Blocks until a request to the host of `url` is allowed."""
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+# --- Data Structures ---
+@dataclass
+class Job:
+    """A page to download and the file its text is written to.
+
+    Attributes:
+        name (str): Name used in logs.
+        url (str): The URL to fetch.
+        path (str): Destination file path.
+        ref (Any): Caller data passed back to `on_done` (e.g. the Song).
+    """
+
+    name: str
+    url: str
+    path: str
+    ref: Any = None
+
+
+@dataclass
+class Stats:
+    """Outcome counters of a download run."""
+
+    downloaded: int = 0
+    empty: int = 0
+    failed: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, status: str):
+        with self._lock:
+            setattr(self, status, getattr(self, status) + 1)
+
+
+# --- Logic ---
+class Downloader:
+    """Downloads jobs concurrently with bounded in-flight requests and per-host rate limits.
+
+    `fetch(url, wait)` returns the text to save ("" when the page has nothing
+    to save) and raises on errors; it calls `wait(url)` before every request
+    it sends, retries included, so they all go through the per-host limit. Writes go through a single writer thread fed by
+    a bounded queue: when the disk falls behind, workers block on the queue,
+    the in-flight slots are not released and reading new jobs pauses.
+
+    Args:
+        fetch (Callable[[str, Callable[[str], None]], str]): Fetches a URL and returns the text to save.
+        write (Callable[[str, str], None]): Writes a text to a path.
+        workers (int): Number of download threads.
+        max_in_flight (int, optional): Jobs taken from the input but not yet
+            finished. Defaults to twice the number of workers.
+        rate (float): Requests per second and host.
+        burst (int): Requests per host that may go out back to back after idling.
+        write_queue_size (int): Downloaded pages waiting to be written.
+        on_done (Callable[[Job, str], None], optional): Called with every job
+            and its status ("downloaded", "empty" or "failed").
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, Callable[[str], None]], str],
+        write: Callable[[str, str], None],
+        workers: int = DEFAULT_WORKERS,
+        max_in_flight: int | None = None,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        write_queue_size: int = DEFAULT_WRITE_QUEUE,
+        on_done: Callable[[Job, str], None] | None = None,
+    ):
+        self.fetch = fetch
+        self.write = write
+        self.workers = max(1, workers)
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.limiter = HostRateLimiter(rate, burst)
+        self.write_queue_size = write_queue_size
+        self.on_done = on_done
+
+    def run(self, jobs: Iterable[Job]) -> Stats:
+        """Downloads every job and returns the counters once all writes are done."""
+        stats = Stats()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        writes: queue.Queue = queue.Queue(maxsize=self.write_queue_size)
+
+        def finish(job: Job, status: str):
+            stats.add(status)
+            if self.on_done is not None:
+                try:
+                    self.on_done(job, status)
+                except Exception as e:
+                    log.error(f"Error recording {job.name}: {e}")
+
+        def writer():
+            while (item := writes.get()) is not _STOP:
+                job, text = item
+                try:
+                    self.write(job.path, text)
+                    print(job.name, "downloaded!")
+                    finish(job, "downloaded")
+                except Exception as e:
+                    log.error(f"Error writing {job.path}: {e}")
+                    finish(job, "failed")
+                finally:
+                    slots.release()
+
+        def download(job: Job):
+            try:
+                log.info("Fetching %s (%s)", job.name, job.url)
+                text = self.fetch(job.url, self.limiter.wait)
+            except Exception as e:
+                log.error(f"Error fetching {job.name} from {job.url}: {e}")
+                finish(job, "failed")
+                slots.release()
+                return
+            if not text:
+                log.info(f"No lyrics found in {job.url}")
+                finish(job, "empty")
+                slots.release()
+                return
+            # The slot is released by the writer: a slow disk pauses reading new jobs
+            writes.put((job, text))
+
+        writer_thread = threading.Thread(target=writer, name="downloader-writer", daemon=True)
+        writer_thread.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="downloader") as pool:
+                for job in jobs:
+                    slots.acquire()
+                    pool.submit(download, job)
+        finally:
+            writes.put(_STOP)
+            writer_thread.join()
+
+        log.info(f"Downloads finished: {stats}")
+        return stats
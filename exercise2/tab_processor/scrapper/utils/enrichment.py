@@ -0,0 +1,199 @@
+import json
+import logging as log
+import os
+import threading
+import time
+import musicbrainzngs
+import utils.catalog as catalog
+from pathlib import Path
+
+# --- Config ---
+CACHE_FILE = "musicbrainz_cache.json"
+DEFAULT_TTL_DAYS = 30
+DEFAULT_BATCH_SIZE = 50
+
+# Initialize MusicBrainz client (its own limiter keeps every call at 1 req/s)
+musicbrainzngs.set_useragent("MyMusicApp", "1.0", "myemail@example.com")
+musicbrainzngs.set_rate_limit(limit_or_interval=1.0, new_requests=1)
+
+
+# --- Cache ---
+class MetadataCache:
+    """Persistent MusicBrainz cache: artist name -> MBID and MBID -> genres/albums.
+
+    Entries older than `ttl_days` are treated as missing. "Not found" answers
+    are cached too (with a null MBID) so unknown artists are not searched
+    again on every run; network errors are never cached.
+    """
+
+    def __init__(self, path: str, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.path = Path(path)
+        self.ttl = ttl_days * 24 * 3600
+        self._lock = threading.Lock()
+        self.names: dict[str, dict] = {}
+        self.artists: dict[str, dict] = {}
+        if self.path.is_file():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.names = data.get("names", {})
+                self.artists = data.get("artists", {})
+            except ValueError as e:
+                log.error(f"Ignoring unreadable MusicBrainz cache {self.path}: {e}")
+
+    @staticmethod
+    def key(name: str) -> str:
+        return " ".join(name.lower().split())
+
+    def _fresh(self, entry: dict | None) -> bool:
+        return entry is not None and time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def get_mbid(self, name: str) -> tuple[bool, str | None]:
+        """Returns (hit, mbid); mbid is None for a cached "not found"."""
+        entry = self.names.get(self.key(name))
+        return (True, entry["mbid"]) if self._fresh(entry) else (False, None)
+
+    def set_mbid(self, name: str, mbid: str | None):
+        with self._lock:
+            self.names[self.key(name)] = {"mbid": mbid, "fetched_at": time.time()}
+
+    def get_details(self, mbid: str) -> dict | None:
+        entry = self.artists.get(mbid)
+        return entry if self._fresh(entry) else None
+
+    def set_details(self, mbid: str, genres: list[str], albums: list[str]):
+        with self._lock:
+            self.artists[mbid] = {"genres": genres, "albums": albums, "fetched_at": time.time()}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({"names": self.names, "artists": self.artists}, ensure_ascii=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+# --- Logic ---
+class Enricher:
+    """Looks up artist metadata, from the cache first and from MusicBrainz on a miss.
+
+    Args:
+        cache (MetadataCache): The persistent cache.
+        offline (bool): Only use the cache, never call MusicBrainz.
+    """
+
+    def __init__(self, cache: MetadataCache, offline: bool = False):
+        self.cache = cache
+        self.offline = offline
+        self.requests = 0
+
+    def _search(self, name: str) -> str | None:
+        self.requests += 1
+        results = musicbrainzngs.search_artists(artist=name, limit=1)
+        return results["artist-list"][0]["id"] if results["artist-list"] else None
+
+    def _details(self, mbid: str) -> dict:
+        self.requests += 1
+        details = musicbrainzngs.get_artist_by_id(mbid, includes=["tags", "releases"])
+        genres = [tag["name"] for tag in details["artist"].get("tag-list", [])]
+        albums = sorted({r["title"] for r in details["artist"].get("release-list", [])})
+        return {"genres": genres, "albums": albums}
+
+    def metadata(self, name: str) -> dict | None:
+        """Returns {"mbid", "genres", "albums"} of an artist, or None if unknown or not cached.
+        Raises:
+            musicbrainzngs.WebServiceError: If a MusicBrainz call fails.
+        """
+        hit, mbid = self.cache.get_mbid(name)
+        if not hit:
+            if self.offline:
+                return None
+            mbid = self._search(name)
+            self.cache.set_mbid(name, mbid)
+        if mbid is None:
+            return None
+
+        details = self.cache.get_details(mbid)
+        if details is None:
+            if self.offline:
+                return None
+            details = self._details(mbid)
+            self.cache.set_details(mbid, details["genres"], details["albums"])
+        return {"mbid": mbid, "genres": details["genres"], "albums": details["albums"]}
+
+
+def _apply(artists: list[dict], found: dict[str, dict | None]) -> int:
+    enriched = 0
+    for artist in artists:
+        metadata = found.get(artist["name"])
+        if metadata:
+            artist.update(metadata)
+            enriched += 1
+    return enriched
+
+
+def apply_cached_metadata(output_directory: str, artists: list[dict]) -> int:
+    """Fills mbid, genres and albums of `artists` in place from the cache only, however old.
+
+    Never calls MusicBrainz; used when the catalog is saved, so a catalog
+    update keeps the metadata fetched by earlier --enrich runs.
+    Returns:
+        int: The number of artists with cached metadata.
+    """
+    enricher = Enricher(MetadataCache(Path(output_directory) / CACHE_FILE, float("inf")), offline=True)
+    found = {name: enricher.metadata(name) for name in dict.fromkeys(artist["name"] for artist in artists)}
+    enriched = _apply(artists, found)
+    log.info(f"Applied cached metadata to {enriched}/{len(artists)} artists")
+    return enriched
+
+
+def enrich_catalog(
+    output_directory: str,
+    ttl_days: float = DEFAULT_TTL_DAYS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    offline: bool = False,
+    file_name: str = "catalog.json",
+) -> dict:
+    """Fills mbid, genres and albums of every artist in catalog.json.
+
+    Each distinct artist name is looked up once; MusicBrainz is only called
+    for names missing from the cache (or expired), and the cache is saved
+    after every batch so an interrupted run keeps what it fetched. With
+    `offline`, only cached metadata is applied, however old (no network calls).
+    Args:
+        output_directory (str): Directory of catalog.json and the cache.
+        ttl_days (float, optional): Age after which cached metadata is fetched again.
+        batch_size (int, optional): Names looked up between cache saves.
+        offline (bool, optional): Only apply cached metadata. Defaults to False.
+        file_name (str, optional): Catalog file name. Defaults to "catalog.json".
+    Returns:
+        dict: Counters (artists, enriched, failed, requests).
+    """
+    catalog_path = Path(output_directory) / file_name
+    if not catalog_path.is_file():
+        log.error(f"{catalog_path} not found. Run scrapper with --update_catalog first.")
+        return {}
+
+    artists = json.loads(catalog_path.read_text(encoding="utf-8"))
+    # Offline, stale metadata is still better than none
+    cache = MetadataCache(Path(output_directory) / CACHE_FILE, float("inf") if offline else ttl_days)
+    enricher = Enricher(cache, offline=offline)
+
+    names = list(dict.fromkeys(artist["name"] for artist in artists))
+    found, failed = {}, 0
+    for start in range(0, len(names), batch_size):
+        for name in names[start:start + batch_size]:
+            try:
+                found[name] = enricher.metadata(name)
+            except Exception as e:
+                log.error(f"Error fetching data for {name}: {e}")
+                failed += 1
+        if enricher.requests:
+            cache.save()
+        log.info(f"Enriched {min(start + batch_size, len(names))}/{len(names)} artist names")
+
+    enriched = _apply(artists, found)
+    catalog.write_catalog(output_directory, artists, file_name)
+    stats = {"artists": len(artists), "enriched": enriched, "failed": failed, "requests": enricher.requests}
+    log.info(f"Enrichment finished: {stats}")
+    return stats
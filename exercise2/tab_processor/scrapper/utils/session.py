@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging as log
+import os
+import random
+import threading
+import time
+import requests
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from requests.adapters import HTTPAdapter
+
+# --- Configuration ---
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # Seconds before the first retry, doubled on each attempt
+MAX_BACKOFF = 30.0
+DEFAULT_TIMEOUT = 10
+DEFAULT_CACHE_DIR = "./files/http_cache/"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Settings:
+    """HTTP settings shared by every request of the process.
+
+    Attributes:
+        pool_size (int): Keep-alive connections kept open per host.
+        retries (int): Retries after a connection error or a retryable status.
+        backoff (float): Base delay in seconds of the exponential backoff.
+        timeout (float): Seconds to wait for the server.
+        cache_dir (str | None): Directory of the conditional-request cache (None disables it).
+    """
+
+    pool_size: int = DEFAULT_POOL_SIZE
+    retries: int = DEFAULT_RETRIES
+    backoff: float = DEFAULT_BACKOFF
+    timeout: float = DEFAULT_TIMEOUT
+    cache_dir: str | None = DEFAULT_CACHE_DIR
+
+
+_settings = Settings()
+_session: requests.Session | None = None
+_cache: "HttpCache | None" = None
+_lock = threading.Lock()
+
+
+class HttpCache:
+    """On-disk cache of page bodies with their ETag / Last-Modified validators.
+
+    Each URL is stored as `<sha256>.json` (validators) and `<sha256>.body`
+    (raw bytes); both are written to a temporary file and renamed, so a crash
+    never leaves a half-written entry.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def load(self, url: str) -> dict | None:
+        """Returns the validators of `url` ({"etag", "last_modified", "encoding"}) or None."""
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not body_path.is_file():
+            return None
+        return meta
+
+    def body(self, url: str) -> bytes:
+        return self._paths(url)[1].read_bytes()
+
+    def store(self, url: str, response: requests.Response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        meta_path, body_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": response.encoding,
+        }
+        _write_atomic(body_path, response.content)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def touch(self, url: str, meta: dict, response: requests.Response):
+        """Refreshes the validators after a 304 if the server sent new ones."""
+        etag = response.headers.get("ETag") or meta.get("etag")
+        last_modified = response.headers.get("Last-Modified") or meta.get("last_modified")
+        if (etag, last_modified) != (meta.get("etag"), meta.get("last_modified")):
+            meta = {**meta, "etag": etag, "last_modified": last_modified}
+            _write_atomic(self._paths(url)[0], json.dumps(meta).encode("utf-8"))
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def configure(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
+):
+    """Sets the HTTP settings; the shared session is rebuilt on the next request."""
+    global _settings, _session, _cache
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _settings = Settings(pool_size, retries, backoff, timeout, cache_dir)
+        _session, _cache = None, None
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide keep-alive session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=_settings.pool_size, pool_maxsize=_settings.pool_size)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _get_cache() -> HttpCache | None:
+    global _cache
+    with _lock:
+        if _cache is None and _settings.cache_dir:
+            _cache = HttpCache(_settings.cache_dir)
+        return _cache
+
+
+def _delay(attempt: int, response: requests.Response | None) -> float:
+    """Exponential backoff with full jitter, or the server's Retry-After if it sent one."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), MAX_BACKOFF)
+    return random.uniform(0, min(MAX_BACKOFF, _settings.backoff * 2**attempt))
+
+
+def _request(url: str, headers: dict, wait: Callable[[str], None] | None = None) -> requests.Response:
+    session = get_session()
+    for attempt in range(_settings.retries + 1):
+        response = None
+        if wait is not None:
+            wait(url)
+        try:
+            response = session.get(url, headers=headers, timeout=_settings.timeout)
+            if response.status_code not in RETRY_STATUS or attempt == _settings.retries:
+                return response
+            reason = f"HTTP {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == _settings.retries:
+                raise
+            reason = str(e)
+
+        delay = _delay(attempt, response)
+        log.warning(f"Retrying {url} in {delay:.2f}s ({reason})")
+        time.sleep(delay)
+
+
+def get_text(url: str, cache: bool = True, wait: Callable[[str], None] | None = None) -> str:
+    """Fetches a URL through the shared session and returns its text.
+
+    With `cache`, a previously seen page is requested conditionally
+    (If-None-Match / If-Modified-Since) and served from disk on a 304.
+    Args:
+        url (str): The URL to fetch.
+        cache (bool, optional): Use the conditional-request cache. Defaults to True.
+        wait (Callable[[str], None], optional): Called with the URL before every attempt,
+            retries included (e.g. HostRateLimiter.wait). Defaults to None.
+    Returns:
+        str: The page text.
+    Raises:
+        requests.exceptions.RequestException: If the request fails after the retries.
+    """
+    store = _get_cache() if cache else None
+    meta = store.load(url) if store else None
+
+    headers = {}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = _request(url, headers, wait)
+    if meta and response.status_code == 304:
+        store.touch(url, meta, response)
+        log.info(f"Not modified: {url}")
+        return store.body(url).decode(meta.get("encoding") or "utf-8", errors="replace")
+
+    response.raise_for_status()
+    if store:
+        store.store(url, response)
+    return response.text
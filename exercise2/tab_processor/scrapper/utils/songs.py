@@ -1,13 +1,14 @@
 import logging as log
-import json
-import sys
 import utils.beautifulsoup as bs
 import utils.files as files
 import re
-import time
 
 
+from concurrent.futures import ThreadPoolExecutor
+from utils.catalog import CatalogCheckpoint
 from utils.data import Song, Artist
+from utils.downloader import DEFAULT_RATE, DEFAULT_WORKERS, Downloader, HostRateLimiter, Job
+from utils.store import DB_FILE, DEFAULT_MAX_ATTEMPTS, DOWNLOADED, PENDING, CatalogStore
 from pathlib import Path
 
 # --- Configuration ---
@@ -37,187 +38,290 @@ def get_version(song, version: int = 0):
     return song, song_name
 
 
-def get_artists(start_char: str, end_char: str) -> list[Artist]:
-    """Scrapes artist URLs for a given range of starting letters.
+def _polite_get_soup(rate: float):
+    """Returns a get_soup that waits for the per-host rate limit before every request (retries included)."""
+    limiter = HostRateLimiter(rate)
+
+    def get_soup(url):
+        return bs.get_soup(url, wait=limiter.wait)
+
+    return get_soup
+
+
+def get_letter_artists(char: str, root: str = ROOT, get_soup=bs.get_soup) -> list[tuple[str, str]] | None:
+    """Scrapes the artist index page of one letter.
     Args:
-        start_char (str): The starting letter for artists to catalog (e.g., 'a').
-        end_char (str): The ending letter for artists to catalog (e.g., 'z').
+        char (str): The letter (e.g., 'a').
+        root (str, optional): Site root, e.g. a local stand-in server. Defaults to ROOT.
+        get_soup (callable, optional): Page fetcher. Defaults to bs.get_soup.
     Returns:
-        list[Artist]: A list of Artist objects.
+        list[tuple[str, str]] | None: (name, url) of every artist, or None if the page could not be fetched.
     """
+    artist_index_url = f"{root}/tabs/{char}"
+    log.info(f"Scraping artist index: {artist_index_url}")
 
-    log.info("Starting to build artists catalog...")
-    artists = []
-    for char_code in range(ord(start_char), ord(end_char) + 1):
-        char = chr(char_code)
-        artist_index_url = f"{URL_ARTIST_INDEX}/{char}"
-        log.info(f"Scraping artist index: {artist_index_url}")
-
-        soup = bs.get_soup(artist_index_url)
-        if not soup:
-            continue
-
-        ul_tag = soup.find("ul")
-        if not ul_tag:
-            log.info(f"No <ul> found on {artist_index_url}", file=sys.stderr)
-            continue
-
-        for li in ul_tag.find_all("li"):
-            a_tag = li.find("a")
-            if a_tag and a_tag.get("href"):
-                href = ROOT + a_tag["href"]
-                artist_display_name = Path(href).name.replace("_", " ").title()
-                artists.append(Artist(name=artist_display_name, url=href))
+    soup = get_soup(artist_index_url)
+    if not soup:
+        return None
+
+    ul_tag = soup.find("ul")
+    if not ul_tag:
+        log.info(f"No <ul> found on {artist_index_url}")
+        return []
 
+    artists = []
+    for li in ul_tag.find_all("li"):
+        a_tag = li.find("a")
+        if a_tag and a_tag.get("href"):
+            href = root + a_tag["href"]
+            artist_display_name = Path(href).name.replace("_", " ").title()
+            artists.append((artist_display_name, href))
     return artists
 
 
+def get_artist_songs(artist: Artist, output_directory: Path, get_soup=bs.get_soup) -> bool:
+    """Scrapes the song list of an artist into `artist.songs`.
+    Args:
+        artist (Artist): The artist, with its page URL.
+        output_directory (Path): The base directory where lyrics would eventually be saved.
+        get_soup (callable, optional): Page fetcher. Defaults to bs.get_soup.
+    Returns:
+        bool: True if the artist page was fetched, False otherwise.
+    """
+    log.info(f"Scraping songs for artist: {artist.name} ({artist.url})")
+    soup = get_soup(artist.url)
+    if not soup:
+        return False
+
+    for a_tag in soup.select("li > a"):
+        # Filter for valid song links. lacuerda.net song links are relative
+        # to the artist page and do not typically contain '.shtml' in the <a> href itself
+        # for the first part of the relative path, but they *do* eventually form
+        # artist/song.shtml. The original code looked for 'id="r"' which is too specific.
+        # We'll assume any relative href on an artist page is a potential song link.
+        if a_tag and a_tag.get("href") and not a_tag["href"].startswith("http"):
+
+            song_relative_path = a_tag["href"]
+
+            # Construct the full base URL for the song (before adding .shtml or version)
+            # Example: https://acordes.lacuerda.net/artist/song_title
+            # We need to ensure artist_url ends with a '/' if song_relative_path doesn't start with one,
+            # or remove it if song_relative_path starts with one.
+            if not artist.url.endswith("/") and not song_relative_path.startswith(
+                "/"
+            ):
+                song_base_url_prefix = f"{artist.url}/"
+            else:
+                song_base_url_prefix = artist.url
+
+            url = f"{song_base_url_prefix}{song_relative_path}.shtml"
+            full_song_url, song_filename = get_version(url, SONG_VERSION)
+            song_title = (
+                Path(song_relative_path).stem.replace("_", " ").title()
+            )  # The song title can be derived from the 'stem' of the relative path
+            song_output_dir = f"{output_directory}songs/{artist.name.replace(' ', '_').lower()}/{song_filename}"
+
+            artist.songs.append(
+                Song(
+                    song_title=song_title,
+                    song_url=full_song_url,
+                    genre="",  # Cannot be scraped directly from lacuerda.net
+                    lyrics_path=song_output_dir,
+                )
+            )
+    return True
+
+
 def get_catalog(
     output_directory: Path,
     start_char: str = "a",
     end_char: str = "z",
-) -> dict:
+    root: str = ROOT,
+    workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+) -> tuple[list[dict], bool]:
     """
     Generates a catalog of artists and their songs from lacuerda.net.
     This function does NOT download lyrics, only metadata.
+
+    Letter index pages and artist pages are fetched by `workers` threads,
+    limited to `rate` requests per second to each host. Every finished artist
+    is appended to the checkpoint of the letter range, so an interrupted crawl
+    of the same range resumes from there; the range's checkpoint only replaces
+    its previous finished crawl once this one is complete (see utils.catalog).
     Args:
         output_directory (Path): The base directory where lyrics would eventually be saved.
                                  Used to construct potential output_path for each song.
         start_char (str): The starting letter for artists to catalog (e.g., 'a').
         end_char (str): The ending letter for artists to catalog (e.g., 'z').
+        root (str, optional): Site root, e.g. a local stand-in server. Defaults to ROOT.
+        workers (int, optional): Pages fetched in parallel. Defaults to DEFAULT_WORKERS.
+        rate (float, optional): Maximum requests per second to each host. Defaults to DEFAULT_RATE.
     Returns:
-        dict: A dictionary with artist names as keys and lists of their Song objects as values.
+        tuple[list[dict], bool]: The artists of the range (as Artist.to_dict), in index order,
+                                 and whether every index and artist page could be crawled.
     """
     start_char = start_char.lower()
     end_char = end_char.lower()
 
-    # Get all artists
-    catalog = get_artists(start_char, end_char)
-
-    for artist in catalog:
-        log.info(f"Scraping songs for artist: {artist.name} ({artist.url})")
-        soup = bs.get_soup(artist.url)
-        if not soup:
-            continue
-
-        for a_tag in soup.select("li > a"):
-            # Filter for valid song links. lacuerda.net song links are relative
-            # to the artist page and do not typically contain '.shtml' in the <a> href itself
-            # for the first part of the relative path, but they *do* eventually form
-            # artist/song.shtml. The original code looked for 'id="r"' which is too specific.
-            # We'll assume any relative href on an artist page is a potential song link.
-            if a_tag and a_tag.get("href") and not a_tag["href"].startswith("http"):
-
-                song_relative_path = a_tag["href"]
-
-                # Construct the full base URL for the song (before adding .shtml or version)
-                # Example: https://acordes.lacuerda.net/artist/song_title
-                # We need to ensure artist_url ends with a '/' if song_relative_path doesn't start with one,
-                # or remove it if song_relative_path starts with one.
-                if not artist.url.endswith("/") and not song_relative_path.startswith(
-                    "/"
-                ):
-                    song_base_url_prefix = f"{artist.url}/"
-                else:
-                    song_base_url_prefix = artist.url
-
-                url = f"{song_base_url_prefix}{song_relative_path}.shtml"
-                full_song_url, song_filename = get_version(url, SONG_VERSION)
-                song_title = (
-                    Path(song_relative_path).stem.replace("_", " ").title()
-                )  # The song title can be derived from the 'stem' of the relative path
-                song_output_dir = f"{output_directory}songs/{artist.name.replace(' ', '_').lower()}/{song_filename}"
-
-                artist.songs.append(
-                    Song(
-                        song_title=song_title,
-                        song_url=full_song_url,
-                        genre="",  # Cannot be scraped directly from lacuerda.net
-                        lyrics_path=song_output_dir,
-                    )
-                )
+    checkpoint = CatalogCheckpoint(output_directory, start_char, end_char)
+    done = checkpoint.load()
+    get_soup = _polite_get_soup(rate)
+    complete = True
+
+    def crawl(name: str, url: str) -> dict | None:
+        artist = Artist(name=name, url=url)
+        if not get_artist_songs(artist, output_directory, get_soup):
+            return None
+        data = artist.to_dict()
+        checkpoint.add(data)
+        return data
+
+    log.info("Starting to build artists catalog...")
+    chars = [chr(c) for c in range(ord(start_char), ord(end_char) + 1)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        letters = list(pool.map(lambda char: get_letter_artists(char, root, get_soup), chars))
+
+        # Get all artists
+        pending = {}
+        for char, artists in zip(chars, letters):
+            if artists is None:
+                log.error(f"Artist index of '{char}' could not be fetched")
+                complete = False
+                continue
+            for name, url in artists:
+                if url not in done:
+                    pending[url] = pool.submit(crawl, name, url)
+
+        log.info(f"{len(done)} artists already crawled, {len(pending)} to go")
+        crawled = {}
+        for url, future in pending.items():
+            try:
+                data = future.result()
+            except Exception as e:
+                log.error(f"Error scraping artist {url}: {e}")
+                data = None
+            if data is None:
+                complete = False
+            else:
+                crawled[url] = data
+
+    if complete:
+        checkpoint.complete()
+    else:
+        log.warning("Catalog crawl incomplete. Run --update_catalog again to resume.")
 
     log.info("Cataloging complete.")
-    return catalog
+    artists = [
+        done.get(url) or crawled[url]
+        for artists in letters if artists
+        for _, url in artists
+        if url in done or url in crawled
+    ]
+    return artists, complete
 
 
-def get_song_lyrics(song_name: str, song_url: str, song_file_path: str) -> str:
-    """Fetches the lyrics of a song from its URL.
+def fetch_lyrics(song_url: str, wait=None) -> str:
+    """Fetches a song page and extracts its lyrics.
     Args:
         song_url (str): The URL of the song page.
+        wait (callable, optional): Called with the URL before every attempt, e.g. a rate limiter.
     Returns:
-        str: The lyrics text, or an empty string if not found.
+        str: The text of the first non-empty <pre> block, or an empty string if there is none.
+    Raises:
+        ConnectionError: If the page could not be fetched.
     """
-    try:
+    # Lyrics end up in their own file, so song pages skip the HTTP cache
+    soup = bs.get_soup(song_url, cache=False, wait=wait)
+    if soup is None:
+        raise ConnectionError(f"Could not fetch {song_url}")
 
-        song_file_path = files.normalize_relative_path(song_file_path)
+    for p in soup.find_all("pre"):
+        text = re.sub("<.*?>", "", str(p)).strip()
+        if text:
+            return text
+    return ""
 
-        if files.check_file_exists(song_file_path):
-            log.info(f"File {song_file_path} already exists. Skipping download.")
-            return False
 
-        log.info("song --> %s - url --> %s", song_name, song_url)
-
-        try:
-            lyric = bs.get_soup(song_url).findAll("pre")
-        except Exception as e:
-            log.error(f"Error fetching song from {song_url}: {e}")
-            return False
-
-        for p in lyric:
-
-            text = re.sub("<.*?>", "", str(p)).strip()
-            if text:
-
-                files.write_string_to_file(song_file_path, text=text)
-                print(song_name, "downloaded!")
-                return True
-
-    except Exception as e:
-        log.error(f"Error fetching lyrics from {song_url}: {e}")
-        raise e
-
-
-def get_songs(output_directory: str, version: int = 0):
-    """
-    Downloads all songs listed in catalog.json.
-    Does NOT perform any scraping of artists or songs again.
+def import_catalog(output_directory: str) -> int:
+    """Loads catalog.json into the SQLite catalog (see utils.store).
+    Args:
+        output_directory (str): Directory of catalog.json and catalog.db.
+    Returns:
+        int: The number of songs in the catalog, or 0 if there is no catalog.json.
     """
-
     catalog_path = Path(files.normalize_relative_path(f"{output_directory}catalog.json"))
-
     if not files.check_file_exists(catalog_path):
         log.error("catalog.json not found. Run scrapper with --update_catalog first.")
-        return
+        return 0
 
-    # Load catalog (list of Artist dataclasses converted to dicts)
     log.info(f"Loading catalog from {catalog_path}")
     catalog_data = files.load_from_json(catalog_path)
+    with CatalogStore(f"{output_directory}{DB_FILE}") as store:
+        return store.import_catalog(catalog_data)
 
-    # Convert dicts back to Artist / Song dataclasses (correct way)
-    catalog = [Artist.from_dict(a) for a in catalog_data]
-
-    log.info(f"Catalog loaded: {len(catalog)} artists")
-
-    # Download each song
-    for artist in catalog:
-        log.info(f"Processing artist: {artist.name} ({len(artist.songs)} songs)")
-
-        for song in artist.songs:
 
-            # Correct versioning if needed
-            song_url, song_filename = get_version(song.song_url, version)
+def add_version_rows(store: CatalogStore, version: int = 0) -> int:
+    """Adds the download rows of `version` for the songs that do not have one yet.
 
-            song_file_path = files.normalize_relative_path(song.lyrics_path)
+    Lyrics files that already exist (e.g. from runs before the SQLite catalog)
+    are recorded as downloaded; this is the only time they are checked on disk.
+    Returns:
+        int: The number of rows added.
+    """
+    rows = []
+    for song_id, song_url, lyrics_path in store.missing_versions(version):
+        # Correct versioning if needed
+        url, song_filename = get_version(song_url, version)
+        path = Path(lyrics_path).with_name(song_filename).as_posix() if version else lyrics_path
+        state = DOWNLOADED if files.check_file_exists(path) else PENDING
+        rows.append((song_id, url, path, state))
+
+    store.add_versions(version, rows)
+    return len(rows)
+
+
+def get_songs(
+    output_directory: str,
+    version: int = 0,
+    workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+):
+    """
+    Downloads all pending songs of the catalog.
+    Does NOT perform any scraping of artists or songs again.
 
-            try:
-                ok = get_song_lyrics(song_filename, song_url, song_file_path)
+    Only versions in the pending state are read from the SQLite catalog
+    (failed ones are retried until `max_attempts`). Songs are fetched by
+    `workers` threads, limited to `rate` requests per second to each host,
+    written to disk by a single writer thread, and their new state is
+    committed to the catalog in batches.
+    """
+    version = version or 0
+    db_path = f"{output_directory}{DB_FILE}"
 
-                if ok:
-                    time.sleep(0.5)
-                else:
-                    log.info(f"Skipping existing file: {song_file_path}")
+    # Catalogs built before the SQLite store only exist as catalog.json
+    if not files.check_file_exists(db_path) and not import_catalog(output_directory):
+        return
 
-            except Exception as e:
-                log.error(f"Error downloading {artist.name} - {song.song_title}: {e}")
-                continue
+    with CatalogStore(db_path) as store:
+        added = add_version_rows(store, version)
+        requeued = store.requeue_failed(version, max_attempts)
+        log.info(f"Catalog: {store.counts(version)} ({added} new, {requeued} failed retried)")
+
+        jobs = (
+            Job(name=Path(path).name, url=url, path=path, ref=version_id)
+            for version_id, url, path in store.pending(version)
+        )
+        downloader = Downloader(
+            fetch=fetch_lyrics,
+            write=lambda path, text: files.write_string_to_file(path, text=text),
+            workers=workers,
+            rate=rate,
+            on_done=lambda job, status: store.record(job.ref, status),
+        )
+        stats = downloader.run(jobs)
+
+    print(f"Downloaded {stats.downloaded} songs ({stats.empty} without lyrics, {stats.failed} failed).")
+    return stats
@@ -0,0 +1,226 @@
+import json
+import logging as log
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+# --- Configuration ---
+DB_FILE = "catalog.db"
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_FLUSH_EVERY = 100
+
+# Download states of a song version
+PENDING = "pending"
+DOWNLOADED = "downloaded"
+FAILED = "failed"
+SKIPPED = "skipped"  # Page without lyrics
+
+# Downloader status -> state
+STATUS_STATES = {"downloaded": DOWNLOADED, "empty": SKIPPED, "failed": FAILED}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    mbid TEXT NOT NULL DEFAULT '',
+    genres TEXT NOT NULL DEFAULT '[]',  -- JSON list
+    albums TEXT NOT NULL DEFAULT '[]'   -- JSON list
+);
+
+CREATE TABLE IF NOT EXISTS songs (
+    id INTEGER PRIMARY KEY,
+    artist_id INTEGER NOT NULL REFERENCES artists(id),
+    title TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    genre TEXT NOT NULL DEFAULT '',
+    lyrics_path TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    version INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    lyrics_path TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending'
+        CHECK (state IN ('pending', 'downloaded', 'failed', 'skipped')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    UNIQUE (song_id, version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_songs_artist ON songs(artist_id);
+CREATE INDEX IF NOT EXISTS idx_versions_state ON versions(version, state, id);
+"""
+
+
+# --- Logic ---
+class CatalogStore:
+    """SQLite catalog: artists, their songs and one row per song version to download.
+
+    Every version row carries its download state (pending, downloaded, failed
+    with its attempt count, or skipped), so a download run only reads the
+    pending rows through the (version, state, id) index. The connection is
+    shared by the download threads behind a lock, and state changes are
+    buffered and committed in batches, one transaction each.
+    """
+
+    def __init__(self, path: str, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._updates: list[tuple[str, float, int]] = []
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def import_catalog(self, artists: list[dict]) -> int:
+        """Inserts or updates artists and songs (as in catalog.json) in one transaction.
+
+        Known artists and songs (by URL) are updated in place, so the
+        download state of their versions is kept.
+        Returns:
+            int: The number of songs in the catalog.
+        """
+        songs = []
+        with self._lock, self.conn:
+            for artist in artists:
+                (artist_id,) = self.conn.execute(
+                    """
+                    INSERT INTO artists (name, url, mbid, genres, albums) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        name = excluded.name, mbid = excluded.mbid,
+                        genres = excluded.genres, albums = excluded.albums
+                    RETURNING id
+                    """,
+                    (
+                        artist["name"],
+                        artist["url"],
+                        artist.get("mbid") or "",
+                        json.dumps(artist.get("genres", []), ensure_ascii=False),
+                        json.dumps(artist.get("albums", []), ensure_ascii=False),
+                    ),
+                ).fetchone()
+                songs.extend(
+                    (artist_id, s["song_title"], s["song_url"], s.get("genre") or "", str(s["lyrics_path"]))
+                    for s in artist.get("songs", [])
+                )
+
+            self.conn.executemany(
+                """
+                INSERT INTO songs (artist_id, title, url, genre, lyrics_path) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    artist_id = excluded.artist_id, title = excluded.title,
+                    genre = excluded.genre, lyrics_path = excluded.lyrics_path
+                """,
+                songs,
+            )
+        log.info(f"Imported {len(artists)} artists and {len(songs)} songs into {self.path}")
+        return len(songs)
+
+    def missing_versions(self, version: int) -> list[tuple[int, str, str]]:
+        """Returns (song_id, url, lyrics_path) of the songs without a row for `version`."""
+        with self._lock:
+            return self.conn.execute(
+                """
+                SELECT s.id, s.url, s.lyrics_path
+                FROM songs s
+                LEFT JOIN versions v ON v.song_id = s.id AND v.version = ?
+                WHERE v.id IS NULL
+                ORDER BY s.id
+                """,
+                (version,),
+            ).fetchall()
+
+    def add_versions(self, version: int, rows: list[tuple[int, str, str, str]]):
+        """Inserts (song_id, url, lyrics_path, state) rows for `version` in one transaction."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO versions (song_id, version, url, lyrics_path, state, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (song_id, version) DO NOTHING
+                """,
+                [(song_id, version, url, path, state, now) for song_id, url, path, state in rows],
+            )
+
+    def requeue_failed(self, version: int, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """Sets failed rows with fewer than `max_attempts` attempts back to pending."""
+        with self._lock, self.conn:
+            return self.conn.execute(
+                "UPDATE versions SET state = ? WHERE version = ? AND state = ? AND attempts < ?",
+                (PENDING, version, FAILED, max_attempts),
+            ).rowcount
+
+    def pending(self, version: int, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[tuple[int, str, str]]:
+        """Yields (version_id, url, lyrics_path) of the pending rows of `version`.
+
+        Rows are read in pages by id (keyset pagination), so rows updated
+        while iterating are never read twice and no cursor is kept open.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                page = self.conn.execute(
+                    """
+                    SELECT id, url, lyrics_path FROM versions
+                    WHERE version = ? AND state = ? AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                    """,
+                    (version, PENDING, last_id, page_size),
+                ).fetchall()
+            if not page:
+                return
+            yield from page
+            last_id = page[-1][0]
+
+    def record(self, version_id: int, status: str):
+        """Buffers the outcome of a download ("downloaded", "empty" or "failed")."""
+        with self._lock:
+            self._updates.append((STATUS_STATES[status], time.time(), version_id))
+            if len(self._updates) >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        """Commits the buffered outcomes."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._updates:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE versions SET state = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                self._updates,
+            )
+        self._updates.clear()
+
+    def counts(self, version: int) -> dict[str, int]:
+        """Number of rows of `version` per state."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) FROM versions WHERE version = ? GROUP BY state", (version,)
+            ).fetchall()
+        return dict(rows)
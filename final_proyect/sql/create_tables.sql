@@ -1,16 +1,9 @@
-DROP TABLE IF EXISTS fact_alonso_race_results;
-DROP TABLE IF EXISTS fact_race_winners;
-DROP TABLE IF EXISTS dim_race;
-DROP TABLE IF EXISTS dim_season;
-DROP TABLE IF EXISTS dim_driver;
-DROP TABLE IF EXISTS dim_team;
-
-CREATE TABLE dim_season (
+CREATE TABLE IF NOT EXISTS dim_season (
   season_id INTEGER PRIMARY KEY,
   year INTEGER NOT NULL UNIQUE
 );
 
-CREATE TABLE dim_race (
+CREATE TABLE IF NOT EXISTS dim_race (
   race_id INTEGER PRIMARY KEY,
   year INTEGER NOT NULL,
   race_number INTEGER,
@@ -21,17 +14,17 @@ CREATE TABLE dim_race (
   UNIQUE(year, date, circuit)
 );
 
-CREATE TABLE dim_driver (
+CREATE TABLE IF NOT EXISTS dim_driver (
   driver_id INTEGER PRIMARY KEY,
   driver_name VARCHAR NOT NULL UNIQUE
 );
 
-CREATE TABLE dim_team (
+CREATE TABLE IF NOT EXISTS dim_team (
   team_id INTEGER PRIMARY KEY,
   team_name VARCHAR NOT NULL UNIQUE
 );
 
-CREATE TABLE fact_race_winners (
+CREATE TABLE IF NOT EXISTS fact_race_winners (
   fact_id BIGINT PRIMARY KEY,
   race_id INTEGER NOT NULL,
   season_id INTEGER NOT NULL,
@@ -41,7 +34,7 @@ CREATE TABLE fact_race_winners (
   time VARCHAR
 );
 
-CREATE TABLE fact_alonso_race_results (
+CREATE TABLE IF NOT EXISTS fact_driver_race_results (
   fact_id BIGINT PRIMARY KEY,
   race_id INTEGER NOT NULL,
   season_id INTEGER NOT NULL,
@@ -53,3 +46,65 @@ CREATE TABLE fact_alonso_race_results (
   did_finish INTEGER,
   event VARCHAR
 );
+
+-- Rollups (grano: temporada), se refrescan solo para las temporadas cargadas
+CREATE TABLE IF NOT EXISTS agg_driver_wins (
+  season_id INTEGER NOT NULL,
+  driver_id INTEGER NOT NULL,
+  wins INTEGER NOT NULL,
+  PRIMARY KEY (season_id, driver_id)
+);
+
+CREATE TABLE IF NOT EXISTS agg_team_wins (
+  season_id INTEGER NOT NULL,
+  team_id INTEGER NOT NULL,
+  wins INTEGER NOT NULL,
+  PRIMARY KEY (season_id, team_id)
+);
+
+CREATE TABLE IF NOT EXISTS agg_driver_season_stats (
+  season_id INTEGER NOT NULL,
+  driver_id INTEGER NOT NULL,
+  races INTEGER NOT NULL,
+  dnfs INTEGER NOT NULL,
+  finishes INTEGER NOT NULL,
+  finish_position_sum BIGINT,
+  finish_position_n INTEGER NOT NULL,
+  p1 INTEGER NOT NULL,
+  p2 INTEGER NOT NULL,
+  p3 INTEGER NOT NULL,
+  position_change_sum BIGINT,
+  position_change_n INTEGER NOT NULL,
+  PRIMARY KEY (season_id, driver_id)
+);
+
+CREATE TABLE IF NOT EXISTS agg_races_by_continent (
+  season_id INTEGER NOT NULL,
+  continent VARCHAR,
+  races INTEGER NOT NULL
+);
+
+-- Registro de claves subrogadas (ver src/load/keys.py). Solo se añaden filas
+-- y drop_tables.sql no las borra: los IDs se mantienen entre cargas
+CREATE TABLE IF NOT EXISTS key_season (
+  year INTEGER PRIMARY KEY,
+  season_id INTEGER NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS key_race (
+  year INTEGER NOT NULL,
+  date DATE NOT NULL,
+  circuit VARCHAR NOT NULL,
+  race_id INTEGER NOT NULL UNIQUE,
+  PRIMARY KEY (year, date, circuit)
+);
+
+CREATE TABLE IF NOT EXISTS key_driver (
+  driver_name VARCHAR PRIMARY KEY,
+  driver_id INTEGER NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS key_team (
+  team_name VARCHAR PRIMARY KEY,
+  team_id INTEGER NOT NULL UNIQUE
+);
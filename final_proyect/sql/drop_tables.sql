@@ -0,0 +1,12 @@
+DROP TABLE IF EXISTS agg_driver_wins;
+DROP TABLE IF EXISTS agg_team_wins;
+DROP TABLE IF EXISTS agg_driver_season_stats;
+DROP TABLE IF EXISTS agg_races_by_continent;
+DROP TABLE IF EXISTS fact_driver_race_results;
+-- tabla anterior a fact_driver_race_results (solo Alonso)
+DROP TABLE IF EXISTS fact_alonso_race_results;
+DROP TABLE IF EXISTS fact_race_winners;
+DROP TABLE IF EXISTS dim_race;
+DROP TABLE IF EXISTS dim_season;
+DROP TABLE IF EXISTS dim_driver;
+DROP TABLE IF EXISTS dim_team;
@@ -1,65 +1,127 @@
+-- Las consultas leen las tablas agg_* (rollups por temporada) que mantiene load_dw.
+-- SUM sobre INTEGER devuelve HUGEINT (float64 en pandas): los conteos se convierten a BIGINT.
+-- Sin GROUP BY, SUM de cero filas es NULL: los conteos usan COALESCE(..., 0); las medias
+-- (insight 8) siguen siendo NULL cuando no hay carreras.
+--
+-- Parámetros (ver run_insights.DEFAULT_PARAMS):
+--   $driver                 piloto de las consultas por piloto
+--   $year_from / $year_to   rango de temporadas (NULL = sin límite)
+--   $team                   equipo para las victorias por equipo (NULL = todos)
 
--- 1. Number of races and DNFs for Fernando Alonso
+-- 1. Number of races and DNFs for the driver
 SELECT
-  COUNT(*) AS total_races,
-  SUM(CASE WHEN did_finish = 0 THEN 1 ELSE 0 END) AS dnfs
-FROM fact_alonso_race_results;
+  CAST(COALESCE(SUM(a.races), 0) AS BIGINT) AS total_races,
+  CAST(COALESCE(SUM(a.dnfs), 0) AS BIGINT) AS dnfs
+FROM agg_driver_season_stats a
+JOIN dim_driver d ON d.driver_id = a.driver_id
+JOIN dim_season s ON s.season_id = a.season_id
+WHERE d.driver_name = $driver
+  AND ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to);
 
 -- 2. Average finishing position per season (only finished races)
 SELECT
   s.year,
-  AVG(a.race_position) AS avg_finish_position
-FROM fact_alonso_race_results a
+  a.finish_position_sum / a.finish_position_n AS avg_finish_position
+FROM agg_driver_season_stats a
 JOIN dim_season s ON s.season_id = a.season_id
-WHERE a.did_finish = 1
-GROUP BY s.year
+JOIN dim_driver d ON d.driver_id = a.driver_id
+WHERE d.driver_name = $driver
+  AND a.finish_position_n > 0
+  AND ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to)
 ORDER BY s.year;
 
 -- 3. Top 10 drivers by total wins
 SELECT
   d.driver_name,
-  COUNT(*) AS wins
-FROM fact_race_winners w
+  CAST(SUM(w.wins) AS BIGINT) AS wins
+FROM agg_driver_wins w
 JOIN dim_driver d ON d.driver_id = w.driver_id
+JOIN dim_season s ON s.season_id = w.season_id
+WHERE ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to)
 GROUP BY d.driver_name
-ORDER BY wins DESC
+ORDER BY wins DESC, d.driver_name
 LIMIT 10;
 
 -- 4. Total wins by team
 SELECT
   t.team_name,
-  COUNT(*) AS wins
-FROM fact_race_winners w
+  CAST(SUM(w.wins) AS BIGINT) AS wins
+FROM agg_team_wins w
 JOIN dim_team t ON t.team_id = w.team_id
+JOIN dim_season s ON s.season_id = w.season_id
+WHERE ($team IS NULL OR t.team_name = $team)
+  AND ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to)
 GROUP BY t.team_name
-ORDER BY wins DESC;
+ORDER BY wins DESC, t.team_name;
 
--- 5. Fernando Alonso total wins
+-- 5. Driver total wins
 SELECT
-  COUNT(*) AS alonso_wins
-FROM fact_race_winners w
+  CAST(COALESCE(SUM(w.wins), 0) AS BIGINT) AS driver_wins
+FROM agg_driver_wins w
 JOIN dim_driver d ON d.driver_id = w.driver_id
-WHERE d.driver_name = 'Fernando Alonso';
+JOIN dim_season s ON s.season_id = w.season_id
+WHERE d.driver_name = $driver
+  AND ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to);
 
--- 6. Alonso podium finishes
-SELECT
-  race_position,
-  COUNT(*) AS times
-FROM fact_alonso_race_results
-WHERE did_finish = 1
-  AND race_position <= 3
-GROUP BY race_position
+-- 6. Driver podium finishes
+WITH podiums AS (
+  SELECT
+    CAST(COALESCE(SUM(a.p1), 0) AS BIGINT) AS p1,
+    CAST(COALESCE(SUM(a.p2), 0) AS BIGINT) AS p2,
+    CAST(COALESCE(SUM(a.p3), 0) AS BIGINT) AS p3
+  FROM agg_driver_season_stats a
+  JOIN dim_driver d ON d.driver_id = a.driver_id
+  JOIN dim_season s ON s.season_id = a.season_id
+  WHERE d.driver_name = $driver
+    AND ($year_from IS NULL OR s.year >= $year_from)
+    AND ($year_to IS NULL OR s.year <= $year_to)
+)
+SELECT race_position, times
+FROM (
+  SELECT 1 AS race_position, p1 AS times FROM podiums
+  UNION ALL
+  SELECT 2, p2 FROM podiums
+  UNION ALL
+  SELECT 3, p3 FROM podiums
+)
+WHERE times > 0
 ORDER BY race_position;
 
 -- 7. Races per continent
 SELECT
-  continent,
-  COUNT(*) AS races
-FROM dim_race
-GROUP BY continent;
+  c.continent,
+  CAST(SUM(c.races) AS BIGINT) AS races
+FROM agg_races_by_continent c
+JOIN dim_season s ON s.season_id = c.season_id
+WHERE ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to)
+GROUP BY c.continent;
+
+-- 8. Driver grid vs finish performance
+SELECT
+  SUM(a.position_change_sum) / SUM(a.position_change_n) AS avg_position_change
+FROM agg_driver_season_stats a
+JOIN dim_driver d ON d.driver_id = a.driver_id
+JOIN dim_season s ON s.season_id = a.season_id
+WHERE d.driver_name = $driver
+  AND ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to);
 
--- 8. Alonso grid vs finish performance
+-- 9. Top 10 drivers by race starts (all loaded drivers)
 SELECT
-  AVG(race_position - grid_position) AS avg_position_change
-FROM fact_alonso_race_results
-WHERE did_finish = 1;
+  d.driver_name,
+  CAST(SUM(a.races) AS BIGINT) AS races,
+  CAST(SUM(a.finishes) AS BIGINT) AS finishes
+FROM agg_driver_season_stats a
+JOIN dim_driver d ON d.driver_id = a.driver_id
+JOIN dim_season s ON s.season_id = a.season_id
+WHERE ($year_from IS NULL OR s.year >= $year_from)
+  AND ($year_to IS NULL OR s.year <= $year_to)
+GROUP BY d.driver_name
+ORDER BY races DESC, d.driver_name
+LIMIT 10;
@@ -0,0 +1,222 @@
+import argparse
+import datetime
+import decimal
+import json
+import logging
+import queue
+import signal
+import socketserver
+import sys
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import duckdb
+import pyarrow as pa
+
+from src import warehouse
+from src.analysis.run_insights import DEFAULT_PARAMS, INSIGHT_DESCRIPTIONS, INSIGHT_NAMES, SQL_PATH, bind, load_queries
+from src.logging_setup import setup_logging
+
+# Servicio local de insights: mantiene el DW abierto (solo lectura) y las
+# consultas de insights.sql ya parseadas, así que cada petición no relee ni
+# parsea el fichero: enlaza parámetros y ejecuta (DuckDB sí planifica cada vez).
+#
+#   GET /health
+#   GET /insights                              -> catálogo (nombre, descripción, parámetros)
+#   GET /insights/<name>?driver=..&year_from=..&year_to=..&team=..[&format=arrow]
+
+HOST = "127.0.0.1"
+PORT = 8765
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+PARAM_TYPES = {"driver": str, "year_from": int, "year_to": int, "team": str}
+
+
+def _json_default(value):
+    # SUM de enteros en DuckDB es HUGEINT -> Decimal en Arrow/Python
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class InsightService:
+    """Runs the named insight queries on cursors of one long-lived connection.
+
+    Cursors are pooled and reused, so concurrent requests each get their own
+    cursor without reconnecting.
+
+    Statements are parsed once, but not prepared: every request is bound and
+    planned again. DuckDB's Python API has no prepared-statement handle, and
+    SQL PREPARE/EXECUTE only takes literal arguments (no bound parameters)
+    and was not faster on these queries, since DuckDB rebinds and re-plans a
+    prepared statement for new parameter values anyway.
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection, queries: list[duckdb.Statement]):
+        self.con = con
+        self.queries = dict(zip(INSIGHT_NAMES, queries))
+        self.descriptions = dict(zip(INSIGHT_NAMES, INSIGHT_DESCRIPTIONS))
+        self._cursors: queue.SimpleQueue = queue.SimpleQueue()
+
+    def catalog(self) -> list[dict]:
+        return [
+            {"name": name, "description": self.descriptions[name], "params": sorted(q.named_parameters)}
+            for name, q in self.queries.items()
+        ]
+
+    def parse_params(self, name: str, query_string: str) -> dict:
+        """Validates and converts the query-string parameters of `name` (ValueError if invalid)."""
+        allowed = self.queries[name].named_parameters
+        params = {}
+        for key, values in parse_qs(query_string, keep_blank_values=True).items():
+            if key == "format":
+                continue
+            if key not in allowed:
+                raise ValueError(f"{name} does not accept '{key}' (params: {sorted(allowed)})")
+            value = values[-1].strip()
+            try:
+                params[key] = PARAM_TYPES[key](value) if value else None
+            except ValueError:
+                raise ValueError(f"invalid value for '{key}': {value!r}") from None
+        return params
+
+    def run(self, name: str, params: dict) -> pa.Table:
+        query = self.queries[name]
+        try:
+            cur = self._cursors.get_nowait()
+        except queue.Empty:
+            cur = self.con.cursor()
+        try:
+            return cur.execute(query, bind(query, {**DEFAULT_PARAMS, **params})).to_arrow_table()
+        finally:
+            self._cursors.put(cur)
+
+
+class InsightHandler(BaseHTTPRequestHandler):
+    server_version = "InsightService/1.0"
+
+    def do_GET(self):
+        service: InsightService = self.server.service
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        start = time.perf_counter()
+
+        if parts == ["health"]:
+            return self._send_json(HTTPStatus.OK, {"status": "ok"})
+        if parts == ["insights"]:
+            return self._send_json(HTTPStatus.OK, service.catalog())
+        if len(parts) != 2 or parts[0] != "insights" or parts[1] not in service.queries:
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unknown path: {url.path}"})
+
+        name = parts[1]
+        try:
+            params = service.parse_params(name, url.query)
+        except ValueError as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+
+        try:
+            table = service.run(name, params)
+        except duckdb.Error as e:
+            logging.getLogger("analysis.insights_service").exception("Insight %s failed", name)
+            return self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+        fmt = parse_qs(url.query).get("format", [""])[-1]
+        if fmt == "arrow" or (not fmt and ARROW_MIME in self.headers.get("Accept", "")):
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            self._send(HTTPStatus.OK, sink.getvalue().to_pybytes(), ARROW_MIME)
+        else:
+            self._send_json(HTTPStatus.OK, {"insight": name, "params": params, "rows": table.to_pylist()})
+
+        logging.getLogger("analysis.insights_service").info(
+            "%s %s rows in %.2f ms", name, table.num_rows, (time.perf_counter() - start) * 1000
+        )
+
+    def _send_json(self, status: HTTPStatus, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self._send(status, body, "application/json")
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # En un socket Unix no hay dirección de cliente
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.getLogger("analysis.insights_service").debug("%s %s", self.address_string(), format % args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: InsightService, host: str = HOST, port: int = PORT, socket_path: Path | None = None):
+    if socket_path is not None:
+        socket_path.unlink(missing_ok=True)
+        server = UnixHTTPServer(str(socket_path), InsightHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), InsightHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(
+    host: str = HOST,
+    port: int = PORT,
+    socket_path: Path | None = None,
+    sql_path: Path = SQL_PATH,
+    snapshot: Path | None = None,
+):
+    setup_logging()
+    logger = logging.getLogger("analysis.insights_service")
+
+    if snapshot is not None:
+        con = warehouse.connect_snapshot(snapshot)
+        logger.info("Serving snapshot %s", warehouse.resolve_snapshot(snapshot))
+    else:
+        con = warehouse.connect(read_only=True)
+    service = InsightService(con, load_queries(sql_path))
+    server = make_server(service, host, port, socket_path)
+    logger.info(
+        "Serving %s insights on %s", len(service.queries),
+        socket_path if socket_path is not None else f"http://{host}:{port}",
+    )
+    # SIGTERM sale igual que Ctrl+C: cierra el servidor, el socket y la conexión
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None:
+            socket_path.unlink(missing_ok=True)
+        con.close()
+        logger.info("Insight service stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the insight queries over local HTTP, keeping the DW open.")
+    parser.add_argument("--host", default=HOST, help="Interface to bind (default: localhost only).")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--socket", type=Path, help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        nargs="?",
+        const=warehouse.SNAPSHOT_DIR,
+        help="Serve a parquet snapshot (version directory or snapshots root) instead of the DW file.",
+    )
+    args = parser.parse_args()
+    main(host=args.host, port=args.port, socket_path=args.socket, snapshot=args.snapshot)
@@ -1,57 +1,191 @@
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import duckdb
+import pandas as pd
 
-DB_PATH = Path("warehouse/dw.duckdb")
 SQL_PATH = Path("sql/insights.sql")
+OUTPUT_DIR = Path("data/insights")
 
-from src.logging_setup import setup_logging
+from src import warehouse
+from src.logging_setup import duckdb_profile, setup_logging, stage, with_stage_context
 import logging
 
-    
+# Valores de los parámetros $driver, $year_from, $year_to y $team de insights.sql
+DEFAULT_PARAMS = {"driver": "Fernando Alonso", "year_from": None, "year_to": None, "team": None}
+
+# Nombre estable de cada consulta (mismo orden que insights.sql), usado por el servicio
+INSIGHT_NAMES = [
+    "races_and_dnfs",
+    "avg_finish_by_season",
+    "top_drivers_by_wins",
+    "wins_by_team",
+    "driver_wins",
+    "podiums",
+    "races_by_continent",
+    "grid_vs_finish",
+    "most_starts",
+]
+
+
+# "the driver" es $driver (Fernando Alonso por defecto)
 INSIGHT_DESCRIPTIONS = [
-    "Total number of Formula 1 races Fernando Alonso has participated in, "
+    "Total number of Formula 1 races the driver has participated in, "
     "and how many of those races ended in a DNF (Did Not Finish).",
 
-    "Average finishing position of Fernando Alonso per season, "
-    "considering only races that he finished.",
+    "Average finishing position of the driver per season, "
+    "considering only races that they finished.",
 
     "Top 10 Formula 1 drivers by total number of race wins.",
 
     "Total number of Formula 1 race wins per team.",
 
-    "Total number of Formula 1 race wins achieved by Fernando Alonso.",
+    "Total number of Formula 1 race wins achieved by the driver.",
 
-    "Distribution of Fernando Alonso's podium finishes "
+    "Distribution of the driver's podium finishes "
     "(1st, 2nd and 3rd places).",
 
     "Number of Formula 1 races held per continent.",
 
-    "Average difference between Fernando Alonso's starting grid position "
-    "and his finishing position. Negative values mean positions gained."
+    "Average difference between the driver's starting grid position "
+    "and their finishing position. Negative values mean positions gained.",
+
+    "Top 10 drivers by number of race starts among the loaded driver results.",
 ]
 
 
-def main():
-    setup_logging()
+def load_queries(sql_path: Path = SQL_PATH) -> list[duckdb.Statement]:
+    """Parses insights.sql once; each statement is then bound to parameters on execution."""
+    sql = sql_path.read_text(encoding="utf-8")
+    return duckdb.extract_statements(sql)
+
+
+def bind(query: duckdb.Statement, params: dict) -> dict:
+    # Solo los parámetros que usa la consulta: DuckDB rechaza los que sobran
+    return {p: params[p] for p in query.named_parameters}
+
+
+def _timed(con: duckdb.DuckDBPyConnection, query: duckdb.Statement, name: str, params: dict) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    with stage(name) as m, duckdb_profile(con, "query"):
+        df = con.execute(query, bind(query, params)).fetchdf()
+        m.rows_out = len(df)
+    return df, time.perf_counter() - start
+
+
+def run_queries(
+    con: duckdb.DuckDBPyConnection,
+    queries: list[duckdb.Statement],
+    parallel: bool = False,
+    params: dict | None = None,
+) -> list[tuple[pd.DataFrame, float]]:
+    """Runs the queries and returns (result, seconds) per query, in input order.
+
+    `params` overrides DEFAULT_PARAMS. In parallel mode every query gets its
+    own cursor, so the total time is bounded by the slowest query instead of
+    the sum of all of them.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    names = [f"insight_{i + 1}" for i in range(len(queries))]
+    if not parallel:
+        return [_timed(con, q, name, params) for q, name in zip(queries, names)]
+
+    @with_stage_context
+    def run(query, name):
+        cur = con.cursor()
+        try:
+            return _timed(cur, query, name, params)
+        finally:
+            cur.close()
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        return list(pool.map(run, queries, names))
+
+
+def write_results(results: list[tuple[pd.DataFrame, float]], output_dir: Path):
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    summary = []
+    for i, (df, seconds) in enumerate(results):
+        df.to_parquet(output_dir / f"insight_{i + 1}.parquet", index=False)
+        summary.append({
+            "insight": i + 1,
+            "description": INSIGHT_DESCRIPTIONS[i],
+            "seconds": round(seconds, 6),
+            "rows": json.loads(df.to_json(orient="records", date_format="iso")),
+        })
+
+    with open(output_dir / "insights.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+def main(
+    parallel: bool = False,
+    output_dir: Path = OUTPUT_DIR,
+    profile_dir: Path | None = None,
+    snapshot: Path | None = None,
+):
+    setup_logging(profile_dir=profile_dir)
     logger = logging.getLogger("analysis.run_insights")
-    logger.info("Running insights")
-    con = duckdb.connect(str(DB_PATH))
-    sql = SQL_PATH.read_text(encoding="utf-8")
-
-    queries = [q.strip() for q in sql.split(";") if q.strip()]
-
-    for i, q in enumerate(queries):
+    logger.info("Running insights (%s)", "parallel" if parallel else "sequential")
+    if snapshot is not None:
+        # Vistas sobre los parquet de la instantánea, sin abrir el fichero del DW
+        con = warehouse.connect_snapshot(snapshot)
+        logger.info("Reading snapshot %s", warehouse.resolve_snapshot(snapshot))
+    else:
+        con = warehouse.connect(read_only=True)
+
+    queries = load_queries()
+
+    start = time.perf_counter()
+    with stage("run_insights", parallel=parallel) as m:
+        results = run_queries(con, queries, parallel=parallel)
+        m.rows_out = sum(len(df) for df, _ in results)
+    total = time.perf_counter() - start
+
+    for i, (df, seconds) in enumerate(results):
         print("\n" + "=" * 70)
         print(f"INSIGHT {i + 1}")
         print(INSIGHT_DESCRIPTIONS[i])
         print("-" * 70)
 
-        df = con.execute(q).fetchdf()
         print(df.to_string(index=False))
-        
+        logger.info("Insight %s: %s rows in %.1f ms", i + 1, len(df), seconds * 1000)
+
+    write_results(results, output_dir)
+    logger.info("Insights written to %s (%.1f ms total)", output_dir, total * 1000)
+
     logger.info("Insights execution finished")
     con.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the analytical insight queries over the DW.")
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Run the queries concurrently on per-thread cursors of a read-only connection.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=OUTPUT_DIR,
+        help="Directory for the per-insight parquet files and insights.json.",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=Path,
+        help="Write the DuckDB profile (EXPLAIN ANALYZE, JSON) of every insight query to this directory.",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        nargs="?",
+        const=warehouse.SNAPSHOT_DIR,
+        help="Query a parquet snapshot instead of the DW file: a version directory, "
+        "or the snapshots root for the latest one (default when given without a value).",
+    )
+    args = parser.parse_args()
+    main(parallel=args.parallel, output_dir=args.output_dir, profile_dir=args.profile_dir, snapshot=args.snapshot)
@@ -0,0 +1,187 @@
+import argparse
+import logging
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.logging_setup import setup_logging
+
+# Genera CSVs sintéticos con el mismo esquema que data/raw para medir el
+# pipeline a escala. Las filas se generan por temporada y en bloques, así que
+# la memoria no depende del tamaño total.
+
+FIRST_YEAR = 1950
+LAST_YEAR = 2100  # check_year_valid rechaza años > 2100
+CONTINENTS = np.array(["Europe", "North America", "South America", "Africa", "Asia", "Oceania"], dtype=object)
+TYRES = np.array(["Michelin", "Bridgestone", "Pirelli"], dtype=object)
+EVENTS = np.array(["Engine", "Gearbox", "Collision", "Accident", "Power loss"], dtype=object)
+DNF_RATE = 0.15
+CHUNK_ROWS = 1_000_000
+
+WINNERS_COLUMNS = ["date", "continent", "grand_prix", "circuit", "winner_name", "team", "time", "laps", "year"]
+RESULTS_COLUMNS = [
+    "race_number", "year", "grand_prix", "team", "driver_number", "constructor",
+    "car", "engine_type", "tyre", "grid_position", "race_position", "event",
+]
+
+
+def _pool(prefix: str, n: int) -> np.ndarray:
+    width = len(str(max(n - 1, 0)))
+    return np.array([f"{prefix} {i:0{width}d}" for i in range(n)], dtype=object)
+
+
+def _split(total: int, parts: int) -> list[int]:
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def _chunks(n: int, size: int):
+    for start in range(0, n, size):
+        yield start, min(start + size, n)
+
+
+def _winners_chunk(rng, year, k, drivers, teams, grand_prix, circuits, dates, times) -> pd.DataFrame:
+    # (date, circuit) es único dentro del año: date = k % 365, circuit = k // 365
+    return pd.DataFrame({
+        "date": dates[k % len(dates)],
+        "continent": CONTINENTS[k % len(CONTINENTS)],
+        "grand_prix": grand_prix[k % len(grand_prix)],
+        "circuit": circuits[k // len(dates)],
+        "winner_name": drivers[rng.integers(0, len(drivers), len(k))],
+        "team": teams[rng.integers(0, len(teams), len(k))],
+        "time": times[rng.integers(0, len(times), len(k))],
+        "laps": rng.integers(50, 79, len(k)).astype(float),
+        "year": year,
+    }, columns=WINNERS_COLUMNS)
+
+
+def _results_chunk(rng, year, k, first_race_number, driver_number, teams, grand_prix) -> pd.DataFrame:
+    n = len(k)
+    team_idx = rng.integers(0, len(teams), n)
+    position = rng.integers(1, 21, n).astype(str).astype(object)
+    dnf = rng.random(n) < DNF_RATE
+    position[dnf] = "ab"
+    event = np.where(dnf, EVENTS[rng.integers(0, len(EVENTS), n)], None)
+    return pd.DataFrame({
+        "race_number": first_race_number + np.arange(n),
+        "year": year,
+        "grand_prix": grand_prix[k % len(grand_prix)],
+        "team": teams[team_idx],
+        "driver_number": driver_number,
+        "constructor": teams[team_idx],
+        "car": "SYN-" + str(year),
+        "engine_type": "V6 t h",
+        "tyre": TYRES[rng.integers(0, len(TYRES), n)],
+        "grid_position": rng.integers(1, 21, n).astype(float),
+        "race_position": position,
+        "event": event,
+    }, columns=RESULTS_COLUMNS)
+
+
+def generate(
+    out_dir: Path,
+    rows: int,
+    results_rows: int | None = None,
+    result_files: int = 1,
+    seasons: int = 76,
+    drivers: int = 1000,
+    teams: int = 100,
+    seed: int = 42,
+    chunk_rows: int = CHUNK_ROWS,
+) -> dict[str, int]:
+    """Writes winners_f1_1950_2025_v2.csv, `result_files` per-driver results CSVs and drivers.csv into `out_dir`.
+
+    `rows` winner rows (one per race) are spread over `seasons` seasons.
+    Each driver file has `results_rows` participations (default: a third of
+    `rows`) in the first rounds of each season, so every one of them matches
+    a race. The first file is fernandoalonso.csv (the driver the insights
+    default to); the rest take names from the winners' driver pool.
+    """
+    seasons = max(1, min(seasons, LAST_YEAR - FIRST_YEAR + 1))
+    results_rows = rows // 3 if results_rows is None else min(results_rows, rows)
+    rng = np.random.default_rng(seed)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    winners_path = out_dir / "winners_f1_1950_2025_v2.csv"
+
+    driver_pool = _pool("Driver", max(drivers, result_files))
+    width = len(str(max(result_files - 1, 0)))
+    result_drivers = [("fernandoalonso.csv", "Fernando Alonso")] + [
+        (f"driver_{j:0{width}d}.csv", driver_pool[j]) for j in range(1, result_files)
+    ]
+    pd.DataFrame(result_drivers, columns=["file", "driver_name"]).to_csv(out_dir / "drivers.csv", index=False)
+    team_pool = _pool("Team", teams)
+    gp_pool = _pool("Grand Prix", 50)
+    times = np.array(
+        [f"{h:02d}:{m:02d}:{s:02d}" for h, m, s in zip(
+            rng.integers(1, 3, 500), rng.integers(0, 60, 500), rng.integers(0, 60, 500)
+        )],
+        dtype=object,
+    )
+
+    races_per_season = _split(rows, seasons)
+    results_per_season = _split(results_rows, seasons)
+
+    race_numbers = [1] * result_files
+    header = True
+    for i, (n_races, n_results) in enumerate(zip(races_per_season, results_per_season)):
+        year = FIRST_YEAR + i
+        dates = np.array(
+            pd.date_range(f"{year}-01-01", periods=365, freq="D").strftime("%Y-%m-%d"),
+            dtype=object,
+        )
+        circuits = _pool("Circuit", max(1, math.ceil(n_races / len(dates))))
+        n_results = min(n_results, n_races)
+
+        for start, end in _chunks(n_races, chunk_rows):
+            _winners_chunk(rng, year, np.arange(start, end), driver_pool, team_pool, gp_pool, circuits, dates, times) \
+                .to_csv(winners_path, mode="w" if header else "a", header=header, index=False)
+            header = False
+
+        for j, (file_name, _) in enumerate(result_drivers):
+            for start, end in _chunks(n_results, chunk_rows):
+                first = race_numbers[j] == 1
+                _results_chunk(rng, year, np.arange(start, end), race_numbers[j], 14 + j, team_pool, gp_pool) \
+                    .to_csv(out_dir / file_name, mode="w" if first else "a", header=first, index=False)
+                race_numbers[j] += end - start
+
+    for (file_name, _), race_number in zip(result_drivers, race_numbers):
+        if race_number == 1:
+            pd.DataFrame(columns=RESULTS_COLUMNS).to_csv(out_dir / file_name, index=False)
+
+    return {"winners": rows, "results": sum(race_numbers) - result_files, "result_files": result_files}
+
+
+def main():
+    setup_logging()
+    logger = logging.getLogger("benchmark.generate_data")
+
+    parser = argparse.ArgumentParser(description="Generate schema-compatible synthetic raw F1 CSVs.")
+    parser.add_argument("--rows", type=int, required=True, help="Number of winner rows (races).")
+    parser.add_argument("--results-rows", type=int, help="Participations per driver file (default: rows / 3).")
+    parser.add_argument("--result-files", type=int, default=1, help="Number of per-driver results CSVs.")
+    parser.add_argument("--seasons", type=int, default=76)
+    parser.add_argument("--drivers", type=int, default=1000)
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out-dir", type=Path, required=True, help="Directory for the raw CSV files.")
+    args = parser.parse_args()
+
+    logger.info("Generating %s synthetic winner rows into %s", args.rows, args.out_dir)
+    counts = generate(
+        args.out_dir,
+        rows=args.rows,
+        results_rows=args.results_rows,
+        result_files=args.result_files,
+        seasons=args.seasons,
+        drivers=args.drivers,
+        teams=args.teams,
+        seed=args.seed,
+    )
+    logger.info("Generated %s", counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+from src import warehouse
+from src.benchmark.generate_data import generate
+from src.datasets import write_dataset
+from src.extract.extract_raw import extract_raw
+from src.logging_setup import peak_rss_mb, setup_logging
+from src.transform.clean_results import clean_results
+from src.transform.clean_winners import clean_winners
+from src.transform.quality_checks import run_all_checks
+from src.load import load_dw, dw_checks
+from src.orchestration.run_pipeline import extract_clean_parallel
+from src.analysis import run_insights
+
+SQL_DIR = Path("sql")
+WORK_DIR = Path("benchmarks/work")
+RESULTS_DIR = Path("benchmarks/results")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _fact_rows() -> int:
+    con = warehouse.connect(read_only=True)
+    try:
+        return con.execute(
+            "SELECT (SELECT COUNT(*) FROM fact_race_winners) + (SELECT COUNT(*) FROM fact_driver_race_results)"
+        ).fetchone()[0]
+    finally:
+        con.close()
+
+
+def _run_stage(results: list[dict], name: str, fn, rows=None):
+    """Runs `fn` and appends wall/CPU time, peak RSS and rows/sec for it.
+
+    `rows` is the number of input rows (or a callable evaluated after the stage).
+    peak_rss_mb is the process high-water mark at the end of the stage.
+    """
+    logger = logging.getLogger("benchmark.run_benchmark")
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn()
+    seconds = time.perf_counter() - start
+    cpu_seconds = time.process_time() - cpu_start
+
+    n = rows() if callable(rows) else rows
+    result = {
+        "stage": name,
+        "seconds": round(seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "rows": n,
+        "rows_per_sec": round(n / seconds, 1) if n and seconds else None,
+    }
+    results.append(result)
+    logger.info("%-14s %8.3f s  rss=%s MB  rows=%s", name, seconds, result["peak_rss_mb"], n)
+    return out
+
+
+def run(
+    workdir: Path,
+    engine: str = "pandas",
+    arrow: bool = False,
+    partitioned: bool = False,
+    parallel: bool = False,
+    workers: int = 1,
+) -> list[dict]:
+    """Runs every pipeline stage inside `workdir` (which must contain data/raw/)."""
+    results = []
+    cwd = Path.cwd()
+    shutil.copytree(SQL_DIR, workdir / "sql", dirs_exist_ok=True)
+    os.chdir(workdir)
+    try:
+        if workers > 1:
+            # clean no descarta filas (eso lo hace quality_checks): las filas limpias son las extraídas
+            extracted = []
+
+            def extract_clean():
+                out = extract_clean_parallel(arrow=arrow, workers=workers)
+                extracted.append(sum(len(df) for df in out))
+                return out
+
+            driver_results, winners = _run_stage(results, "extract_clean", extract_clean, lambda: extracted[0])
+            n = extracted[0]
+        else:
+            driver_results_raw, winners_raw = _run_stage(results, "extract_raw", lambda: extract_raw(Path("data/raw"), arrow=arrow))
+            n = len(driver_results_raw) + len(winners_raw)
+
+            driver_results, winners = _run_stage(
+                results, "clean", lambda: (clean_results(driver_results_raw), clean_winners(winners_raw)), n
+            )
+            del driver_results_raw, winners_raw
+        driver_results, winners = _run_stage(
+            results, "quality_checks", lambda: run_all_checks(driver_results, winners), n
+        )
+
+        def write_staging():
+            Path("data/processed").mkdir(parents=True, exist_ok=True)
+            write_dataset(driver_results, "results_clean", Path("data/processed"), partitioned=partitioned)
+            write_dataset(winners, "winners_clean", Path("data/processed"), partitioned=partitioned)
+
+        _run_stage(results, "write_staging", write_staging, n)
+        del driver_results, winners
+
+        _run_stage(results, "load_dw", lambda: load_dw.main(engine=engine), n)
+        _run_stage(results, "dw_checks", dw_checks.main, _fact_rows)
+        _run_stage(results, "run_insights", lambda: run_insights.main(parallel=parallel), _fact_rows)
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def compare(current: dict, baseline_path: Path):
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    before = {s["stage"]: s for s in baseline["stages"]}
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit')})")
+    for stage in current["stages"]:
+        old = before.get(stage["stage"])
+        if not old or not old["seconds"]:
+            continue
+        ratio = stage["seconds"] / old["seconds"]
+        print(f"  {stage['stage']:<14} {old['seconds']:>9.3f}s -> {stage['seconds']:>9.3f}s  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on (synthetic) raw data.")
+    parser.add_argument("--rows", type=int, help="Generate this many synthetic winner rows into the workdir first.")
+    parser.add_argument("--result-files", type=int, default=1, help="Per-driver results CSVs to generate with --rows.")
+    parser.add_argument("--seasons", type=int, default=76, help="Seasons spanned by the rows generated with --rows.")
+    parser.add_argument("--drivers", type=int, default=1000, help="Distinct drivers in the rows generated with --rows.")
+    parser.add_argument("--workers", type=int, default=1, help="Extract and clean the driver files in this many processes.")
+    parser.add_argument("--workdir", type=Path, default=WORK_DIR, help="Benchmark directory (expects data/raw/ when --rows is not given).")
+    parser.add_argument("--engine", choices=["pandas", "arrow", "duckdb"], default="pandas")
+    parser.add_argument("--arrow", action="store_true", help="Extract with the pyarrow CSV engine.")
+    parser.add_argument("--partitioned", action="store_true", help="Write year-partitioned staging datasets.")
+    parser.add_argument("--parallel", action="store_true", help="Run insight queries in parallel.")
+    parser.add_argument("--output", type=Path, help="Result JSON path (default: benchmarks/results/<timestamp>_<commit>.json).")
+    parser.add_argument("--compare", type=Path, help="Previous result JSON to compare against.")
+    args = parser.parse_args()
+
+    setup_logging()
+    logger = logging.getLogger("benchmark.run_benchmark")
+
+    workdir = args.workdir.resolve()
+    if args.rows:
+        logger.info("Generating %s synthetic rows in %s", args.rows, workdir)
+        generate(
+            workdir / "data" / "raw",
+            rows=args.rows,
+            result_files=args.result_files,
+            seasons=args.seasons,
+            drivers=args.drivers,
+        )
+
+    commit = _git_commit()
+    stages = run(workdir, engine=args.engine, arrow=args.arrow, partitioned=args.partitioned, parallel=args.parallel, workers=args.workers)
+
+    report = {
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "rows": args.rows,
+            "workdir": str(args.workdir),
+            "engine": args.engine,
+            "arrow": args.arrow,
+            "partitioned": args.partitioned,
+            "parallel": args.parallel,
+            "result_files": args.result_files,
+            "seasons": args.seasons,
+            "drivers": args.drivers,
+            "workers": args.workers,
+        },
+        "total_seconds": round(sum(s["seconds"] for s in stages), 4),
+        "stages": stages,
+    }
+
+    output = args.output or RESULTS_DIR / f"{datetime.datetime.now():%Y%m%d_%H%M%S}_{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logger.info("Benchmark results written to %s", output)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Datasets de staging en data/processed:
+#   - fichero único:   <name>.parquet
+#   - particionado:    <name>/year=YYYY/*.parquet (hive, zstd)
+
+PROCESSED_DIR = Path("data/processed")
+PARTITION_COL = "year"
+
+# Filas rechazadas: las de quality_checks y las de resultados sin carrera en
+# el calendario (las escribe load_dw tras confirmar la carga; dw_checks las descuenta)
+QUARANTINE_DIR = Path("data/quarantine")
+UNMATCHED_PATH = QUARANTINE_DIR / "results_unmatched_races.parquet"
+ROW_GROUP_SIZE = 128 * 1024
+
+# Esquema de salida de los datasets limpios. En modo streaming cada lote
+# infiere sus propios tipos, así que se fuerzan a este esquema al escribir.
+SCHEMAS = {
+    "results_clean": pa.schema([
+        ("driver_name", pa.string()),
+        ("race_number", pa.int64()),
+        ("year", pa.int64()),
+        ("grand_prix", pa.string()),
+        ("team", pa.string()),
+        ("driver_number", pa.int64()),
+        ("constructor", pa.string()),
+        ("car", pa.string()),
+        ("engine_type", pa.string()),
+        ("tyre", pa.string()),
+        ("grid_position", pa.float64()),
+        ("race_position", pa.float64()),
+        ("event", pa.string()),
+        ("race_position_raw", pa.string()),
+        ("did_finish", pa.int64()),
+    ]),
+    "winners_clean": pa.schema([
+        ("date", pa.timestamp("ns")),
+        ("continent", pa.string()),
+        ("grand_prix", pa.string()),
+        ("circuit", pa.string()),
+        ("winner_name", pa.string()),
+        ("team", pa.string()),
+        ("time", pa.string()),
+        ("laps", pa.float64()),
+        ("year", pa.int64()),
+    ]),
+}
+
+
+def _partitioning() -> ds.Partitioning:
+    return ds.partitioning(pa.schema([(PARTITION_COL, pa.int64())]), flavor="hive")
+
+
+def dataset_path(name: str, processed_dir: Path = PROCESSED_DIR) -> Path:
+    """Returns the partitioned directory if it exists, otherwise the single parquet file."""
+    partitioned = processed_dir / name
+    if partitioned.is_dir():
+        return partitioned
+    single = processed_dir / f"{name}.parquet"
+    if single.exists():
+        return single
+    raise FileNotFoundError(f"Missing parquet: {single} (or partitioned {partitioned}/)")
+
+
+def write_dataset(
+    df: pd.DataFrame,
+    name: str,
+    processed_dir: Path = PROCESSED_DIR,
+    partitioned: bool = False,
+    incremental: bool = False,
+):
+    """Writes df as the dataset `name`.
+
+    A full write replaces the whole dataset. With `incremental` (partitioned
+    only), just the year partitions present in df are replaced and the rest
+    are kept.
+    """
+    single = processed_dir / f"{name}.parquet"
+    partitioned_dir = processed_dir / name
+
+    if not partitioned:
+        df.to_parquet(single, index=False)
+        if partitioned_dir.is_dir():
+            shutil.rmtree(partitioned_dir)
+        return
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index(PARTITION_COL),
+        PARTITION_COL,
+        table[PARTITION_COL].cast(pa.int64()),
+    )
+    # Escritura completa: no deben quedar particiones de años que ya no existen
+    if not incremental and partitioned_dir.is_dir():
+        shutil.rmtree(partitioned_dir)
+    # En incremental solo se reescriben las particiones (años) presentes en df
+    ds.write_dataset(
+        table,
+        partitioned_dir,
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        min_rows_per_group=min(ROW_GROUP_SIZE, max(len(df), 1)),
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression="zstd",
+            write_statistics=True,
+        ),
+    )
+    if single.exists():
+        single.unlink()
+
+
+def _conform(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table.select(schema.names).cast(schema)
+
+
+def _replace_partitions(src: Path, dst: Path):
+    # Sustituye solo los directorios year=... que trae `src`
+    dst.mkdir(parents=True, exist_ok=True)
+    for part in src.iterdir():
+        target = dst / part.name
+        if target.exists():
+            shutil.rmtree(target)
+        shutil.move(str(part), str(target))
+
+
+def write_dataset_batches(
+    batches: Iterable[pd.DataFrame],
+    name: str,
+    processed_dir: Path = PROCESSED_DIR,
+    partitioned: bool = False,
+    incremental: bool = False,
+) -> int:
+    """Streams DataFrame batches into the dataset, one batch in memory at a time.
+
+    Every batch is cast to SCHEMAS[name]. Output goes to a temporary location
+    and only replaces the existing dataset once the whole stream succeeded
+    (with `incremental`, only the year partitions that were written).
+    Returns the number of rows written.
+    """
+    schema = SCHEMAS[name]
+    single = processed_dir / f"{name}.parquet"
+    partitioned_dir = processed_dir / name
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    rows = 0
+
+    if not partitioned:
+        tmp = single.with_suffix(".parquet.tmp")
+        with pq.ParquetWriter(tmp, schema, compression="zstd", write_statistics=True) as writer:
+            for df in batches:
+                writer.write_table(_conform(df, schema), row_group_size=ROW_GROUP_SIZE)
+                rows += len(df)
+        tmp.replace(single)
+        if partitioned_dir.is_dir():
+            shutil.rmtree(partitioned_dir)
+        return rows
+
+    def record_batches():
+        nonlocal rows
+        for df in batches:
+            rows += len(df)
+            yield from _conform(df, schema).to_batches()
+
+    with tempfile.TemporaryDirectory(dir=processed_dir) as tmp:
+        ds.write_dataset(
+            record_batches(),
+            tmp,
+            schema=schema,
+            format="parquet",
+            partitioning=_partitioning(),
+            basename_template="part-{i}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=ROW_GROUP_SIZE,
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression="zstd",
+                write_statistics=True,
+            ),
+        )
+        if not incremental and partitioned_dir.is_dir():
+            shutil.rmtree(partitioned_dir)
+        _replace_partitions(Path(tmp), partitioned_dir)
+    if single.exists():
+        single.unlink()
+    return rows
+
+
+def read_dataset(
+    name: str,
+    processed_dir: Path = PROCESSED_DIR,
+    years: list[int] | None = None,
+    arrow: bool = False,
+) -> pd.DataFrame:
+    path = dataset_path(name, processed_dir)
+    if path.is_dir():
+        dataset = ds.dataset(path, format="parquet", partitioning=_partitioning())
+    else:
+        dataset = ds.dataset(path, format="parquet")
+
+    # Con particiones, el filtro por año descarta directorios enteros
+    filter_ = ds.field(PARTITION_COL).isin(years) if years else None
+    table = dataset.to_table(filter=filter_)
+
+    if arrow:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
+
+
+def parquet_scan(name: str, processed_dir: Path = PROCESSED_DIR) -> str:
+    """DuckDB table expression over the dataset, with hive partition pruning."""
+    path = dataset_path(name, processed_dir)
+    if path.is_dir():
+        return (
+            f"read_parquet('{(path / '**' / '*.parquet').as_posix()}', "
+            f"hive_partitioning = true, hive_types = {{'{PARTITION_COL}': BIGINT}})"
+        )
+    return f"read_parquet('{path.as_posix()}')"
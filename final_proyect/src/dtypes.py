@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
+
+# Helpers para trabajar igual con columnas numpy/object o pyarrow (ArrowDtype)
+
+ARROW_STRING = pd.ArrowDtype(pa.string())
+
+
+def is_arrow(s: pd.Series) -> bool:
+    return isinstance(s.dtype, pd.ArrowDtype)
+
+
+def is_arrow_frame(df: pd.DataFrame) -> bool:
+    return any(isinstance(dt, pd.ArrowDtype) for dt in df.dtypes)
+
+
+def working_copy(df: pd.DataFrame) -> pd.DataFrame:
+    # Los arrays Arrow son inmutables: basta con una copia superficial.
+    # Los bloques numpy pueden modificarse in place, así que se copian.
+    return df.copy(deep=not is_arrow_frame(df))
+
+
+def to_text(s: pd.Series) -> pd.Series:
+    if is_arrow(s):
+        return s.astype(ARROW_STRING)
+    return s.astype(str)
+
+
+def strip_text(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Se recortan las categorías (una vez por valor distinto), no cada fila
+        stripped = s.cat.categories.str.strip()
+        if stripped.is_unique:
+            return s.cat.rename_categories(stripped)
+        return s.astype(str).str.strip().astype("category")
+    return to_text(s).str.strip()
+
+
+def to_category(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return s.astype("category")
+
+
+def to_numeric(s: pd.Series) -> pd.Series:
+    if not is_arrow(s):
+        return pd.to_numeric(s, errors="coerce")
+
+    if pa.types.is_integer(s.dtype.pyarrow_dtype) or pa.types.is_floating(s.dtype.pyarrow_dtype):
+        return s
+
+    # pd.to_numeric(errors="coerce") falla con strings Arrow que tienen nulos,
+    # así que se convierte vía numpy y se vuelve a Arrow
+    values = pd.to_numeric(s.to_numpy(dtype=object, na_value=None), errors="coerce")
+    return pd.Series(
+        pd.arrays.ArrowExtensionArray(pa.array(np.asarray(values, dtype="float64"), from_pandas=True)),
+        index=s.index,
+        name=s.name,
+    )
+
+
+def to_int(s: pd.Series) -> pd.Series:
+    if is_arrow(s):
+        return to_numeric(s).astype(pd.ArrowDtype(pa.int64()))
+    return pd.to_numeric(s, errors="coerce").astype("Int64")
+
+
+# Tipos compactos: nombre del dtype nullable de pandas -> tipo Arrow equivalente
+COMPACT_ARROW_TYPES = {
+    "Int8": pa.int8(),
+    "Int16": pa.int16(),
+    "Int32": pa.int32(),
+    "Int64": pa.int64(),
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+}
+
+
+def _integral(valid: np.ndarray) -> bool:
+    return bool(np.all(np.mod(valid, 1) == 0))
+
+
+def _fits(valid: np.ndarray, dtype: str) -> bool:
+    if dtype.startswith("float") or valid.size == 0:
+        return True
+    info = np.iinfo(dtype.lower())
+    return _integral(valid) and valid.min() >= info.min and valid.max() <= info.max
+
+
+def to_compact(s: pd.Series, dtype: str) -> pd.Series:
+    """Numeric column as `dtype` (e.g. "Int16"), NA for non-numeric values.
+
+    Falls back to Int64/float64 when a value does not fit, instead of failing.
+    """
+    values = to_numeric(s)
+    valid = values.dropna().to_numpy(dtype="float64")
+    if not _fits(valid, dtype):
+        dtype = "Int64" if _integral(valid) else "float64"
+    if is_arrow(values):
+        return values.astype(pd.ArrowDtype(COMPACT_ARROW_TYPES[dtype]))
+    return values.astype(dtype)
+
+
+def to_datetime(s: pd.Series, format: str | None = None) -> pd.Series:
+    # Con un formato fijo no hay inferencia por elemento
+    if is_arrow(s):
+        if pa.types.is_timestamp(s.dtype.pyarrow_dtype):
+            return s
+        return pd.to_datetime(s, errors="coerce", format=format).astype(pd.ArrowDtype(pa.timestamp("ns")))
+    return pd.to_datetime(s, errors="coerce", format=format)
+
+
+def to_date(s: pd.Series) -> pd.Series:
+    if is_arrow(s):
+        return to_datetime(s).astype(pd.ArrowDtype(pa.date32()))
+    return pd.to_datetime(s, errors="coerce").dt.date
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    # Las columnas ArrowDtype se pasan sin copiar
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def concat_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat that keeps categorical columns categorical.
+
+    pd.concat only keeps a categorical when every frame has the same
+    categories, so the categories of each column are unified first.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    frames = [df.copy(deep=False) for df in frames]
+    for col, dtype in frames[0].dtypes.items():
+        if not isinstance(dtype, pd.CategoricalDtype) or not all(col in df for df in frames):
+            continue
+        if not all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames):
+            continue
+        try:
+            categories = union_categoricals([df[col] for df in frames], ignore_order=True).categories
+        except TypeError:
+            # categorías de tipos distintos (p. ej. una columna vacía): concat normal
+            continue
+        for df in frames:
+            df[col] = df[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
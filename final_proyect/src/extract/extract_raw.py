@@ -1,16 +1,128 @@
+import csv
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 import pandas as pd
 
-def extract_raw(raw_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
-    alonso_path = raw_dir / "fernandoalonso.csv"
-    winners_path = raw_dir / "winners_f1_1950_2025_v2.csv"
+from src.dtypes import concat_frames
+from src.schemas import RESULTS, WINNERS, read_csv_dtypes
 
-    if not alonso_path.exists():
-        raise FileNotFoundError(f"Missing file: {alonso_path}")
+DEFAULT_BATCH_SIZE = 100_000
+WINNERS_FILE = "winners_f1_1950_2025_v2.csv"
+# Manifiesto fichero -> piloto para los CSV de resultados sin columna driver_name
+DRIVERS_MANIFEST = "drivers.csv"
+
+@dataclass(frozen=True)
+class DriverFile:
+    path: Path
+    driver_name: str | None  # None = el CSV trae su propia columna driver_name
+
+
+def _read_csv(path: Path, arrow: bool, dtype: dict | None = None) -> pd.DataFrame:
+    if arrow:
+        # Parser CSV de Arrow y columnas ArrowDtype (sin objetos Python por string)
+        return pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow")
+    # El texto de baja cardinalidad se lee directamente como categorical
+    return pd.read_csv(path, dtype=dtype)
+
+
+def _iter_csv(path: Path, batch_size: int, arrow: bool, dtype: dict | None = None) -> Iterator[pd.DataFrame]:
+    # El parser "pyarrow" no admite chunksize: en modo Arrow se usa el parser C
+    # con columnas ArrowDtype
+    kwargs = {"dtype_backend": "pyarrow"} if arrow else {"dtype": dtype}
+    with pd.read_csv(path, chunksize=batch_size, **kwargs) as reader:
+        yield from reader
+
+
+def _header(path: Path) -> list[str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [c.strip().lower() for c in next(csv.reader(f), [])]
+
+
+def _manifest(raw_dir: Path) -> dict[str, str]:
+    path = raw_dir / DRIVERS_MANIFEST
+    if not path.exists():
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["file"].strip(): row["driver_name"].strip() for row in csv.DictReader(f)}
+
+
+def discover_driver_files(raw_dir: Path) -> list[DriverFile]:
+    """Every CSV under `raw_dir` whose header has the per-driver results columns.
+
+    The driver comes from the file's own `driver_name` column or, failing
+    that, from the drivers.csv manifest (file path relative to raw_dir).
+    """
+    names = _manifest(raw_dir)
+    expected = {c.name for c in RESULTS if c.name != "driver_name"}
+
+    files = []
+    for path in sorted(raw_dir.rglob("*.csv")):
+        if path.name in (WINNERS_FILE, DRIVERS_MANIFEST):
+            continue
+        header = _header(path)
+        if not expected.issubset(header):
+            continue
+        if "driver_name" in header:
+            files.append(DriverFile(path, None))
+            continue
+        key = path.relative_to(raw_dir).as_posix()
+        if key not in names:
+            raise ValueError(f"No driver for {path}: add it to {raw_dir / DRIVERS_MANIFEST} or add a driver_name column")
+        files.append(DriverFile(path, names[key]))
+
+    if not files:
+        raise FileNotFoundError(f"No driver results CSV found in {raw_dir}")
+    return files
+
+
+def _winners_path(raw_dir: Path) -> Path:
+    winners_path = raw_dir / WINNERS_FILE
     if not winners_path.exists():
         raise FileNotFoundError(f"Missing file: {winners_path}")
+    return winners_path
+
+
+def _with_driver(df: pd.DataFrame, driver: DriverFile) -> pd.DataFrame:
+    if driver.driver_name is not None:
+        df.insert(0, "driver_name", driver.driver_name)
+    return df
+
+
+def read_driver_file(driver: DriverFile, arrow: bool = False, typed: bool = True) -> pd.DataFrame:
+    return _with_driver(_read_csv(driver.path, arrow, read_csv_dtypes(RESULTS) if typed else None), driver)
+
+
+def _iter_driver_files(drivers: list[DriverFile], batch_size: int, arrow: bool) -> Iterator[pd.DataFrame]:
+    # Lotes de cada fichero, uno detrás de otro (un lote nunca mezcla pilotos)
+    for driver in drivers:
+        for df in _iter_csv(driver.path, batch_size, arrow, read_csv_dtypes(RESULTS)):
+            yield _with_driver(df, driver)
+
+
+def extract_raw_batches(
+    raw_dir: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    arrow: bool = False,
+) -> tuple[Iterator[pd.DataFrame], Iterator[pd.DataFrame]]:
+    """Same as extract_raw, but each dataset is a lazy stream of `batch_size`-row DataFrames."""
+    winners_path = _winners_path(raw_dir)
+    return (
+        _iter_driver_files(discover_driver_files(raw_dir), batch_size, arrow),
+        _iter_csv(winners_path, batch_size, arrow, read_csv_dtypes(WINNERS)),
+    )
+
+
+def extract_winners(raw_dir: Path, arrow: bool = False, typed: bool = True) -> pd.DataFrame:
+    return _read_csv(_winners_path(raw_dir), arrow, read_csv_dtypes(WINNERS) if typed else None)
+
+
+def extract_raw(raw_dir: Path, arrow: bool = False, typed: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Reads every driver results CSV (as one frame) and the winners CSV.
 
-    alonso = pd.read_csv(alonso_path)
-    winners = pd.read_csv(winners_path)
+    `typed=False` skips the schema dtypes (plain read_csv inference).
+    """
+    winners = extract_winners(raw_dir, arrow, typed)
+    results = concat_frames([read_driver_file(d, arrow, typed) for d in discover_driver_files(raw_dir)])
 
-    return alonso, winners
+    return results, winners
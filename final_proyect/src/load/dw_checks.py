@@ -1,122 +1,230 @@
 import duckdb
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
 
-from src.logging_setup import setup_logging
+from src import warehouse
+from src.datasets import UNMATCHED_PATH, parquet_scan
+from src.logging_setup import setup_logging, stage, with_stage_context
+from src.transform.quality_checks import DataQualityError
 import logging
 
-DB_PATH = Path("warehouse/dw.duckdb")
+SAMPLE_SIZE = 5
+
+
+# Check registry
+@dataclass(frozen=True)
+class Check:
+    """One declarative DW check, evaluated as part of its table's scan.
+
+    kind:
+      - "count":    COUNT(*) of `table` compared with `op` against the SQL scalar `expected`
+                    (or a callable returning it, resolved when the check runs)
+      - "unique":   `columns` are unique in `table`
+      - "fk":       every `columns` value in `table` exists in `ref` ("table.column")
+      - "coverage": every `columns` value in `table` appears in `ref` ("table.column")
+    """
+
+    name: str
+    table: str
+    kind: str
+    columns: str = ""
+    ref: str = ""
+    op: str = "="
+    expected: str | Callable[[], str] = ""
+
+
+@dataclass
+class CheckResult:
+    check: Check
+    violations: int | None
+    seconds: float
+    detail: str = ""
+    sample: list[tuple] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.violations == 0
+
+
+def _source_rows(name: str, where: str = "TRUE") -> Callable[[], str]:
+    # Los conteos esperados salen de los parquet procesados, no de literales.
+    # Se resuelve al ejecutar: el dataset puede ser fichero único o particionado.
+    return lambda: f"(SELECT COUNT(*) FROM {parquet_scan(name + '_clean')} WHERE {where})"
+
+
+def _matched_results_rows() -> Callable[[], str]:
+    # Las filas de resultados sin carrera quedan en cuarentena a propósito (ver load_dw)
+    source = _source_rows("results", "year IS NOT NULL")
+
+    def expected() -> str:
+        if not UNMATCHED_PATH.exists():
+            return source()
+        return f"({source()} - (SELECT COUNT(*) FROM read_parquet('{warehouse.sql_path(UNMATCHED_PATH)}')))"
+
+    return expected
+
+
+CHECKS = [
+    # 1) cardinalidad
+    Check("dim_season not empty", "dim_season", "count", op=">", expected="0"),
+    Check("dim_race not empty", "dim_race", "count", op=">", expected="0"),
+    Check("dim_driver not empty", "dim_driver", "count", op=">", expected="0"),
+    Check("dim_team not empty", "dim_team", "count", op=">", expected="0"),
+    # puede haber victorias compartidas, así que >= carreras
+    Check("winners facts >= races", "fact_race_winners", "count", op=">=", expected="(SELECT COUNT(*) FROM dim_race)"),
+    Check(
+        "winners facts match source", "fact_race_winners", "count",
+        expected=_source_rows("winners", "year IS NOT NULL AND date IS NOT NULL AND circuit IS NOT NULL"),
+    ),
+    Check("results facts match source", "fact_driver_race_results", "count", expected=_matched_results_rows()),
+    # 2) FKs
+    Check("fk winners.race_id", "fact_race_winners", "fk", "race_id", "dim_race.race_id"),
+    Check("fk winners.driver_id", "fact_race_winners", "fk", "driver_id", "dim_driver.driver_id"),
+    Check("fk winners.team_id", "fact_race_winners", "fk", "team_id", "dim_team.team_id"),
+    Check("fk results.race_id", "fact_driver_race_results", "fk", "race_id", "dim_race.race_id"),
+    Check("fk results.team_id", "fact_driver_race_results", "fk", "team_id", "dim_team.team_id"),
+    Check("fk results.driver_id", "fact_driver_race_results", "fk", "driver_id", "dim_driver.driver_id"),
+    # 3) grano
+    Check("unique dim_race (year, date, circuit)", "dim_race", "unique", "year, date, circuit"),
+    # cada piloto participa una vez por carrera
+    Check("unique results (race_id, driver_id)", "fact_driver_race_results", "unique", "race_id, driver_id"),
+    # cada carrera tiene al menos un ganador
+    Check("races with winner", "dim_race", "coverage", "race_id", "fact_race_winners.race_id"),
+]
+
+
+# Compilation: one query (= one scan) per table
+def _compile(table: str, checks: list[Check]) -> str:
+    selects = []
+    joins = []
+    for i, c in enumerate(checks):
+        if c.kind == "count":
+            expected = c.expected() if callable(c.expected) else c.expected
+            selects.append(f"CASE WHEN COUNT(*) {c.op} {expected} THEN 0 ELSE 1 END AS v{i}")
+            selects.append(f"{expected} AS e{i}")
+        elif c.kind == "unique":
+            key = ", ".join(f"t.{col.strip()}" for col in c.columns.split(","))
+            selects.append(f"COUNT(*) - COUNT(DISTINCT ({key})) AS v{i}")
+        elif c.kind in ("fk", "coverage"):
+            ref_table, ref_col = c.ref.split(".")
+            # coverage puede tener varias filas hijas por clave: se deduplica
+            ref = ref_table if c.kind == "fk" else f"(SELECT DISTINCT {ref_col} FROM {ref_table})"
+            joins.append(f"LEFT JOIN {ref} j{i} ON t.{c.columns} = j{i}.{ref_col}")
+            selects.append(f"COUNT(*) FILTER (WHERE j{i}.{ref_col} IS NULL) AS v{i}")
+        else:
+            raise ValueError(f"Unknown check kind: {c.kind}")
+
+    return f"SELECT COUNT(*) AS n, {', '.join(selects)} FROM {table} t {' '.join(joins)}"
+
+
+def _sample_sql(c: Check) -> str | None:
+    if c.kind == "unique":
+        return (
+            f"SELECT {c.columns}, COUNT(*) AS n FROM {c.table} "
+            f"GROUP BY {c.columns} HAVING COUNT(*) > 1 LIMIT {SAMPLE_SIZE}"
+        )
+    if c.kind in ("fk", "coverage"):
+        ref_table, ref_col = c.ref.split(".")
+        return (
+            f"SELECT t.* FROM {c.table} t WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {ref_table} r WHERE r.{ref_col} = t.{c.columns}) LIMIT {SAMPLE_SIZE}"
+        )
+    return None
+
+
+def _run_table(cur: duckdb.DuckDBPyConnection, table: str, checks: list[Check]) -> tuple[int | None, list[CheckResult]]:
+    start = time.perf_counter()
+    try:
+        row = cur.execute(_compile(table, checks)).fetchone()
+    except (duckdb.Error, FileNotFoundError) as e:
+        seconds = time.perf_counter() - start
+        return None, [CheckResult(c, None, seconds, detail=f"error: {e}") for c in checks]
+    seconds = time.perf_counter() - start
+
+    n, values = row[0], row[1:]
+    results = []
+    pos = 0
+    for c in checks:
+        violations = values[pos]
+        pos += 1
+        detail = ""
+        if c.kind == "count":
+            detail = f"rows={n} expected {c.op} {values[pos]}"
+            pos += 1
+
+        sample = []
+        sample_sql = _sample_sql(c)
+        if violations and sample_sql:
+            sample = cur.execute(sample_sql).fetchall()
+
+        results.append(CheckResult(c, violations, seconds, detail, sample))
+    return n, results
+
+
+def run_checks(con: duckdb.DuckDBPyConnection, checks: list[Check] = CHECKS) -> tuple[dict[str, int], list[CheckResult]]:
+    """Runs every check, one scan per table, tables in parallel on their own cursors.
+
+    Returns the row count per table and one result per check (in registry order).
+    """
+    by_table: dict[str, list[Check]] = {}
+    for c in checks:
+        by_table.setdefault(c.table, []).append(c)
+
+    @with_stage_context
+    def run(item):
+        table, table_checks = item
+        cur = con.cursor()
+        try:
+            with stage(table, checks=len(table_checks)) as m:
+                n, results = _run_table(cur, table, table_checks)
+                m.rows_in = n
+                m.extra["failed"] = sum(not r.passed for r in results)
+            return table, (n, results)
+        finally:
+            cur.close()
+
+    with ThreadPoolExecutor(max_workers=len(by_table)) as pool:
+        outputs = list(pool.map(run, by_table.items()))
+
+    counts = {table: n for table, (n, _) in outputs}
+    by_check = {r.check: r for _, (_, results) in outputs for r in results}
+    return counts, [by_check[c] for c in checks]
+
 
 def main():
     setup_logging()
     logger = logging.getLogger("quality.dw_checks")
     logger.info("Starting DW checks")
-    con = duckdb.connect(str(DB_PATH))
-
-    counts = con.execute("""
-      SELECT
-        (SELECT COUNT(*) FROM dim_season) AS seasons,
-        (SELECT COUNT(*) FROM dim_race)   AS races,
-        (SELECT COUNT(*) FROM dim_driver) AS drivers,
-        (SELECT COUNT(*) FROM dim_team)   AS teams,
-        (SELECT COUNT(*) FROM fact_race_winners) AS winners_facts,
-        (SELECT COUNT(*) FROM fact_alonso_race_results) AS alonso_facts
-    """).fetchone()
-
-    seasons, races, drivers, teams, winners_facts, alonso_facts = counts
-    print(f"seasons={seasons} races={races} drivers={drivers} teams={teams} "
-          f"winners_facts={winners_facts} alonso_facts={alonso_facts}")
-
-    # checks “esperados”
-    assert races > 0 and seasons > 0 and drivers > 0 and teams > 0, "Empty dimensions? Load failed."
-    assert winners_facts >= races, "Winners facts should be >= races (shared wins possible)."
-    # Si CSV dice 384 participaciones:
-    assert alonso_facts == 384, f"Expected 384 Alonso participations, got {alonso_facts}"
-
-    # 2) FK checks
-    fk_winners_race = con.execute("""
-      SELECT COUNT(*)
-      FROM fact_race_winners f
-      LEFT JOIN dim_race d ON f.race_id = d.race_id
-      WHERE d.race_id IS NULL
-    """).fetchone()[0]
-
-    fk_winners_driver = con.execute("""
-      SELECT COUNT(*)
-      FROM fact_race_winners f
-      LEFT JOIN dim_driver d ON f.driver_id = d.driver_id
-      WHERE d.driver_id IS NULL
-    """).fetchone()[0]
-
-    fk_winners_team = con.execute("""
-      SELECT COUNT(*)
-      FROM fact_race_winners f
-      LEFT JOIN dim_team d ON f.team_id = d.team_id
-      WHERE d.team_id IS NULL
-    """).fetchone()[0]
-
-    fk_alonso_race = con.execute("""
-      SELECT COUNT(*)
-      FROM fact_alonso_race_results f
-      LEFT JOIN dim_race d ON f.race_id = d.race_id
-      WHERE d.race_id IS NULL
-    """).fetchone()[0]
-
-    fk_alonso_team = con.execute("""
-      SELECT COUNT(*)
-      FROM fact_alonso_race_results f
-      LEFT JOIN dim_team d ON f.team_id = d.team_id
-      WHERE d.team_id IS NULL
-    """).fetchone()[0]
-
-    fk_alonso_driver = con.execute("""
-      SELECT COUNT(*)
-      FROM fact_alonso_race_results f
-      LEFT JOIN dim_driver d ON f.driver_id = d.driver_id
-      WHERE d.driver_id IS NULL
-    """).fetchone()[0]
-
-    assert fk_winners_race == 0, f"Missing dim_race for winners facts: {fk_winners_race}"
-    assert fk_winners_driver == 0, f"Missing dim_driver for winners facts: {fk_winners_driver}"
-    assert fk_winners_team == 0, f"Missing dim_team for winners facts: {fk_winners_team}"
-    assert fk_alonso_race == 0, f"Missing dim_race for alonso facts: {fk_alonso_race}"
-    assert fk_alonso_team == 0, f"Missing dim_team for alonso facts: {fk_alonso_team}"
-    assert fk_alonso_driver == 0, f"Missing dim_driver for alonso facts: {fk_alonso_driver}"
-
-    # 3a) dim_race clave única (year,date,circuit) ya tiene UNIQUE, pero lo comprobamos
-    dup_races = con.execute("""
-      SELECT COUNT(*)
-      FROM (
-        SELECT year, date, circuit, COUNT(*) n
-        FROM dim_race
-        GROUP BY year, date, circuit
-        HAVING COUNT(*) > 1
-      )
-    """).fetchone()[0]
-    assert dup_races == 0, f"Duplicate races in dim_race (year,date,circuit): {dup_races}"
-
-    # 3b) fact_alonso: una fila por race_id (Alonso participa una vez por carrera)
-    dup_alonso_race = con.execute("""
-      SELECT COUNT(*)
-      FROM (
-        SELECT race_id, COUNT(*) n
-        FROM fact_alonso_race_results
-        GROUP BY race_id
-        HAVING COUNT(*) > 1
-      )
-    """).fetchone()[0]
-    assert dup_alonso_race == 0, f"Duplicate Alonso rows per race_id: {dup_alonso_race}"
-
-    # 3c) fact_winners: puede haber >1 por carrera, pero nunca debería ser 0 por carrera
-    races_without_winner = con.execute("""
-      SELECT COUNT(*)
-      FROM dim_race r
-      LEFT JOIN fact_race_winners f ON f.race_id = r.race_id
-      WHERE f.race_id IS NULL
-    """).fetchone()[0]
-    assert races_without_winner == 0, f"Races with no winner fact: {races_without_winner}"
+    con = warehouse.connect(read_only=True)
+
+    with stage("dw_checks") as m:
+        counts, results = run_checks(con)
+        m.extra["failed"] = sum(not r.passed for r in results)
+
+    print(f"seasons={counts.get('dim_season')} races={counts.get('dim_race')} "
+          f"drivers={counts.get('dim_driver')} teams={counts.get('dim_team')} "
+          f"winners_facts={counts.get('fact_race_winners')} results_facts={counts.get('fact_driver_race_results')}")
+
+    for r in results:
+        status = "OK  " if r.passed else "FAIL"
+        line = f"{status} {r.check.name:<40} violations={r.violations} ({r.seconds * 1000:.1f} ms)"
+        if r.detail:
+            line += f" {r.detail}"
+        print(line)
+        for row in r.sample:
+            print(f"       sample: {row}")
 
-    print("OK: DW checks passed.")
     con.close()
 
+    failed = [r.check.name for r in results if not r.passed]
+    if failed:
+        logger.error("DW checks failed: %s", failed)
+        raise DataQualityError(f"{len(failed)} DW checks failed: {failed}")
+
+    print("OK: DW checks passed.")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+import argparse
+import datetime
+import json
+import logging
+import shutil
+from pathlib import Path
+
+import duckdb
+import pyarrow.parquet as pq
+
+from src import warehouse
+from src.datasets import ROW_GROUP_SIZE
+from src.logging_setup import duckdb_profile, setup_logging, stage
+from src.warehouse import LATEST, MANIFEST, SNAPSHOT_DIR
+
+# Instantáneas del DW en parquet para consumidores fuera del pipeline
+# (estructura en warehouse.py, que también las abre). Una versión nunca se
+# modifica: se escribe en un directorio temporal y se renombra al final, así
+# que un lector nunca ve una instantánea a medias.
+
+TABLE_PREFIXES = ("dim_", "fact_", "agg_")
+
+# Orden de escritura por tabla: las claves de join van primero para que las
+# estadísticas min/max de cada row group permitan saltar grupos enteros
+SORT_KEYS = {
+    "dim_season": ["season_id"],
+    "dim_race": ["race_id"],
+    "dim_driver": ["driver_id"],
+    "dim_team": ["team_id"],
+    "fact_race_winners": ["season_id", "race_id", "driver_id"],
+    "fact_driver_race_results": ["season_id", "race_id", "driver_id"],
+    "agg_driver_wins": ["season_id", "driver_id"],
+    "agg_team_wins": ["season_id", "team_id"],
+    "agg_driver_season_stats": ["season_id", "driver_id"],
+    "agg_races_by_continent": ["season_id", "continent"],
+}
+
+
+def snapshot_tables(con: duckdb.DuckDBPyConnection) -> list[str]:
+    """Dimension, fact and rollup tables of the DW (the key_* registry is internal)."""
+    rows = con.execute(
+        """
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+        """
+    ).fetchall()
+    return [name for (name,) in rows if name.startswith(TABLE_PREFIXES)]
+
+
+def _new_version(snapshot_dir: Path) -> str:
+    version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    candidate, n = version, 1
+    while (snapshot_dir / candidate).exists():
+        n += 1
+        candidate = f"{version}_{n}"
+    return candidate
+
+
+def _export_table(con: duckdb.DuckDBPyConnection, table: str, path: Path) -> dict:
+    order = SORT_KEYS.get(table, [])
+    order_by = f" ORDER BY {', '.join(order)}" if order else ""
+    with duckdb_profile(con, "export"):
+        con.execute(
+            f"COPY (SELECT * FROM {table}{order_by}) TO '{warehouse.sql_path(path)}' "
+            f"(FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {ROW_GROUP_SIZE})"
+        )
+
+    meta = pq.ParquetFile(path).metadata
+    return {
+        "file": path.name,
+        "rows": meta.num_rows,
+        "row_groups": meta.num_row_groups,
+        "bytes": path.stat().st_size,
+        "sort_by": order,
+        "columns": [
+            {"name": row[0], "type": row[1]} for row in con.execute(f"DESCRIBE {table}").fetchall()
+        ],
+    }
+
+
+def export_snapshot(con: duckdb.DuckDBPyConnection, snapshot_dir: Path = SNAPSHOT_DIR) -> Path:
+    """Writes every DW table to a new snapshot version and returns its directory.
+
+    All tables are read inside one transaction, so the snapshot is
+    consistent even if it is taken on a shared session connection.
+    """
+    logger = logging.getLogger("load.export_snapshot")
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    version = _new_version(snapshot_dir)
+    tmp = snapshot_dir / f".{version}.tmp"
+    tmp.mkdir()
+
+    try:
+        with stage("export_snapshot", version=version) as run:
+            con.begin()
+            try:
+                tables = {}
+                for table in snapshot_tables(con):
+                    with stage(f"export_{table}") as m:
+                        tables[table] = _export_table(con, table, tmp / f"{table}.parquet")
+                        m.rows_out = tables[table]["rows"]
+            finally:
+                con.rollback()
+            run.rows_out = sum(t["rows"] for t in tables.values())
+
+        manifest = {
+            "version": version,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "source": warehouse.DB_PATH.as_posix(),
+            "duckdb_version": duckdb.__version__,
+            "compression": "zstd",
+            "row_group_size": ROW_GROUP_SIZE,
+            "tables": tables,
+        }
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        target = snapshot_dir / version
+        tmp.rename(target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # El puntero se reemplaza de forma atómica una vez que la versión está completa
+    latest = snapshot_dir / f".{LATEST}.tmp"
+    latest.write_text(version + "\n", encoding="utf-8")
+    latest.replace(snapshot_dir / LATEST)
+
+    logger.info(
+        "Snapshot %s: %s tables, %s rows", version, len(tables), sum(t["rows"] for t in tables.values())
+    )
+    return target
+
+
+def prune(snapshot_dir: Path = SNAPSHOT_DIR, keep: int = 1) -> list[str]:
+    """Deletes all but the `keep` newest versions; returns the deleted ones."""
+    old = warehouse.snapshot_versions(snapshot_dir)[:-keep] if keep > 0 else []
+    for version in old:
+        shutil.rmtree(snapshot_dir / version)
+    return old
+
+
+def main(snapshot_dir: Path = SNAPSHOT_DIR, keep: int | None = None, profile_dir: Path | None = None) -> Path:
+    setup_logging(profile_dir=profile_dir)
+    logger = logging.getLogger("load.export_snapshot")
+    logger.info("Exporting DW snapshot to %s", snapshot_dir)
+
+    con = warehouse.connect(read_only=True)
+    try:
+        path = export_snapshot(con, snapshot_dir)
+    finally:
+        con.close()
+
+    if keep:
+        for version in prune(snapshot_dir, keep):
+            logger.info("Removed old snapshot %s", version)
+    print(f"Snapshot written to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the DW tables to a versioned parquet snapshot.")
+    parser.add_argument("--snapshot-dir", type=Path, default=SNAPSHOT_DIR)
+    parser.add_argument("--keep", type=int, help="Keep only this many newest versions (default: keep all).")
+    parser.add_argument("--profile-dir", type=Path, help="Write the DuckDB profile of every COPY to this directory.")
+    args = parser.parse_args()
+    main(snapshot_dir=args.snapshot_dir, keep=args.keep, profile_dir=args.profile_dir)
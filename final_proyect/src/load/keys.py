@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+
+import duckdb
+
+from src.logging_setup import duckdb_profile
+
+# Registro persistente de claves subrogadas (clave natural -> ID entero).
+# Las tablas key_* solo crecen: drop_tables.sql no las borra, así que un
+# full refresh vuelve a dar los mismos IDs a los mismos pilotos/equipos/carreras.
+
+
+@dataclass(frozen=True)
+class KeyMap:
+    table: str
+    id_col: str
+    keys: tuple[str, ...]
+
+
+KEY_MAPS = {
+    "dim_season": KeyMap("key_season", "season_id", ("year",)),
+    "dim_race": KeyMap("key_race", "race_id", ("year", "date", "circuit")),
+    "dim_driver": KeyMap("key_driver", "driver_id", ("driver_name",)),
+    "dim_team": KeyMap("key_team", "team_id", ("team_name",)),
+}
+
+
+def _on(keys: tuple[str, ...], left: str, right: str) -> str:
+    return " AND ".join(f"{left}.{k} = {right}.{k}" for k in keys)
+
+
+def register_keys(con: duckdb.DuckDBPyConnection, dim: str, source: str, order_by: str) -> int:
+    """Appends the natural keys of `source` that are not registered yet.
+
+    New keys get `MAX(id) + row_number()` in `order_by` order (over the
+    source row `s`), so an empty registry numbers them 1..n. Keys already in
+    `dim` but missing from the registry (warehouses loaded before it
+    existed) are adopted with their current ID first.
+
+    Returns the number of new keys.
+    """
+    km = KEY_MAPS[dim]
+    cols = ", ".join(km.keys)
+
+    con.execute(f"""
+        INSERT INTO {km.table} ({cols}, {km.id_col})
+        SELECT {", ".join(f"d.{k}" for k in km.keys)}, d.{km.id_col}
+        FROM {dim} d
+        WHERE NOT EXISTS (SELECT 1 FROM {km.table} k WHERE {_on(km.keys, "k", "d")})
+    """)
+
+    with duckdb_profile(con, f"{km.table}.register"):
+        return con.execute(f"""
+            INSERT INTO {km.table} ({cols}, {km.id_col})
+            SELECT
+              {", ".join(f"s.{k}" for k in km.keys)},
+              (SELECT COALESCE(MAX({km.id_col}), 0) FROM {km.table})
+                + row_number() OVER (ORDER BY {order_by})
+            FROM (SELECT DISTINCT {cols} FROM ({source})) AS s
+            WHERE NOT EXISTS (SELECT 1 FROM {km.table} k WHERE {_on(km.keys, "k", "s")})
+        """).fetchone()[0]
+
+
+def reset_keys(con: duckdb.DuckDBPyConnection):
+    # Solo para empezar de cero: los IDs dejan de ser estables respecto a cargas anteriores
+    for km in KEY_MAPS.values():
+        con.execute(f"DELETE FROM {km.table}")
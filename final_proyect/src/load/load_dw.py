@@ -1,59 +1,159 @@
+import argparse
 from pathlib import Path
 import duckdb
 import pandas as pd
 
-from src.logging_setup import setup_logging
+from src import datasets, warehouse
+from src.dtypes import is_arrow_frame, to_arrow_table, to_date, to_int, to_numeric, to_text, working_copy
+from src.load import keys
+from src.load.race_matching import match_races
+from src.load.rollups import refresh_rollups
+from src.logging_setup import duckdb_profile, setup_logging, stage
 import logging
     
 SQL_DIR = Path("sql")
-PROCESSED_DIR = Path("data/processed")
-WAREHOUSE_DIR = Path("warehouse")
-DB_PATH = WAREHOUSE_DIR / "dw.duckdb"
+PROCESSED_DIR = datasets.PROCESSED_DIR
+UNMATCHED_PATH = datasets.UNMATCHED_PATH
 
 
 # Helpers
-def _read_parquet(path: Path) -> pd.DataFrame:
-    if not path.exists():
-        raise FileNotFoundError(f"Missing parquet: {path}")
-    return pd.read_parquet(path)
-
-
 def _norm_text(s: pd.Series) -> pd.Series:
     # Normaliza texto de forma "safe" para joins
     return (
-        s.astype(str)
+        to_text(s)
         .str.replace("\u00a0", " ", regex=False)
         .str.strip()
     )
 
 
-def create_schema(con: duckdb.DuckDBPyConnection):
-    sql_path = SQL_DIR / "create_tables.sql"
+def _register(con: duckdb.DuckDBPyConnection, name: str, df: pd.DataFrame):
+    # DataFrames con columnas Arrow se registran como tabla Arrow (zero-copy)
+    con.register(name, to_arrow_table(df) if is_arrow_frame(df) else df)
+
+
+def _run_sql_file(con: duckdb.DuckDBPyConnection, name: str):
+    sql_path = SQL_DIR / name
     if not sql_path.exists():
         raise FileNotFoundError(f"Missing SQL schema file: {sql_path}")
     con.execute(sql_path.read_text(encoding="utf-8"))
 
 
+def create_schema(con: duckdb.DuckDBPyConnection, incremental: bool = False, reset: bool = False):
+    # Full refresh borra las tablas; en modo incremental se conservan.
+    # El registro de claves (key_*) se conserva siempre, salvo con reset
+    if not incremental:
+        _run_sql_file(con, "drop_tables.sql")
+    _run_sql_file(con, "create_tables.sql")
+    if reset:
+        keys.reset_keys(con)
+    # temporadas con hechos nuevos/cambiados en esta carga (ver _merge)
+    con.execute("CREATE OR REPLACE TEMP TABLE touched_seasons (season_id INTEGER)")
+
+
+def _merge(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    id_col: str,
+    source: str,
+    keys: list[str],
+    values: list[str],
+    order_by: str,
+    track: str | None = None,
+    key_table: str | None = None,
+    scope: str | None = None,
+) -> tuple[int, int, int]:
+    """Upsert `source` into `table` matching on the natural key `keys`.
+
+    Existing rows keep their surrogate key and only get their `values` updated
+    when something changed. New rows take their ID from the `key_table`
+    registry when given (dimensions), otherwise `MAX(id_col) + row_number()`
+    in `order_by` order, which numbers an empty table 1..n.
+
+    If `track` is given (a season_id expression over the source row `s`), the
+    seasons of every new or changed row are added to `touched_seasons` so the
+    rollups can be refreshed for those seasons only.
+
+    If `scope` is given (a query of season_ids), `source` holds every row of
+    those seasons: rows of `table` in them that are no longer in `source` are
+    deleted and their seasons added to `touched_seasons` too.
+
+    Returns (updated, inserted, deleted) row counts.
+    """
+    on = " AND ".join(f"t.{k} = s.{k}" for k in keys)
+    changed = " OR ".join(f"t.{v} IS DISTINCT FROM s.{v}" for v in values) or "FALSE"
+
+    deleted = 0
+    if scope:
+        missing = f"t.season_id IN ({scope}) AND NOT EXISTS (SELECT 1 FROM ({source}) AS s WHERE {on})"
+        with duckdb_profile(con, f"{table}.delete"):
+            con.execute(f"INSERT INTO touched_seasons SELECT DISTINCT t.season_id FROM {table} t WHERE {missing}")
+            deleted = con.execute(f"DELETE FROM {table} AS t WHERE {missing}").fetchone()[0]
+
+    if track:
+        with duckdb_profile(con, f"{table}.track"):
+            con.execute(f"""
+                INSERT INTO touched_seasons
+                SELECT DISTINCT {track}
+                FROM ({source}) AS s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {on} AND NOT ({changed}))
+            """)
+
+    updated = 0
+    if values:
+        assignments = ", ".join(f"{v} = s.{v}" for v in values)
+        with duckdb_profile(con, f"{table}.update"):
+            updated = con.execute(f"""
+                UPDATE {table} AS t
+                SET {assignments}
+                FROM ({source}) AS s
+                WHERE {on} AND ({changed})
+            """).fetchone()[0]
+
+    cols = keys + values
+    if key_table:
+        new_id = f"k.{id_col}"
+        key_join = f"JOIN {key_table} k ON " + " AND ".join(f"k.{k} = s.{k}" for k in keys)
+    else:
+        new_id = f"(SELECT COALESCE(MAX({id_col}), 0) FROM {table}) + row_number() OVER (ORDER BY {order_by})"
+        key_join = ""
+    with duckdb_profile(con, f"{table}.insert"):
+        inserted = con.execute(f"""
+            INSERT INTO {table} ({id_col}, {", ".join(cols)})
+            SELECT
+              {new_id} AS {id_col},
+              {", ".join(f"s.{c}" for c in cols)}
+            FROM ({source}) AS s
+            {key_join}
+            WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {on})
+        """).fetchone()[0]
+
+    logging.getLogger("load.load_dw").info(
+        "%s: %s updated, %s inserted, %s deleted", table, updated, inserted, deleted
+    )
+    return updated, inserted, deleted
+
+
 # Dimensions
 def load_dimensions(
     con: duckdb.DuckDBPyConnection,
-    alonso: pd.DataFrame,
+    results: pd.DataFrame,
     winners: pd.DataFrame,
 ) -> pd.DataFrame:
-    alonso = alonso.copy()
-    winners = winners.copy()
-
-    # Alonso
-    alonso["year"] = pd.to_numeric(alonso["year"], errors="coerce").astype("Int64")
-    alonso["team"] = _norm_text(alonso.get("team", pd.Series(dtype="object")))
-    alonso["race_number"] = pd.to_numeric(alonso.get("race_number", pd.Series(dtype="object")), errors="coerce")
+    results = working_copy(results)
+    winners = working_copy(winners)
+
+    # Resultados por piloto
+    results["driver_name"] = _norm_text(results["driver_name"])
+    results["year"] = to_int(results["year"])
+    results["team"] = _norm_text(results.get("team", pd.Series(dtype="object")))
+    results["race_number"] = to_numeric(results.get("race_number", pd.Series(dtype="object")))
     for col in ["grid_position", "race_position", "did_finish", "event"]:
-        if col not in alonso.columns:
-            alonso[col] = pd.NA
+        if col not in results.columns:
+            results[col] = pd.NA
 
     # Winners
-    winners["year"] = pd.to_numeric(winners["year"], errors="coerce").astype("Int64")
-    winners["date"] = pd.to_datetime(winners["date"], errors="coerce").dt.date
+    winners["year"] = to_int(winners["year"])
+    winners["date"] = to_date(winners["date"])
     winners["grand_prix"] = _norm_text(winners.get("grand_prix", pd.Series(dtype="object")))
     winners["circuit"] = _norm_text(winners.get("circuit", pd.Series(dtype="object")))
     winners["continent"] = _norm_text(winners.get("continent", pd.Series(dtype="object")))
@@ -61,16 +161,14 @@ def load_dimensions(
     winners["winner_name"] = _norm_text(winners.get("winner_name", pd.Series(dtype="object")))
 
     # dim_season
-    years = pd.concat([alonso[["year"]], winners[["year"]]], ignore_index=True).dropna()
+    years = pd.concat([results[["year"]], winners[["year"]]], ignore_index=True).dropna()
     years = years.drop_duplicates().sort_values("year").reset_index(drop=True)
-    years["season_id"] = range(1, len(years) + 1)
 
-    con.register("tmp_years", years)
-    con.execute("INSERT INTO dim_season (season_id, year) SELECT season_id, year FROM tmp_years")
+    _register(con, "tmp_years", years)
 
     # dim_race
     # 1 fila = 1 carrera real => clave única (year, date, circuit)
-    w_cal = winners[["year", "date", "circuit", "grand_prix", "continent"]].dropna(subset=["year", "date", "circuit"]).copy()
+    w_cal = winners[["year", "date", "circuit", "grand_prix", "continent"]].dropna(subset=["year", "date", "circuit"])
 
     w_cal = (
         w_cal.sort_values(["year", "date", "circuit", "grand_prix"])
@@ -82,148 +180,483 @@ def load_dimensions(
     w_cal = w_cal.sort_values(["year", "date", "circuit"]).reset_index(drop=True)
     w_cal["race_number"] = w_cal.groupby("year").cumcount() + 1
 
-    dim_race_df = w_cal.rename(columns={"grand_prix": "grand_prix"}).copy()
-    dim_race_df["race_id"] = range(1, len(dim_race_df) + 1)
+    dim_race_df = w_cal
 
-    con.register("tmp_races", dim_race_df)
-    con.execute("""
-        INSERT INTO dim_race (race_id, year, race_number, grand_prix, date, circuit, continent)
-        SELECT race_id, year, race_number, grand_prix, date, circuit, continent
-        FROM tmp_races
-    """)
+    _register(con, "tmp_races", dim_race_df)
 
     # dim_driver
     drivers = pd.concat(
-        [winners["winner_name"].dropna(), pd.Series(["Fernando Alonso"])],
+        [winners["winner_name"].dropna(), results["driver_name"].dropna()],
         ignore_index=True
     ).drop_duplicates().sort_values().reset_index(drop=True)
 
     dim_driver_df = pd.DataFrame({"driver_name": drivers})
-    dim_driver_df["driver_id"] = range(1, len(dim_driver_df) + 1)
 
-    con.register("tmp_drivers", dim_driver_df)
-    con.execute("INSERT INTO dim_driver (driver_id, driver_name) SELECT driver_id, driver_name FROM tmp_drivers")
+    _register(con, "tmp_drivers", dim_driver_df)
 
     # dim_team
-    teams = pd.concat([alonso["team"].dropna(), winners["team"].dropna()], ignore_index=True)
+    teams = pd.concat([results["team"].dropna(), winners["team"].dropna()], ignore_index=True)
     teams = teams.drop_duplicates().sort_values().reset_index(drop=True)
 
     dim_team_df = pd.DataFrame({"team_name": teams})
-    dim_team_df["team_id"] = range(1, len(dim_team_df) + 1)
 
-    con.register("tmp_teams", dim_team_df)
-    con.execute("INSERT INTO dim_team (team_id, team_name) SELECT team_id, team_name FROM tmp_teams")
+    _register(con, "tmp_teams", dim_team_df)
 
-    return alonso
+    with stage("dimensions"):
+        _merge_dimensions(con)
+    return results
+
+
+def _merge_dimension(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    source: str,
+    values: list[str],
+    order_by: str,
+    track: str | None = None,
+):
+    # Primero se registran las claves nuevas; la dimensión toma sus IDs del registro
+    km = keys.KEY_MAPS[table]
+    with stage(table) as m:
+        new_keys = keys.register_keys(con, table, source, order_by)
+        logging.getLogger("load.load_dw").info("%s: %s new keys registered", km.table, new_keys)
+        updated, inserted, _ = _merge(
+            con, table, km.id_col, source,
+            keys=list(km.keys),
+            values=values,
+            order_by=order_by,
+            track=track,
+            key_table=km.table,
+        )
+        m.rows_out = updated + inserted
+        m.extra.update(new_keys=new_keys, updated=updated, inserted=inserted)
+
+
+def _merge_dimensions(con: duckdb.DuckDBPyConnection):
+    # Espera tmp_years, tmp_races, tmp_drivers y tmp_teams ya preparados
+    _merge_dimension(con, "dim_season", "SELECT * FROM tmp_years", [], "s.year")
+    _merge_dimension(
+        con, "dim_race", "SELECT * FROM tmp_races",
+        values=["race_number", "grand_prix", "continent"],
+        order_by="s.year, s.date, s.circuit",
+        track="(SELECT d.season_id FROM dim_season d WHERE d.year = s.year)",
+    )
+    _merge_dimension(con, "dim_driver", "SELECT * FROM tmp_drivers", [], "s.driver_name")
+    _merge_dimension(con, "dim_team", "SELECT * FROM tmp_teams", [], "s.team_name")
 
 
 # Facts
 def load_facts(
     con: duckdb.DuckDBPyConnection,
-    alonso: pd.DataFrame,
+    results: pd.DataFrame,
     winners: pd.DataFrame,
 ):
-    winners = winners.copy()
-    winners["year"] = pd.to_numeric(winners["year"], errors="coerce").astype("Int64")
-    winners["date"] = pd.to_datetime(winners["date"], errors="coerce").dt.date
+    winners = working_copy(winners)
+    winners["year"] = to_int(winners["year"])
+    winners["date"] = to_date(winners["date"])
     winners["circuit"] = _norm_text(winners.get("circuit", pd.Series(dtype="object")))
     winners["team"] = _norm_text(winners.get("team", pd.Series(dtype="object")))
     winners["winner_name"] = _norm_text(winners.get("winner_name", pd.Series(dtype="object")))
 
-    alonso = alonso.copy()
-    alonso["year"] = pd.to_numeric(alonso["year"], errors="coerce").astype("Int64")
-    alonso["team"] = _norm_text(alonso.get("team", pd.Series(dtype="object")))
-    alonso["race_number"] = pd.to_numeric(alonso.get("race_number", pd.Series(dtype="object")), errors="coerce")
+    results = working_copy(results)
+    results["driver_name"] = _norm_text(results["driver_name"])
+    results["year"] = to_int(results["year"])
+    results["team"] = _norm_text(results.get("team", pd.Series(dtype="object")))
+    results["race_number"] = to_numeric(results.get("race_number", pd.Series(dtype="object")))
 
-    alonso = alonso.sort_values(["year", "race_number"], na_position="last").reset_index(drop=True)
-    alonso["season_round"] = alonso.groupby("year").cumcount() + 1
+    results = results.sort_values(["driver_name", "year", "race_number"], na_position="last").reset_index(drop=True)
+    results["season_round"] = results.groupby(["driver_name", "year"]).cumcount() + 1
 
-    con.register("stg_winners", winners)
-    con.register("stg_alonso", alonso)
+    _register(con, "stg_winners", winners)
+    _register(con, "stg_results", results)
 
-    # fact_race_winners
+    with stage("facts", rows_in=len(winners) + len(results)):
+        _merge_facts(con)
+
+
+def _resolve_keys(con: duckdb.DuckDBPyConnection):
+    # Traduce una sola vez las claves naturales del staging a IDs del registro;
+    # a partir de aquí los hechos solo se comparan por enteros
+    with duckdb_profile(con, "stg_winners_ids"):
+        _create_winners_ids(con)
+    with stage("match_races"):
+        _match_results_races(con)
+    with duckdb_profile(con, "stg_results_ids"):
+        _create_results_ids(con)
+
+
+def _match_results_races(con: duckdb.DuckDBPyConnection):
+    """Matches each stg_results row to a dim_race race into stg_results_races.
+
+    Unmatched rows are logged and kept in stg_results_unmatched; they get no
+    fact. write_unmatched saves them once the load is committed.
+    """
+    logger = logging.getLogger("load.load_dw")
+    results = con.execute("""
+        SELECT driver_name, year, season_round, grand_prix
+        FROM stg_results
+        WHERE year IS NOT NULL
+    """).fetchdf()
+    calendar = con.execute("SELECT race_id, year, race_number, grand_prix FROM dim_race").fetchdf()
+
+    with stage("match", rows_in=len(results)) as m:
+        matched = match_races(results, calendar)
+        counts = matched["match"].value_counts(dropna=False)
+        m.rows_out = int(matched["race_id"].notna().sum())
+        m.extra.update({str(k) if pd.notna(k) else "unmatched": int(v) for k, v in counts.items()})
+
+    unmatched = matched.loc[matched["race_id"].isna()].drop(columns=["race_id", "match"])
+    if len(unmatched):
+        logger.warning(
+            "%s results rows match no race (see %s), e.g.:\n%s",
+            len(unmatched), UNMATCHED_PATH, unmatched.head(5).to_string(index=False),
+        )
+    logger.info("Race matching: %s", ", ".join(f"{k}={v}" for k, v in m.extra.items()))
+
+    _register(con, "stg_results_races", matched.dropna(subset=["race_id"]))
+    _register(con, "stg_results_unmatched", unmatched)
+
+
+def write_unmatched(con: duckdb.DuckDBPyConnection, incremental: bool = False):
+    """Writes the results rows of this load that match no race to UNMATCHED_PATH.
+
+    Called after COMMIT, so a rolled-back load leaves the file as it was. An
+    incremental load replaces the rows of the seasons it staged and keeps the
+    rest, so the file always lists every source row missing from
+    fact_driver_race_results (dw_checks relies on it).
+    """
+    unmatched = con.execute("SELECT * FROM stg_results_unmatched").fetchdf()
+    if incremental and UNMATCHED_PATH.exists():
+        # Las temporadas fuera de esta carga conservan sus filas sin carrera
+        years = con.execute("SELECT DISTINCT year FROM stg_results WHERE year IS NOT NULL").fetchdf()["year"]
+        previous = pd.read_parquet(UNMATCHED_PATH)
+        previous = previous[~previous["year"].isin(years)]
+        unmatched = pd.concat([previous, unmatched], ignore_index=True)
+    if len(unmatched):
+        UNMATCHED_PATH.parent.mkdir(parents=True, exist_ok=True)
+        unmatched.to_parquet(UNMATCHED_PATH, index=False)
+    else:
+        UNMATCHED_PATH.unlink(missing_ok=True)
+
+
+def _create_winners_ids(con: duckdb.DuckDBPyConnection):
     con.execute("""
-        INSERT INTO fact_race_winners
+        CREATE OR REPLACE TEMP TABLE stg_winners_ids AS
         SELECT
-          row_number() OVER (ORDER BY w.year, w.date, w.circuit, w.winner_name) AS fact_id,
           r.race_id,
-          s.season_id,
           d.driver_id,
+          s.season_id,
           t.team_id,
-          CAST(w.laps AS INTEGER) AS laps,
-          w.time
+          w.laps,
+          w.time,
+          w.year, w.date, w.circuit, w.winner_name
         FROM stg_winners w
-        JOIN dim_race r
+        JOIN key_race r
           ON r.year = w.year AND r.date = w.date AND r.circuit = w.circuit
-        JOIN dim_season s
+        JOIN key_season s
           ON s.year = w.year
-        JOIN dim_driver d
+        JOIN key_driver d
           ON d.driver_name = w.winner_name
-        JOIN dim_team t
+        JOIN key_team t
           ON t.team_name = w.team
         WHERE w.year IS NOT NULL AND w.date IS NOT NULL AND w.circuit IS NOT NULL
     """)
 
-    # fact_alonso_race_results
+
+def _create_results_ids(con: duckdb.DuckDBPyConnection):
+    # La carrera de cada fila viene de stg_results_races (ver race_matching);
+    # race_number es la ronda de esa carrera en el calendario
     con.execute("""
-        INSERT INTO fact_alonso_race_results
+        CREATE OR REPLACE TEMP TABLE stg_results_ids AS
         SELECT
-          row_number() OVER (ORDER BY a.year, a.season_round) AS fact_id,
           r.race_id,
-          s.season_id,
           d.driver_id,
+          s.season_id,
           t.team_id,
-          CAST(a.season_round AS INTEGER) AS race_number,
-          CAST(a.grid_position AS INTEGER) AS grid_position,
-          CAST(a.race_position AS INTEGER) AS race_position,
-          CAST(a.did_finish AS INTEGER) AS did_finish,
-          a.event
-        FROM stg_alonso a
+          r.race_number,
+          a.season_round,
+          a.grid_position,
+          a.race_position,
+          a.did_finish,
+          a.event,
+          a.year,
+          a.driver_name
+        FROM stg_results a
+        JOIN stg_results_races m
+          ON m.driver_name = a.driver_name AND m.year = a.year AND m.season_round = a.season_round
         JOIN dim_race r
-          ON r.year = a.year AND r.race_number = a.season_round
-        JOIN dim_season s
+          ON r.race_id = m.race_id
+        JOIN key_season s
           ON s.year = a.year
-        JOIN dim_driver d
-          ON d.driver_name = 'Fernando Alonso'
-        JOIN dim_team t
+        JOIN key_driver d
+          ON d.driver_name = a.driver_name
+        JOIN key_team t
           ON t.team_name = a.team
         WHERE a.year IS NOT NULL
     """)
 
 
-def main():
-    setup_logging()
-    logger = logging.getLogger("load.load_dw")
-    logger.info("Loading Data Warehouse")
-    
-    WAREHOUSE_DIR.mkdir(parents=True, exist_ok=True)
+def _merge_facts(con: duckdb.DuckDBPyConnection):
+    # Espera stg_winners y stg_results (con season_round, el orden de la fila
+    # en la temporada del piloto) ya preparados
+    with stage("resolve_keys"):
+        _resolve_keys(con)
 
-    alonso = _read_parquet(PROCESSED_DIR / "alonso_clean.parquet")
-    winners = _read_parquet(PROCESSED_DIR / "winners_clean.parquet")
+    # fact_race_winners
+    # clave natural: (race_id, driver_id) -> una fila por ganador y carrera
+    with stage("fact_race_winners") as m:
+        updated, inserted, deleted = _merge(
+            con, "fact_race_winners", "fact_id",
+            """
+            SELECT
+              race_id,
+              driver_id,
+              season_id,
+              team_id,
+              CAST(laps AS INTEGER) AS laps,
+              time,
+              year AS o_year, date AS o_date, circuit AS o_circuit, winner_name AS o_name
+            FROM stg_winners_ids
+            """,
+            keys=["race_id", "driver_id"],
+            values=["season_id", "team_id", "laps", "time"],
+            order_by="s.o_year, s.o_date, s.o_circuit, s.o_name",
+            track="s.season_id",
+            scope="SELECT k.season_id FROM key_season k WHERE k.year IN (SELECT year FROM stg_winners)",
+        )
+        m.rows_out = updated + inserted + deleted
+
+    # fact_driver_race_results
+    # clave natural: (race_id, driver_id) -> una participación por piloto y carrera
+    with stage("fact_driver_race_results") as m:
+        updated, inserted, deleted = _merge(
+            con, "fact_driver_race_results", "fact_id",
+            """
+            SELECT
+              race_id,
+              driver_id,
+              season_id,
+              team_id,
+              CAST(race_number AS INTEGER) AS race_number,
+              CAST(grid_position AS INTEGER) AS grid_position,
+              CAST(race_position AS INTEGER) AS race_position,
+              CAST(did_finish AS INTEGER) AS did_finish,
+              event,
+              year AS o_year, season_round AS o_round, driver_name AS o_name
+            FROM stg_results_ids
+            """,
+            keys=["race_id", "driver_id"],
+            values=["season_id", "team_id", "race_number", "grid_position", "race_position", "did_finish", "event"],
+            order_by="s.o_year, s.o_round, s.o_name",
+            track="s.season_id",
+            scope="SELECT k.season_id FROM key_season k WHERE k.year IN (SELECT year FROM stg_results)",
+        )
+        m.rows_out = updated + inserted + deleted
+
+
+# DuckDB-native engine (sin pandas)
+def _sql_text(col: str) -> str:
+    # Equivalente SQL de _norm_text
+    return f"trim(replace(CAST({col} AS VARCHAR), chr(160), ' '))"
+
+
+def stage_parquet(
+    con: duckdb.DuckDBPyConnection,
+    processed_dir: Path = PROCESSED_DIR,
+    years: list[int] | None = None,
+):
+    results_scan = datasets.parquet_scan("results_clean", processed_dir)
+    winners_scan = datasets.parquet_scan("winners_clean", processed_dir)
+    # Con datasets particionados el filtro por año poda directorios
+    where = f"WHERE year IN ({', '.join(str(int(y)) for y in years)})" if years else ""
+
+    # Normalización una sola vez, directamente sobre read_parquet
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE stg_winners AS
+        SELECT
+          * REPLACE (
+            CAST(year AS BIGINT) AS year,
+            CAST(date AS DATE) AS date,
+            {_sql_text("grand_prix")} AS grand_prix,
+            {_sql_text("circuit")} AS circuit,
+            {_sql_text("continent")} AS continent,
+            {_sql_text("team")} AS team,
+            {_sql_text("winner_name")} AS winner_name
+          )
+        FROM {winners_scan}
+        {where}
+    """)
 
-    con = duckdb.connect(str(DB_PATH))
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE stg_results AS
+        SELECT
+          * REPLACE (
+            CAST(year AS BIGINT) AS year,
+            {_sql_text("driver_name")} AS driver_name,
+            {_sql_text("team")} AS team,
+            TRY_CAST(race_number AS DOUBLE) AS race_number
+          ),
+          row_number() OVER (PARTITION BY driver_name, year ORDER BY race_number NULLS LAST) AS season_round
+        FROM {results_scan}
+        {where}
+    """)
 
-    create_schema(con)
 
-    alonso_clean = load_dimensions(con, alonso, winners)
-    load_facts(con, alonso_clean, winners)
+def load_dimensions_sql(con: duckdb.DuckDBPyConnection):
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE tmp_years AS
+        SELECT year FROM stg_results WHERE year IS NOT NULL
+        UNION
+        SELECT year FROM stg_winners WHERE year IS NOT NULL
+    """)
 
-    counts = con.execute("""
-      SELECT
-        (SELECT COUNT(*) FROM dim_season) AS seasons,
-        (SELECT COUNT(*) FROM dim_race)   AS races,
-        (SELECT COUNT(*) FROM dim_driver) AS drivers,
-        (SELECT COUNT(*) FROM dim_team)   AS teams,
-        (SELECT COUNT(*) FROM fact_race_winners) AS winners_facts,
-        (SELECT COUNT(*) FROM fact_alonso_race_results) AS alonso_facts
-    """).fetchdf()
+    # 1 fila = 1 carrera real => clave única (year, date, circuit)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE tmp_races AS
+        SELECT
+          year, date, circuit, grand_prix, continent,
+          row_number() OVER (PARTITION BY year ORDER BY date, circuit) AS race_number
+        FROM (
+          SELECT year, date, circuit, grand_prix, continent
+          FROM stg_winners
+          WHERE year IS NOT NULL AND date IS NOT NULL AND circuit IS NOT NULL
+          QUALIFY row_number() OVER (PARTITION BY year, date, circuit ORDER BY grand_prix) = 1
+        )
+    """)
 
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE tmp_drivers AS
+        SELECT winner_name AS driver_name FROM stg_winners WHERE winner_name IS NOT NULL
+        UNION
+        SELECT driver_name FROM stg_results WHERE driver_name IS NOT NULL
+    """)
 
-    print("DW created at:", DB_PATH)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE tmp_teams AS
+        SELECT team AS team_name FROM stg_results WHERE team IS NOT NULL
+        UNION
+        SELECT team FROM stg_winners WHERE team IS NOT NULL
+    """)
+
+    with stage("dimensions"):
+        _merge_dimensions(con)
+
+
+def load_facts_sql(con: duckdb.DuckDBPyConnection):
+    with stage("facts"):
+        _merge_facts(con)
+
+
+def main(
+    incremental: bool = False,
+    engine: str = "pandas",
+    years: list[int] | None = None,
+    reset_keys: bool = False,
+    profile_dir: Path | None = None,
+):
+    setup_logging(profile_dir=profile_dir)
+    logger = logging.getLogger("load.load_dw")
+    logger.info(
+        "Loading Data Warehouse (%s, engine=%s)",
+        "incremental" if incremental else "full refresh",
+        engine,
+    )
+    
+    if years and not incremental:
+        # un full refresh con solo algunas temporadas borraría el resto
+        raise ValueError("--years requires --incremental")
+    if reset_keys and incremental:
+        # las dimensiones conservadas no coincidirían con un registro vacío
+        raise ValueError("--reset-keys requires a full refresh")
+
+    con = warehouse.connect()
+
+    with stage("load_dw", engine=engine, incremental=incremental) as run:
+        con.begin()
+        with stage("create_schema"):
+            create_schema(con, incremental=incremental, reset=reset_keys)
+
+        arrow = engine == "arrow"
+        if engine == "duckdb":
+            with stage("stage_parquet") as m:
+                stage_parquet(con, PROCESSED_DIR, years=years)
+                m.rows_out = con.execute(
+                    "SELECT (SELECT COUNT(*) FROM stg_winners) + (SELECT COUNT(*) FROM stg_results)"
+                ).fetchone()[0]
+            run.rows_in = m.rows_out
+            load_dimensions_sql(con)
+            load_facts_sql(con)
+        else:
+            with stage("read_dataset") as m:
+                results = datasets.read_dataset("results_clean", PROCESSED_DIR, years=years, arrow=arrow)
+                winners = datasets.read_dataset("winners_clean", PROCESSED_DIR, years=years, arrow=arrow)
+                m.rows_out = len(results) + len(winners)
+            run.rows_in = m.rows_out
+
+            results_clean = load_dimensions(con, results, winners)
+            load_facts(con, results_clean, winners)
+
+        with stage("rollups") as m:
+            refreshed = refresh_rollups(con)
+            m.extra["seasons"] = refreshed
+        logger.info("Rollups refreshed for %s seasons", refreshed)
+        con.commit()
+        write_unmatched(con, incremental=incremental)
+
+        counts = con.execute("""
+          SELECT
+            (SELECT COUNT(*) FROM dim_season) AS seasons,
+            (SELECT COUNT(*) FROM dim_race)   AS races,
+            (SELECT COUNT(*) FROM dim_driver) AS drivers,
+            (SELECT COUNT(*) FROM dim_team)   AS teams,
+            (SELECT COUNT(*) FROM fact_race_winners) AS winners_facts,
+            (SELECT COUNT(*) FROM fact_driver_race_results) AS results_facts
+        """).fetchdf()
+        run.rows_out = int(counts["winners_facts"].iloc[0] + counts["results_facts"].iloc[0])
+
+    print("DW created at:", warehouse.DB_PATH)
     print(counts.to_string(index=False))
     logger.info("DW load completed")
     con.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Load processed parquet files into the DuckDB DW.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Upsert new/changed rows keeping existing surrogate keys instead of rebuilding.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "arrow", "duckdb"],
+        default="pandas",
+        help=(
+            "pandas: stage through DataFrames. arrow: same, with pyarrow-backed columns "
+            "registered zero-copy. duckdb: stage and transform in SQL over read_parquet."
+        ),
+    )
+    parser.add_argument(
+        "--years",
+        type=int,
+        nargs="+",
+        help="Only read and upsert these seasons (requires --incremental).",
+    )
+    parser.add_argument(
+        "--reset-keys",
+        action="store_true",
+        help="Empty the surrogate-key registry first (IDs are renumbered; full refresh only).",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=Path,
+        help="Write the DuckDB profile (EXPLAIN ANALYZE, JSON) of every load statement to this directory.",
+    )
+    args = parser.parse_args()
+    main(
+        incremental=args.incremental,
+        engine=args.engine,
+        years=args.years,
+        reset_keys=args.reset_keys,
+        profile_dir=args.profile_dir,
+    )
@@ -0,0 +1,247 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Emparejamiento de las filas de resultados por piloto con las carreras del
+# calendario (dim_race) por (año, grand_prix normalizado). Los nombres de
+# ambas fuentes no coinciden ("Britain" / "Great Britain", "USA" / "United
+# States", "Bahrain" / "Sakhir"), y en una temporada puede haber varias
+# carreras con el mismo nombre, así que:
+#   1. cada (año, nombre) se resuelve una sola vez contra el índice del
+#      calendario: nombre exacto, alias y, solo si no hay ninguno, similitud
+#      de trigramas dentro de la temporada;
+#   2. las filas con un único candidato sin conflictos se asignan directamente;
+#   3. el resto de la temporada del piloto se alinea en orden (programación
+#      dinámica), así que una carrera que falta o sobra no desplaza las demás.
+
+# Grupos de nombres equivalentes (ya normalizados). Un nombre puede estar en
+# varios grupos ("europe"): no es transitivo, italy no empareja con san marino.
+ALIAS_GROUPS = [
+    ("great britain", "britain", "british", "united kingdom", "uk"),
+    ("united states", "usa", "us", "united states of america", "american", "miami", "las vegas",
+     "detroit", "dallas", "caesars palace", "indianapolis"),
+    ("turkiye", "turkey", "turkish"),
+    ("sakhir", "bahrain", "bahraini"),
+    ("mexico", "mexico city", "mexican"),
+    ("brazil", "sao paulo", "brazilian"),
+    ("san marino", "emilia romagna", "imola"),
+    ("italy", "italian", "emilia romagna", "tuscany"),
+    ("germany", "german", "europe", "european", "eifel"),
+    ("spain", "spanish", "europe", "european"),
+    ("azerbaijan", "europe", "european"),
+    ("great britain", "europe", "european", "70th anniversary"),
+    ("portugal", "portuguese", "europe", "european"),
+    ("austria", "austrian", "styria", "styrian"),
+    ("netherlands", "dutch", "holland"),
+    ("south korea", "korea", "korean"),
+    ("south africa", "south african"),
+    ("saudi arabia", "saudi arabian"),
+    ("australia", "australian"),
+    ("argentina", "argentine", "argentinian"),
+    ("belgium", "belgian"),
+    ("canada", "canadian"),
+    ("china", "chinese"),
+    ("france", "french"),
+    ("hungary", "hungarian"),
+    ("india", "indian"),
+    ("japan", "japanese", "pacific"),
+    ("malaysia", "malaysian"),
+    ("morocco", "moroccan"),
+    ("russia", "russian"),
+    ("sweden", "swedish"),
+    ("switzerland", "swiss"),
+    ("qatar", "qatari"),
+]
+
+STOP_WORDS = {"grand", "prix", "gp", "grande", "premio", "gran"}
+MIN_SIMILARITY = 0.3
+
+# Puntuación de cada forma de emparejar (la alineación maximiza la suma)
+EXACT, ALIAS = 3.0, 2.0
+
+
+def normalise_name(name) -> str:
+    """Lowercase, accent-free, punctuation-free name without "Grand Prix"/"GP"."""
+    if name is None or name is pd.NA or (isinstance(name, float) and name != name):
+        return ""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    words = re.sub(r"[^a-z0-9]+", " ", text).split()
+    return " ".join(w for w in words if w not in STOP_WORDS)
+
+
+@lru_cache(maxsize=None)
+def trigrams(name: str) -> frozenset[str]:
+    padded = f"  {name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the character trigrams of two normalised names."""
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+@dataclass
+class RaceIndex:
+    """Calendar index: per season, the rounds of every normalised race name.
+
+    `candidates(year, name)` resolves a results name once and caches it, so
+    the cost depends on the distinct (season, name) pairs, not on the number
+    of drivers.
+    """
+
+    races: dict[int, dict[int, int]]                     # year -> round -> race_id
+    names: dict[int, dict[str, list[int]]]               # year -> key -> rounds
+    groups: dict[str, set[int]] = field(default_factory=dict)  # name -> ALIAS_GROUPS indices
+    _cache: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_calendar(cls, calendar: pd.DataFrame) -> "RaceIndex":
+        # calendar: race_id, year, race_number (ronda), grand_prix
+        races, names = {}, {}
+        for race_id, year, rnd, gp in calendar[["race_id", "year", "race_number", "grand_prix"]].itertuples(index=False):
+            if pd.isna(year) or pd.isna(rnd):
+                continue
+            year, rnd = int(year), int(rnd)
+            races.setdefault(year, {})[rnd] = int(race_id)
+            names.setdefault(year, {}).setdefault(normalise_name(gp), []).append(rnd)
+
+        groups: dict[str, set[int]] = {}
+        for i, group in enumerate(ALIAS_GROUPS):
+            for name in group:
+                groups.setdefault(name, set()).add(i)
+        return cls(races, names, groups)
+
+    def candidates(self, year: int, name: str) -> dict[int, tuple[float, str]]:
+        """Rounds of `year` that `name` (normalised) may refer to: round -> (score, method)."""
+        key = (year, name)
+        if key not in self._cache:
+            self._cache[key] = self._resolve(year, name)
+        return self._cache[key]
+
+    def _resolve(self, year: int, name: str) -> dict[int, tuple[float, str]]:
+        season = self.names.get(year, {})
+        found = {}
+        if name in season:
+            found.update((rnd, (EXACT, "exact")) for rnd in season[name])
+        name_groups = self.groups.get(name, set())
+        if name_groups:
+            for key, rounds in season.items():
+                if key != name and name_groups & self.groups.get(key, set()):
+                    found.update((rnd, (ALIAS, "alias")) for rnd in rounds if rnd not in found)
+        if found or not name:
+            return found
+
+        # Último recurso: nombres de la misma temporada (o sus alias) parecidos por trigramas
+        scored = [(max(similarity(name, alias) for alias in self._aliases(key)), key) for key in season]
+        best = max((s for s, _ in scored), default=0.0)
+        if best < MIN_SIMILARITY:
+            return {}
+        return {rnd: (best, "ngram") for s, key in scored if s == best for rnd in season[key]}
+
+
+    def _aliases(self, key: str) -> set[str]:
+        return {key}.union(*(ALIAS_GROUPS[i] for i in self.groups.get(key, ())))
+
+
+def align(options: list[dict[int, tuple[float, str]]]) -> list[int | None]:
+    """Assigns rounds to a driver's season in order (rows sorted by their round).
+
+    Monotone alignment maximising the total score: each round is used at most
+    once and the assigned rounds increase with the row order, so a missing or
+    extra race only leaves that row unmatched.
+    """
+    rounds = sorted({rnd for opts in options for rnd in opts})
+    n, m = len(options), len(rounds)
+    # best[i][j]: mejor puntuación con las primeras i filas y las primeras j rondas
+    best = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        opts = options[i - 1]
+        row, prev = best[i], best[i - 1]
+        for j in range(1, m + 1):
+            score = max(prev[j], row[j - 1])
+            hit = opts.get(rounds[j - 1])
+            if hit is not None:
+                score = max(score, prev[j - 1] + hit[0])
+            row[j] = score
+
+    assigned: list[int | None] = [None] * n
+    i, j = n, m
+    while i > 0 and j > 0:
+        hit = options[i - 1].get(rounds[j - 1])
+        if hit is not None and best[i][j] == best[i - 1][j - 1] + hit[0]:
+            assigned[i - 1] = rounds[j - 1]
+            i, j = i - 1, j - 1
+        elif best[i][j] == best[i - 1][j]:
+            i -= 1
+        else:
+            j -= 1
+    return assigned
+
+
+def match_races(results: pd.DataFrame, calendar: pd.DataFrame) -> pd.DataFrame:
+    """Matches every results row to a calendar race.
+
+    results: driver_name, year, season_round (row order within the driver's
+    season), grand_prix. calendar: race_id, year, race_number, grand_prix.
+    Returns driver_name, year, season_round, grand_prix, race_id and `match`
+    (exact / alias / ngram); race_id and match are null for unmatched rows.
+    """
+    index = RaceIndex.from_calendar(calendar)
+    out = results[["driver_name", "year", "season_round", "grand_prix"]].copy()
+    out["year"] = out["year"].astype("int64")
+    out["grand_prix"] = out["grand_prix"].astype("string").fillna("")
+    out = out.sort_values(["driver_name", "year", "season_round"]).reset_index(drop=True)
+
+    # Candidatos por (año, grand_prix) distinto: el coste no depende del número de pilotos
+    pairs = out[["year", "grand_prix"]].drop_duplicates().reset_index(drop=True)
+    pairs["name"] = [normalise_name(gp) for gp in pairs["grand_prix"]]
+    options = [index.candidates(year, name) for year, name in zip(pairs["year"], pairs["name"])]
+    pairs["n"] = [len(o) for o in options]
+    pairs["rnd"] = pd.array([next(iter(o)) if len(o) == 1 else None for o in options], dtype="Int64")
+    cand = pd.DataFrame(
+        [
+            (year, gp, rnd, method)
+            for (year, gp), opts in zip(zip(pairs["year"], pairs["grand_prix"]), options)
+            for rnd, (_, method) in opts.items()
+        ],
+        columns=["year", "grand_prix", "rnd", "match"],
+    ).astype({"year": "int64", "grand_prix": "string", "rnd": "Int64"})
+    out = out.merge(pairs, on=["year", "grand_prix"], how="left")
+
+    # Camino rápido: un único candidato que nadie más de la temporada del piloto reclama
+    conflict = out["rnd"].notna() & out.duplicated(["driver_name", "year", "rnd"], keep=False)
+    needs_align = ((out["n"] > 1) | conflict).to_numpy()
+
+    # Las filas están ordenadas por piloto y año: cada temporada es un tramo contiguo
+    season = ["driver_name", "year"]
+    starts = np.flatnonzero(out[season].ne(out[season].shift()).any(axis=1).to_numpy())
+    ends = np.append(starts[1:], len(out))
+    slow = np.logical_or.reduceat(needs_align, starts) if len(out) else np.zeros(0, dtype=bool)
+
+    # El resto se alinea por temporada entera; las que comparten secuencia de nombres se reutilizan
+    rnd = out["rnd"].to_numpy(dtype=object, na_value=None, copy=True)
+    names, years = out["name"].to_numpy(), out["year"].to_numpy()
+    aligned: dict = {}
+    for start, end in zip(starts[slow], ends[slow]):
+        key = (years[start], tuple(names[start:end]))
+        if key not in aligned:
+            aligned[key] = align([index.candidates(key[0], name) for name in key[1]])
+        rnd[start:end] = aligned[key]
+    out["rnd"] = pd.array(rnd, dtype="Int64")
+
+    races = pd.DataFrame(
+        [(year, rnd, race_id) for year, rounds in index.races.items() for rnd, race_id in rounds.items()],
+        columns=["year", "rnd", "race_id"],
+    ).astype({"year": "int64", "rnd": "Int64", "race_id": "Int64"})
+    out = out.merge(races, on=["year", "rnd"], how="left")
+    out = out.merge(
+        cand,
+        on=["year", "grand_prix", "rnd"], how="left",
+    )
+    return out[["driver_name", "year", "season_round", "grand_prix", "race_id", "match"]]
@@ -0,0 +1,65 @@
+import duckdb
+
+from src.logging_setup import duckdb_profile
+
+# Rollups por temporada. Cada SELECT se limita a las temporadas de
+# touched_seasons, así que un refresco solo recalcula lo que ha cambiado.
+TOUCHED = "(SELECT season_id FROM touched_seasons)"
+
+ROLLUPS = {
+    "agg_driver_wins": f"""
+        SELECT season_id, driver_id, COUNT(*) AS wins
+        FROM fact_race_winners
+        WHERE season_id IN {TOUCHED}
+        GROUP BY season_id, driver_id
+    """,
+    "agg_team_wins": f"""
+        SELECT season_id, team_id, COUNT(*) AS wins
+        FROM fact_race_winners
+        WHERE season_id IN {TOUCHED}
+        GROUP BY season_id, team_id
+    """,
+    "agg_driver_season_stats": f"""
+        SELECT
+          season_id,
+          driver_id,
+          COUNT(*) AS races,
+          COUNT(*) FILTER (WHERE did_finish = 0) AS dnfs,
+          COUNT(*) FILTER (WHERE did_finish = 1) AS finishes,
+          SUM(race_position) FILTER (WHERE did_finish = 1) AS finish_position_sum,
+          COUNT(race_position) FILTER (WHERE did_finish = 1) AS finish_position_n,
+          COUNT(*) FILTER (WHERE did_finish = 1 AND race_position = 1) AS p1,
+          COUNT(*) FILTER (WHERE did_finish = 1 AND race_position = 2) AS p2,
+          COUNT(*) FILTER (WHERE did_finish = 1 AND race_position = 3) AS p3,
+          SUM(race_position - grid_position) FILTER (WHERE did_finish = 1) AS position_change_sum,
+          COUNT(race_position - grid_position) FILTER (WHERE did_finish = 1) AS position_change_n
+        FROM fact_driver_race_results
+        WHERE season_id IN {TOUCHED}
+        GROUP BY season_id, driver_id
+    """,
+    "agg_races_by_continent": f"""
+        SELECT s.season_id, r.continent, COUNT(*) AS races
+        FROM dim_race r
+        JOIN dim_season s ON s.year = r.year
+        WHERE s.season_id IN {TOUCHED}
+        GROUP BY s.season_id, r.continent
+    """,
+}
+
+
+def refresh_rollups(con: duckdb.DuckDBPyConnection) -> int:
+    """Recomputes every rollup for the seasons in `touched_seasons`.
+
+    Returns the number of refreshed seasons and empties `touched_seasons`.
+    """
+    seasons = con.execute("SELECT COUNT(DISTINCT season_id) FROM touched_seasons").fetchone()[0]
+    if not seasons:
+        return 0
+
+    for table, select in ROLLUPS.items():
+        con.execute(f"DELETE FROM {table} WHERE season_id IN {TOUCHED}")
+        with duckdb_profile(con, table):
+            con.execute(f"INSERT INTO {table} {select}")
+
+    con.execute("DELETE FROM touched_seasons")
+    return seasons
@@ -1,10 +1,170 @@
+import atexit
+import contextvars
+import copy
+import datetime
+import functools
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
-def setup_logging(log_dir: Path = Path("logs"), level=logging.INFO) -> None:
-    log_dir.mkdir(parents=True, exist_ok=True)
+METRICS_LOGGER = "metrics"
+RUN_ID = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+# Directorio para perfiles de DuckDB (None = desactivado), ver setup_logging
+_profile_dir: Path | None = None
+# Etapas abiertas en el contexto actual, para anidar sub-pasos (load_dw.facts...)
+_stage_stack: contextvars.ContextVar[tuple[str, ...]] = contextvars.ContextVar("stage_stack", default=())
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    # "load.load_dw=DEBUG,metrics=WARNING"
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, lvl = item.split("=", 1)
+            levels[name.strip()] = lvl.strip().upper()
+    return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, process, thread (+ exc)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # ya formateada por _QueueHandler
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _LoggerFilter(logging.Filter):
+    # Separa las métricas del log normal cuando comparten cola
+    def __init__(self, name: str, include: bool):
+        super().__init__()
+        self.logger_name = name
+        self.include = include
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return (record.name == self.logger_name) == self.include
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # El QueueHandler estándar formatea el mensaje con su propio formatter y
+    # descarta exc_info; aquí solo se resuelven los args (y la traza a texto)
+    # para que JsonFormatter/Formatter del listener vean el registro original
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Estado del modo en cola: handlers reales, listeners y la cola para procesos hijos
+_handlers: list[logging.Handler] = []
+_listeners: list[logging.handlers.QueueListener] = []
+_worker_queue = None
+
+
+def _build_handlers(log_dir: Path, level, json_lines: bool, max_bytes: int, when: str | None, backup_count: int):
     log_file = log_dir / "pipeline.log"
 
+    if json_lines:
+        fmt = JsonFormatter()
+    else:
+        fmt = logging.Formatter(
+            "%(asctime)s | %(levelname)-7s | %(name)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+
+    if when:
+        fh = logging.handlers.TimedRotatingFileHandler(log_file, when=when, backupCount=backup_count, encoding="utf-8")
+    elif max_bytes:
+        fh = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    else:
+        fh = logging.FileHandler(log_file, encoding="utf-8")
+    fh.setFormatter(fmt)
+    fh.setLevel(level)
+
+    sh = logging.StreamHandler()
+    sh.setFormatter(fmt)
+    sh.setLevel(level)
+
+    # Métricas por etapa: una línea JSON por registro, fuera del log normal
+    mh = logging.FileHandler(log_dir / "metrics.jsonl", encoding="utf-8")
+    mh.setFormatter(logging.Formatter("%(message)s"))
+    mh.addFilter(_LoggerFilter(METRICS_LOGGER, include=True))
+
+    for h in (fh, sh):
+        h.addFilter(_LoggerFilter(METRICS_LOGGER, include=False))
+    return [fh, sh], mh
+
+
+def _start_listener(q) -> logging.handlers.QueueListener:
+    listener = logging.handlers.QueueListener(q, *_handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return listener
+
+
+def stop_logging():
+    """Flushes and stops the queue listeners (registered with atexit in queued mode)."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def setup_logging(
+    log_dir: Path = Path("logs"),
+    level=logging.INFO,
+    profile_dir: Path | None = None,
+    queued: bool | None = None,
+    json_lines: bool | None = None,
+    max_bytes: int | None = None,
+    when: str | None = None,
+    backup_count: int = 5,
+    levels: dict[str, str | int] | None = None,
+) -> None:
+    """Configures the root logger once per process (later calls only update profile_dir).
+
+    queued: handlers run on a QueueListener thread; log calls only enqueue the record.
+    json_lines: pipeline.log and the console get one JSON object per line.
+    max_bytes / when: rotate pipeline.log by size or time (TimedRotatingFileHandler `when`).
+    levels: per-logger levels, e.g. {"load.load_dw": "DEBUG"}.
+
+    Unset options fall back to PIPELINE_LOG_QUEUE, PIPELINE_LOG_JSON,
+    PIPELINE_LOG_MAX_BYTES, PIPELINE_LOG_ROTATE_WHEN and PIPELINE_LOG_LEVELS,
+    so every entry point can be switched without code changes.
+    """
+    global _profile_dir
+    if profile_dir is not None:
+        _profile_dir = profile_dir
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+
     root = logging.getLogger()
     root.setLevel(level)
 
@@ -12,18 +172,157 @@ def setup_logging(log_dir: Path = Path("logs"), level=logging.INFO) -> None:
     if root.handlers:
         return
 
-    fmt = logging.Formatter(
-        "%(asctime)s | %(levelname)-7s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    queued = _env_flag("PIPELINE_LOG_QUEUE") if queued is None else queued
+    json_lines = _env_flag("PIPELINE_LOG_JSON") if json_lines is None else json_lines
+    max_bytes = int(os.environ.get("PIPELINE_LOG_MAX_BYTES", 0)) if max_bytes is None else max_bytes
+    when = os.environ.get("PIPELINE_LOG_ROTATE_WHEN") or None if when is None else when
+    levels = _parse_levels(os.environ.get("PIPELINE_LOG_LEVELS", "")) if levels is None else levels
 
-    fh = logging.FileHandler(log_file, encoding="utf-8")
-    fh.setFormatter(fmt)
-    fh.setLevel(level)
+    handlers, metrics_handler = _build_handlers(log_dir, level, json_lines, max_bytes, when, backup_count)
+    metrics = logging.getLogger(METRICS_LOGGER)
+    metrics.setLevel(logging.INFO)
+    metrics.propagate = False
 
-    sh = logging.StreamHandler()
-    sh.setFormatter(fmt)
-    sh.setLevel(level)
+    for name, lvl in levels.items():
+        logging.getLogger(name).setLevel(lvl)
+
+    if not queued:
+        for h in handlers:
+            root.addHandler(h)
+        metrics.addHandler(metrics_handler)
+        return
+
+    # Modo en cola: los loggers solo encolan; un hilo escribe en fichero/consola
+    _handlers[:] = handlers + [metrics_handler]
+    q = queue.SimpleQueue()
+    _start_listener(q)
+    root.addHandler(_QueueHandler(q))
+    metrics.addHandler(_QueueHandler(q))
+    atexit.register(stop_logging)
+
+
+def worker_log_args() -> tuple:
+    """initargs for ProcessPoolExecutor(initializer=init_worker_logging, ...).
+
+    In queued mode worker records travel back through a multiprocessing queue
+    to the parent's listener, so every process writes through the same handlers.
+    """
+    global _worker_queue
+    level = logging.getLogger().level
+    if not _handlers:
+        return None, level
+    if _worker_queue is None:
+        _worker_queue = multiprocessing.Queue()
+        _start_listener(_worker_queue)
+    return _worker_queue, level
+
+
+def init_worker_logging(log_queue, level):
+    root = logging.getLogger()
+    # Con fork se heredan los handlers del padre (y una cola sin listener)
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    metrics = logging.getLogger(METRICS_LOGGER)
+    for h in list(metrics.handlers):
+        metrics.removeHandler(h)
+
+    if log_queue is None:
+        setup_logging(level=level, queued=False)
+        return
+    root.setLevel(level)
+    root.addHandler(_QueueHandler(log_queue))
+    metrics.setLevel(logging.INFO)
+    metrics.propagate = False
+    metrics.addHandler(_QueueHandler(log_queue))
+
+
+def peak_rss_mb() -> float | None:
+    # High-water mark del proceso (no existe `resource` en Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageMetrics:
+    """Mutable record of a running stage; set `rows_in`/`rows_out` or add fields in `extra`."""
+
+    def __init__(self, name: str, parent: str | None, rows_in=None, **extra):
+        self.name = name
+        self.parent = parent
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.extra = extra
+
+
+@contextmanager
+def stage(name: str, rows_in: int | None = None, **extra):
+    """Records wall time, CPU time, peak RSS and row counts of a block as a JSON-lines metric.
+
+    Nested stages are named after their parents ("load_dw.facts"). cpu_s is
+    process CPU time, so it includes other threads running at the same time.
+    peak_rss_mb is the process high-water mark when the stage ends.
+    """
+    stack = _stage_stack.get() + (name,)
+    token = _stage_stack.set(stack)
+    metrics = StageMetrics(".".join(stack), ".".join(stack[:-1]) or None, rows_in, **extra)
+    status = "ok"
+    start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield metrics
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _stage_stack.reset(token)
+        record = {
+            "ts": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "run_id": RUN_ID,
+            "stage": metrics.name,
+            "parent": metrics.parent,
+            "status": status,
+            "wall_s": round(time.perf_counter() - start, 6),
+            "cpu_s": round(time.process_time() - cpu_start, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "rows_in": metrics.rows_in,
+            "rows_out": metrics.rows_out,
+            **metrics.extra,
+        }
+        logging.getLogger(METRICS_LOGGER).info(json.dumps(record, default=str))
+
+
+def with_stage_context(fn):
+    """Wraps `fn` to run under the caller's open stages (e.g. inside a thread pool,
+    which does not inherit context variables)."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def duckdb_profile(con, name: str):
+    """Writes the DuckDB profile (EXPLAIN ANALYZE tree with timings, as JSON) of the
+    statements run inside the block to <profile_dir>/<stage>.<name>.json.
+
+    Does nothing unless setup_logging got a `profile_dir`. DuckDB overwrites
+    the file on every statement, so wrap one statement per block.
+    """
+    if _profile_dir is None:
+        yield
+        return
 
-    root.addHandler(fh)
-    root.addHandler(sh)
+    prefix = ".".join(_stage_stack.get())
+    filename = re.sub(r"[^\w.-]+", "_", f"{prefix}.{name}" if prefix else name)
+    path = (_profile_dir / f"{filename}.json").as_posix().replace("'", "''")
+    con.execute("SET enable_profiling = 'json'")
+    con.execute(f"SET profiling_output = '{path}'")
+    try:
+        yield
+    finally:
+        con.execute("PRAGMA disable_profiling")
@@ -0,0 +1,365 @@
+import argparse
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from src import warehouse
+from src.logging_setup import setup_logging
+
+# Los módulos de las etapas (pandas, pyarrow, duckdb) se importan dentro de
+# cada etapa: una ejecución sin cambios solo hashea ficheros
+
+RAW_DIR = Path("data/raw")
+OUT_DIR = Path("data/processed")
+INSIGHTS_DIR = Path("data/insights")  # = run_insights.OUTPUT_DIR
+STATE_PATH = Path("data/.dag_state.json")
+
+
+@dataclass
+class Stage:
+    """A pipeline step in the DAG.
+
+    `inputs` (files or directories, including the stage's own code and SQL)
+    and `params` feed the stage's content hash together with the hashes of
+    its `deps` as of their last successful run (or the run about to happen).
+    A stage is skipped when its hash matches its last successful run and its
+    `outputs` exist. `memory` stages hand their result to dependents in
+    memory, so they run again whenever a dependent runs.
+    """
+
+    name: str
+    fn: Callable[[dict[str, Any]], Any]
+    deps: list[str] = field(default_factory=list)
+    inputs: list[Path] = field(default_factory=list)
+    outputs: list[Path] = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    memory: bool = False
+
+
+def build_stages(
+    engine: str = "pandas",
+    incremental: bool = False,
+    arrow: bool = False,
+    partitioned: bool = False,
+    parallel_insights: bool = False,
+    snapshot_keep: int | None = None,
+) -> list[Stage]:
+    """Stages in topological order."""
+
+    def extract(r):
+        from src.extract.extract_raw import extract_raw
+        return extract_raw(RAW_DIR, arrow=arrow)
+
+    def clean_results(r):
+        from src.transform.clean_results import clean_results
+        return clean_results(r["extract"][0])
+
+    def clean_winners(r):
+        from src.transform.clean_winners import clean_winners
+        return clean_winners(r["extract"][1])
+
+    def quality_checks(r):
+        from src.transform.quality_checks import run_all_checks
+        return run_all_checks(r["clean_results"], r["clean_winners"])
+
+    def write_staging(r):
+        from src import datasets
+        results, winners = r["quality_checks"]
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        datasets.write_dataset(results, "results_clean", OUT_DIR, partitioned=partitioned)
+        datasets.write_dataset(winners, "winners_clean", OUT_DIR, partitioned=partitioned)
+
+    def load(r):
+        from src.load import load_dw
+        load_dw.main(incremental=incremental, engine=engine)
+
+    def check(r):
+        from src.load import dw_checks
+        dw_checks.main()
+
+    def snapshot(r):
+        from src.load import export_snapshot
+        export_snapshot.main(keep=snapshot_keep)
+
+    def insights(r):
+        from src.analysis import run_insights
+        run_insights.main(parallel=parallel_insights)
+
+    return [
+        Stage(
+            "extract",
+            extract,
+            inputs=[RAW_DIR, Path("src/extract/extract_raw.py"), Path("src/schemas.py")],
+            params={"arrow": arrow},
+            memory=True,
+        ),
+        Stage(
+            "clean_results",
+            clean_results,
+            deps=["extract"],
+            inputs=[Path("src/transform/clean_results.py"), Path("src/dtypes.py"), Path("src/schemas.py")],
+            memory=True,
+        ),
+        Stage(
+            "clean_winners",
+            clean_winners,
+            deps=["extract"],
+            inputs=[Path("src/transform/clean_winners.py"), Path("src/dtypes.py"), Path("src/schemas.py")],
+            memory=True,
+        ),
+        Stage(
+            "quality_checks",
+            quality_checks,
+            deps=["clean_results", "clean_winners"],
+            inputs=[Path("src/transform/quality_checks.py")],
+            memory=True,
+        ),
+        Stage(
+            "write_staging",
+            write_staging,
+            deps=["quality_checks"],
+            inputs=[Path("src/datasets.py")],
+            outputs=[OUT_DIR],
+            params={"partitioned": partitioned},
+        ),
+        Stage(
+            "load_dw",
+            load,
+            deps=["write_staging"],
+            inputs=[
+                Path("src/load/load_dw.py"),
+                Path("src/load/keys.py"),
+                Path("src/load/race_matching.py"),
+                Path("src/load/rollups.py"),
+                Path("src/datasets.py"),
+                Path("src/dtypes.py"),
+                Path("src/warehouse.py"),
+                Path("sql/create_tables.sql"),
+                Path("sql/drop_tables.sql"),
+            ],
+            outputs=[warehouse.DB_PATH],
+            params={"engine": engine, "incremental": incremental},
+        ),
+        Stage(
+            "dw_checks",
+            check,
+            deps=["load_dw"],
+            inputs=[Path("src/load/dw_checks.py")],
+        ),
+        Stage(
+            "export_snapshot",
+            snapshot,
+            deps=["dw_checks"],
+            inputs=[Path("src/load/export_snapshot.py")],
+            outputs=[warehouse.SNAPSHOT_DIR / warehouse.LATEST],
+            params={"keep": snapshot_keep},
+        ),
+        Stage(
+            "run_insights",
+            insights,
+            deps=["dw_checks"],
+            inputs=[Path("src/analysis/run_insights.py"), Path("sql/insights.sql")],
+            outputs=[INSIGHTS_DIR],
+            params={"parallel": parallel_insights},
+        ),
+    ]
+
+
+# Content hashing
+def _files(path: Path) -> list[Path]:
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.is_file())
+    return [path] if path.exists() else []
+
+
+def _file_hash(path: Path, cache: dict) -> str:
+    # Caché por (tamaño, mtime): un fichero sin tocar no se vuelve a leer
+    stat = path.stat()
+    key = str(path)
+    cached = cache.get(key)
+    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+        return cached["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    cache[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    return digest
+
+
+def stage_hash(stage: Stage, dep_hashes: list[str], file_cache: dict) -> str:
+    h = hashlib.sha256()
+    h.update(stage.name.encode())
+    h.update(json.dumps(stage.params, sort_keys=True).encode())
+    for dep in dep_hashes:
+        h.update(dep.encode())
+    for path in stage.inputs:
+        for f in _files(path):
+            h.update(f.as_posix().encode())
+            h.update(_file_hash(f, file_cache).encode())
+    return h.hexdigest()
+
+
+def _load_state() -> dict:
+    if STATE_PATH.exists():
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    return {"stages": {}, "files": {}}
+
+
+def _save_state(state: dict):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+def _plan(
+    stages: list[Stage],
+    selected: list[str],
+    state: dict,
+    force: bool,
+) -> tuple[set[str], dict[str, str]]:
+    """Returns the stages to run and the hash every stage will have.
+
+    A dependency contributes the hash of its last successful run, or its new
+    hash if it runs now: a stage is only considered up to date with respect
+    to what its dependencies actually produced. Running a stage can make its
+    dependents' hashes change, so the plan is repeated until it is stable.
+    """
+    by_name = {s.name: s for s in stages}
+    to_run: set[str] = set()
+    while True:
+        hashes = {}
+        for s in stages:
+            deps = [hashes[d] if d in to_run else state["stages"].get(d, "") for d in s.deps]
+            hashes[s.name] = stage_hash(s, deps, state["files"])
+
+        planned = to_run | {
+            name for name in selected
+            if force
+            or state["stages"].get(name) != hashes[name]
+            or any(not p.exists() for p in by_name[name].outputs)
+        }
+        # Las etapas en memoria no dejan nada en disco: si una etapa que se
+        # ejecuta depende de ellas, hay que volver a ejecutarlas
+        pending_deps = [d for n in planned for d in by_name[n].deps]
+        while pending_deps:
+            dep = pending_deps.pop()
+            if by_name[dep].memory and dep not in planned:
+                planned.add(dep)
+                pending_deps.extend(by_name[dep].deps)
+
+        if planned == to_run:
+            return to_run, hashes
+        to_run = planned
+
+
+def _select(stages: list[Stage], start: str | None, end: str | None) -> list[str]:
+    names = [s.name for s in stages]
+    for name in (start, end):
+        if name and name not in names:
+            raise ValueError(f"Unknown stage: {name}. Stages: {names}")
+    lo = names.index(start) if start else 0
+    hi = names.index(end) if end else len(names) - 1
+    return names[lo:hi + 1]
+
+
+def run(
+    stages: list[Stage],
+    start: str | None = None,
+    end: str | None = None,
+    force: bool = False,
+    max_workers: int = 4,
+) -> dict[str, str]:
+    """Runs the selected stages whose hash changed, independent ones in parallel.
+
+    Returns the status ("ran" / "skipped" / "needed") of every executed or skipped stage.
+    """
+    logger = logging.getLogger("orchestration.run_dag")
+    by_name = {s.name: s for s in stages}
+    state = _load_state()
+
+    selected = _select(stages, start, end)
+    to_run, hashes = _plan(stages, selected, state, force)
+
+    status = {name: "skipped" for name in selected if name not in to_run}
+    for name in sorted(status):
+        logger.info("Skipping %s (unchanged)", name)
+
+    results: dict[str, Any] = {}
+    done = {name for name in by_name if name not in to_run}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(done) < len(by_name):
+            for name in [s.name for s in stages]:
+                if name in done or name in running:
+                    continue
+                if all(d in done for d in by_name[name].deps):
+                    logger.info("Running %s", name)
+                    running[name] = (pool.submit(by_name[name].fn, results), time.perf_counter())
+
+            finished, _ = wait([f for f, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name, (future, started) in list(running.items()):
+                if future not in finished:
+                    continue
+                del running[name]
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    logger.exception("Stage %s failed", name)
+                    for f, _ in running.values():
+                        f.cancel()
+                    raise
+
+                done.add(name)
+                status[name] = "ran" if name in selected else "needed"
+                logger.info("Finished %s in %.3f s", name, time.perf_counter() - started)
+
+                state["stages"][name] = hashes[name]
+                _save_state(state)
+
+    # Persistimos también la caché de hashes de fichero
+    _save_state(state)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the whole pipeline as a DAG, skipping unchanged stages.")
+    parser.add_argument("--from", dest="start", help="First stage to consider.")
+    parser.add_argument("--to", dest="end", help="Last stage to consider.")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if unchanged.")
+    parser.add_argument("--engine", choices=["pandas", "arrow", "duckdb"], default="pandas")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--arrow", action="store_true")
+    parser.add_argument("--partitioned", action="store_true")
+    parser.add_argument("--parallel-insights", action="store_true")
+    parser.add_argument("--snapshot-keep", type=int, help="Keep only this many newest DW snapshots.")
+    parser.add_argument("--profile-dir", type=Path, help="Write DuckDB query profiles of load_dw and run_insights here.")
+    args = parser.parse_args()
+
+    setup_logging(profile_dir=args.profile_dir)
+    logger = logging.getLogger("orchestration.run_dag")
+
+    stages = build_stages(
+        engine=args.engine,
+        incremental=args.incremental,
+        arrow=args.arrow,
+        partitioned=args.partitioned,
+        parallel_insights=args.parallel_insights,
+        snapshot_keep=args.snapshot_keep,
+    )
+    start = time.perf_counter()
+    # load_dw, dw_checks y run_insights comparten una conexión en lugar de reabrir el fichero
+    with warehouse.session():
+        status = run(stages, start=args.start, end=args.end, force=args.force)
+    logger.info("DAG finished in %.3f s: %s", time.perf_counter() - start, status)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,158 @@
+import argparse
 from pathlib import Path
 import logging
 
-from src.logging_setup import setup_logging
-from src.extract.extract_raw import extract_raw
-from src.transform.clean_alonso import clean_alonso
-from src.transform.clean_winners import clean_winners
-from src.transform.quality_checks import run_all_checks
+import pandas as pd
+
+from src.datasets import SCHEMAS, write_dataset, write_dataset_batches
+from src.logging_setup import setup_logging, stage
+from src.schemas import memory_report
+from src.extract.extract_raw import DEFAULT_BATCH_SIZE, discover_driver_files, extract_raw, extract_raw_batches, extract_winners
+from src.transform.clean_results import clean_driver_files, clean_results, clean_results_batches
+from src.transform.clean_winners import clean_winners, clean_winners_batches
+from src.transform.quality_checks import RESULTS_REQUIRED, WINNERS_REQUIRED, check_batches, run_all_checks
 
 RAW_DIR = Path("data/raw")
 OUT_DIR = Path("data/processed")
 
-def main():
+def run_streaming(arrow: bool = False, partitioned: bool = False, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Extract -> clean -> checks -> parquet one batch at a time.
+
+    Peak memory depends on `batch_size`, not on the size of the raw files.
+    """
+    logger = logging.getLogger("orchestration.run_pipeline")
+    results_raw, winners_raw = extract_raw_batches(RAW_DIR, batch_size=batch_size, arrow=arrow)
+
+    streams = [
+        ("results_clean", check_batches(
+            clean_results_batches(results_raw), "results", RESULTS_REQUIRED, schema=SCHEMAS["results_clean"]
+        )),
+        ("winners_clean", check_batches(
+            clean_winners_batches(winners_raw), "winners", WINNERS_REQUIRED, schema=SCHEMAS["winners_clean"]
+        )),
+    ]
+    for name, batches in streams:
+        with stage(name, batch_size=batch_size) as m:
+            rows = write_dataset_batches(batches, name, OUT_DIR, partitioned=partitioned)
+            m.rows_out = rows
+        logger.info("%s: %s rows streamed in batches of %s", name, rows, batch_size)
+
+
+def log_memory_report(results: pd.DataFrame, winners: pd.DataFrame):
+    # Compara una lectura sin tipos (inferencia de read_csv) con los datos ya tipados
+    logger = logging.getLogger("orchestration.run_pipeline")
+    untyped = extract_raw(RAW_DIR, typed=False)
+    for name, before, after in zip(("results", "winners"), untyped, (results, winners)):
+        logger.info("Memory footprint %s (untyped read -> typed clean):\n%s", name, memory_report(name, before, after).to_string())
+
+
+def extract_clean_parallel(arrow: bool = False, workers: int = 2) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Extract + clean with one worker process per driver file (up to `workers`)."""
+    logger = logging.getLogger("orchestration.run_pipeline")
+    drivers = discover_driver_files(RAW_DIR)
+    logger.info("Extracting and cleaning %s driver files with %s workers...", len(drivers), workers)
+    with stage("extract_clean_results", files=len(drivers), workers=workers) as m:
+        results = clean_driver_files(drivers, arrow=arrow, workers=workers)
+        m.rows_out = len(results)
+
+    with stage("extract_clean_winners") as m:
+        winners = clean_winners(extract_winners(RAW_DIR, arrow=arrow))
+        m.rows_out = len(winners)
+    return results, winners
+
+
+def main(
+    arrow: bool = False,
+    partitioned: bool = False,
+    stream: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    report_memory: bool = False,
+    workers: int = 1,
+):
     setup_logging()
     logger = logging.getLogger("orchestration.run_pipeline")
 
     logger.info("Starting pipeline: extract -> transform -> quality checks -> parquet")
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    logger.info("Extracting raw data...")
-    alonso_raw, winners_raw = extract_raw(RAW_DIR)
+    if stream:
+        logger.info("Streaming raw data in batches of %s rows...", batch_size)
+        with stage("run_pipeline", mode="stream"):
+            run_streaming(arrow=arrow, partitioned=partitioned, batch_size=batch_size)
+        logger.info("DONE: staging parquet files created in data/processed/")
+        return
+
+    with stage("run_pipeline", mode="batch"):
+        if workers > 1:
+            results, winners = extract_clean_parallel(arrow=arrow, workers=workers)
+        else:
+            logger.info("Extracting raw data...")
+            with stage("extract") as m:
+                results_raw, winners_raw = extract_raw(RAW_DIR, arrow=arrow)
+                m.rows_out = len(results_raw) + len(winners_raw)
 
-    logger.info("Cleaning datasets...")
-    alonso = clean_alonso(alonso_raw)
-    winners = clean_winners(winners_raw)
+            logger.info("Cleaning datasets...")
+            with stage("clean_results", rows_in=len(results_raw)) as m:
+                results = clean_results(results_raw)
+                m.rows_out = len(results)
+            with stage("clean_winners", rows_in=len(winners_raw)) as m:
+                winners = clean_winners(winners_raw)
+                m.rows_out = len(winners)
+        if report_memory:
+            log_memory_report(results, winners)
 
-    logger.info("Running data quality checks...")
-    run_all_checks(alonso, winners)
+        logger.info("Running data quality checks...")
+        with stage("quality_checks", rows_in=len(results) + len(winners)) as m:
+            results, winners = run_all_checks(results, winners)
+            m.rows_out = len(results) + len(winners)
 
-    logger.info("Writing staging parquet files...")
-    alonso.to_parquet(OUT_DIR / "alonso_clean.parquet", index=False)
-    winners.to_parquet(OUT_DIR / "winners_clean.parquet", index=False)
+        logger.info("Writing staging parquet files...")
+        with stage("write_staging", rows_in=len(results) + len(winners)):
+            write_dataset(results, "results_clean", OUT_DIR, partitioned=partitioned)
+            write_dataset(winners, "winners_clean", OUT_DIR, partitioned=partitioned)
 
     logger.info("DONE: staging parquet files created in data/processed/")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Extract, clean and validate raw CSVs into staging parquet.")
+    parser.add_argument(
+        "--arrow",
+        action="store_true",
+        help="Read with the pyarrow CSV engine and keep ArrowDtype columns end to end.",
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="Write hive-partitioned (year=YYYY/) zstd parquet datasets instead of single files.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Process the raw CSVs in bounded-memory batches instead of loading them whole.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows per batch in --stream mode (default: {DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="Log per-column memory of an untyped read vs the typed, cleaned datasets.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Extract and clean the driver results CSVs in this many worker processes (batch mode).",
+    )
+    args = parser.parse_args()
+    main(
+        arrow=args.arrow,
+        partitioned=args.partitioned,
+        stream=args.stream,
+        batch_size=args.batch_size,
+        report_memory=args.memory_report,
+        workers=args.workers,
+    )
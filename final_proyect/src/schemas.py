@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.dtypes import is_arrow, to_category, to_compact, to_datetime
+
+# Esquemas declarativos de los CSV de data/raw. Dirigen el parseo en
+# extract_raw (dtypes de read_csv) y las conversiones de los clean_*.
+#
+#   kind="int"      -> entero nullable compacto (dtype), NA si no es numérico
+#   kind="float"    -> float compacto (dtype)
+#   kind="category" -> texto de baja cardinalidad como categorical
+#   kind="text"     -> texto libre
+#   kind="date"     -> fecha con formato fijo (sin inferencia por elemento)
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str
+    dtype: str | None = None
+    date_format: str | None = None
+
+
+# Resultados de un piloto por carrera (data/raw/<piloto>.csv, esquema de fernandoalonso.csv).
+# driver_name viene de data/raw/drivers.csv si el CSV no trae la columna
+RESULTS = [
+    Column("driver_name", "category"),
+    Column("race_number", "int", "Int32"),
+    Column("year", "int", "Int16"),
+    Column("grand_prix", "category"),
+    Column("team", "category"),
+    Column("driver_number", "int", "Int16"),
+    Column("constructor", "category"),
+    Column("car", "category"),
+    Column("engine_type", "category"),
+    Column("tyre", "category"),
+    Column("grid_position", "int", "Int8"),
+    Column("race_position", "int", "Int8"),  # "ab" (abandono) -> NA
+    Column("event", "category"),
+]
+
+WINNERS = [
+    Column("date", "date", date_format="%Y-%m-%d"),
+    Column("continent", "category"),
+    Column("grand_prix", "category"),
+    Column("circuit", "category"),
+    Column("winner_name", "category"),
+    Column("team", "category"),
+    Column("time", "text"),
+    Column("laps", "float", "float32"),
+    Column("year", "int", "Int16"),
+]
+
+
+def read_csv_dtypes(columns: list[Column]) -> dict[str, str]:
+    """dtypes for pd.read_csv: categories are built by the parser, the rest is converted in clean_*."""
+    return {c.name: "category" for c in columns if c.kind == "category"}
+
+
+def apply_schema(df: pd.DataFrame, columns: list[Column]) -> pd.DataFrame:
+    """Converts the declared columns in place. Columns missing from df are left to the quality checks."""
+    for c in columns:
+        if c.name not in df.columns:
+            continue
+        s = df[c.name]
+        if c.kind in ("int", "float"):
+            df[c.name] = to_compact(s, c.dtype)
+        elif c.kind == "date":
+            df[c.name] = to_datetime(s, format=c.date_format)
+        elif c.kind == "category" and not is_arrow(s):
+            # En modo Arrow el texto se queda como string Arrow
+            df[c.name] = to_category(s)
+    return df
+
+
+def memory_usage(df: pd.DataFrame) -> pd.Series:
+    """Bytes per column, counting the Python objects behind object/str columns."""
+    return df.memory_usage(deep=True, index=False)
+
+
+def memory_report(name: str, before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    report = pd.DataFrame({
+        "before_dtype": before.dtypes.astype(str),
+        "before_kb": memory_usage(before) / 1024,
+        "after_dtype": after.dtypes.astype(str),
+        "after_kb": memory_usage(after) / 1024,
+    })
+    report.loc[f"TOTAL ({name})"] = ["", report["before_kb"].sum(), "", report["after_kb"].sum()]
+    return report.round(1)
@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, Iterator
+import pandas as pd
+
+from src.dtypes import concat_frames, is_arrow, strip_text, to_text, working_copy
+from src.extract.extract_raw import DriverFile, read_driver_file
+from src.logging_setup import init_worker_logging, worker_log_args
+from src.schemas import RESULTS, apply_schema
+
+def clean_results(df: pd.DataFrame) -> pd.DataFrame:
+    df = working_copy(df)
+
+    # standardization
+    df.columns = [c.strip().lower() for c in df.columns]
+    df["grand_prix"] = strip_text(df["grand_prix"])
+    if "driver_name" in df.columns:
+        df["driver_name"] = strip_text(df["driver_name"])
+
+    # race_position can be "ab" (abandoned). Convert to NaN.
+    df["race_position_raw"] = df["race_position"]
+    if is_arrow(df["race_position"]):
+        # replace() devolvería object; mask conserva el tipo Arrow
+        race_position = to_text(df["race_position"])
+        df["race_position"] = race_position.mask(race_position == "ab")
+    else:
+        df["race_position"] = df["race_position"].replace({"ab": None})
+
+    # tipos según schemas.RESULTS: enteros nullable compactos y categoricals
+    df = apply_schema(df, RESULTS)
+
+    df["did_finish"] = df["race_position"].notna().astype("int8")
+
+    return df
+
+
+def clean_results_batches(batches: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    # Todas las transformaciones son por fila: se aplican lote a lote
+    for df in batches:
+        yield clean_results(df)
+
+
+def _clean_driver_file(driver: DriverFile, arrow: bool) -> pd.DataFrame:
+    return clean_results(read_driver_file(driver, arrow=arrow))
+
+
+def clean_driver_files(drivers: list[DriverFile], arrow: bool = False, workers: int = 1) -> pd.DataFrame:
+    """Reads and cleans every driver file and returns them as one frame.
+
+    With `workers` > 1 each file is parsed and cleaned in a separate process
+    (CSV parsing and the text conversions hold the GIL), and the parent only
+    concatenates the cleaned frames.
+    """
+    if workers <= 1 or len(drivers) <= 1:
+        return concat_frames([_clean_driver_file(d, arrow) for d in drivers])
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(drivers)),
+        initializer=init_worker_logging,
+        initargs=worker_log_args(),
+    ) as pool:
+        frames = list(pool.map(_clean_driver_file, drivers, repeat(arrow)))
+    return concat_frames(frames)
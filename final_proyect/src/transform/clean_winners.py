@@ -1,17 +1,24 @@
+from typing import Iterable, Iterator
 import pandas as pd
 
+from src.dtypes import strip_text, working_copy
+from src.schemas import WINNERS, apply_schema
+
 def clean_winners(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    df = working_copy(df)
 
     df.columns = [c.strip().lower() for c in df.columns]
-    df["grand_prix"] = df["grand_prix"].astype(str).str.strip()
-    df["winner_name"] = df["winner_name"].astype(str).str.strip()
-    df["team"] = df["team"].astype(str).str.strip()
-
-    df["year"] = pd.to_numeric(df["year"], errors="coerce")
-    df["laps"] = pd.to_numeric(df["laps"], errors="coerce")
+    df["grand_prix"] = strip_text(df["grand_prix"])
+    df["winner_name"] = strip_text(df["winner_name"])
+    df["team"] = strip_text(df["team"])
 
-    # date parsing (may contain invalid rows)
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    # tipos según schemas.WINNERS; la fecha usa formato fijo (may contain invalid rows -> NaT)
+    df = apply_schema(df, WINNERS)
 
     return df
+
+
+def clean_winners_batches(batches: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    # Todas las transformaciones son por fila: se aplican lote a lote
+    for df in batches:
+        yield clean_winners(df)
@@ -1,8 +1,27 @@
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.datasets import QUARANTINE_DIR, SCHEMAS
+
+RESULTS_REQUIRED = ["driver_name", "year", "grand_prix", "race_number", "team", "grid_position", "race_position"]
+WINNERS_REQUIRED = ["year", "grand_prix", "winner_name", "team", "date"]
+
+VIOLATIONS_COL = "_violations"
+REASONS_COL = "_reasons"
 
 class DataQualityError(Exception):
     pass
 
+# Checks estructurales: afectan a todo el dataset, así que siguen lanzando error
+
 def check_not_empty(df: pd.DataFrame, name: str):
     if df.empty:
         raise DataQualityError(f"{name} is empty")
@@ -12,24 +31,175 @@ def check_required_columns(df: pd.DataFrame, name: str, required: list[str]):
     if missing:
         raise DataQualityError(f"{name} missing columns: {missing}")
 
-def check_year_valid(df: pd.DataFrame, name: str, col: str = "year"):
-    if df[col].isna().any():
-        raise DataQualityError(f"{name} has NULL years")
-    if (df[col] < 1900).any() or (df[col] > 2100).any():
-        raise DataQualityError(f"{name} has out-of-range years")
+# Reglas por fila: cada una devuelve una máscara booleana (True = la fila falla)
+
+def _mask(values) -> np.ndarray:
+    return np.asarray(pd.Series(values).fillna(True), dtype=bool)
+
+def year_null(df: pd.DataFrame, col: str = "year") -> np.ndarray:
+    return _mask(df[col].isna())
+
+def year_out_of_range(df: pd.DataFrame, col: str = "year") -> np.ndarray:
+    # NULL ya lo marca year_null
+    return _mask((df[col] < 1900) | (df[col] > 2100)) & ~year_null(df, col)
+
+def grand_prix_blank(df: pd.DataFrame) -> np.ndarray:
+    # fullmatch devuelve directamente la máscara, sin construir otra columna de texto
+    gp = df["grand_prix"]
+    return _mask(gp.isna()) | _mask(gp.str.fullmatch(r"\s*"))
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    violations: Callable[[pd.DataFrame], np.ndarray]
+
+ROW_RULES = [
+    Rule("year_null", year_null),
+    Rule("year_out_of_range", year_out_of_range),
+    Rule("grand_prix_blank", grand_prix_blank),
+]
+
+@dataclass
+class RuleStats:
+    rule: str
+    violations: int = 0
+    seconds: float = 0.0
+
+@dataclass
+class ValidationResult:
+    valid: pd.DataFrame
+    quarantine: pd.DataFrame
+    stats: list[RuleStats]
+
+def validate(df: pd.DataFrame, rules: list[Rule] = ROW_RULES) -> ValidationResult:
+    """Evaluates every rule over the whole frame and splits it into valid and quarantined rows.
+
+    Each rule sets one bit of a per-row bitmask; quarantined rows keep the
+    bitmask in `_violations` and the failed rule names in `_reasons`.
+    """
+    bits = np.zeros(len(df), dtype=np.uint32)
+    stats = []
+    for i, rule in enumerate(rules):
+        start = time.perf_counter()
+        failed = rule.violations(df)
+        bits |= failed.astype(np.uint32) << i
+        stats.append(RuleStats(rule.name, int(failed.sum()), time.perf_counter() - start))
 
-def check_grand_prix_not_null(df: pd.DataFrame, name: str):
-    if df["grand_prix"].isna().any() or (df["grand_prix"].astype(str).str.strip() == "").any():
-        raise DataQualityError(f"{name} has NULL/blank grand_prix")
+    bad = bits != 0
+    if not bad.any():
+        return ValidationResult(df, df.iloc[0:0], stats)
 
-def run_all_checks(alonso: pd.DataFrame, winners: pd.DataFrame):
-    check_not_empty(alonso, "alonso")
-    check_not_empty(winners, "winners")
+    quarantine = df[bad].copy()
+    quarantine[VIOLATIONS_COL] = bits[bad].astype(np.int64)
+    quarantine[REASONS_COL] = [
+        ",".join(rule.name for i, rule in enumerate(rules) if b >> i & 1) for b in bits[bad]
+    ]
+    return ValidationResult(df[~bad], quarantine, stats)
 
-    check_required_columns(alonso, "alonso", ["year", "grand_prix", "race_number", "team", "grid_position", "race_position"])
-    check_required_columns(winners, "winners", ["year", "grand_prix", "winner_name", "team", "date"])
+def _merge_stats(total: list[RuleStats], batch: list[RuleStats]):
+    for acc, s in zip(total, batch):
+        acc.violations += s.violations
+        acc.seconds += s.seconds
 
-    check_year_valid(alonso, "alonso")
-    check_year_valid(winners, "winners")
-    check_grand_prix_not_null(alonso, "alonso")
-    check_grand_prix_not_null(winners, "winners")
+def log_summary(name: str, rows: int, stats: list[RuleStats], quarantined: int):
+    logger = logging.getLogger("transform.quality_checks")
+    for s in stats:
+        logger.info("%s: rule %-18s %6d violations  %.4f s", name, s.rule, s.violations, s.seconds)
+    logger.info("%s: %s of %s rows quarantined", name, quarantined, rows)
+
+class QuarantineWriter:
+    """Appends quarantined rows of one dataset to <out_dir>/<name>.parquet.
+
+    The file is only created when there is something to quarantine, and a
+    stale one from a previous run is removed. Pass `schema` (the clean schema)
+    so the file has the same types whether it was written in one go or in
+    batches, whose inferred types may differ.
+    """
+
+    def __init__(self, name: str, out_dir: Path = QUARANTINE_DIR, schema: pa.Schema | None = None):
+        self.path = out_dir / f"{name}.parquet"
+        self.schema = None
+        if schema is not None:
+            schema = schema.append(pa.field(VIOLATIONS_COL, pa.int64())).append(pa.field(REASONS_COL, pa.string()))
+            # Metadatos pandas con enteros nulables: al releer, year sigue
+            # siendo Int64 aunque las filas en cuarentena tengan nulos
+            empty = schema.empty_table().to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+            self.schema = schema.with_metadata(pa.Schema.from_pandas(empty, preserve_index=False).metadata)
+        self.rows = 0
+        self._writer = None
+        if self.path.exists():
+            self.path.unlink()
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.schema is not None:
+            table = table.select(self.schema.names).cast(self.schema)
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def check_dataset(
+    df: pd.DataFrame,
+    name: str,
+    required: list[str],
+    quarantine_dir: Path = QUARANTINE_DIR,
+    rules: list[Rule] = ROW_RULES,
+    schema: pa.Schema | None = None,
+) -> pd.DataFrame:
+    """Structural checks, then row rules. Returns the valid rows and quarantines the rest."""
+    check_not_empty(df, name)
+    check_required_columns(df, name, required)
+
+    result = validate(df, rules)
+    with QuarantineWriter(name, quarantine_dir, schema) as writer:
+        writer.write(result.quarantine)
+    log_summary(name, len(df), result.stats, len(result.quarantine))
+    return result.valid
+
+def run_all_checks(results: pd.DataFrame, winners: pd.DataFrame, quarantine_dir: Path = QUARANTINE_DIR):
+    # Mismo esquema de cuarentena que en modo --stream
+    results = check_dataset(results, "results", RESULTS_REQUIRED, quarantine_dir, schema=SCHEMAS["results_clean"])
+    winners = check_dataset(winners, "winners", WINNERS_REQUIRED, quarantine_dir, schema=SCHEMAS["winners_clean"])
+    return results, winners
+
+def check_batches(
+    batches: Iterable[pd.DataFrame],
+    name: str,
+    required: list[str],
+    quarantine_dir: Path = QUARANTINE_DIR,
+    schema: pa.Schema | None = None,
+    rules: list[Rule] = ROW_RULES,
+) -> Iterator[pd.DataFrame]:
+    """Validates every batch as it streams through and yields only its valid rows.
+
+    The empty check can only be decided once the stream is exhausted.
+    """
+    rows = 0
+    stats = [RuleStats(rule.name) for rule in rules]
+    with QuarantineWriter(name, quarantine_dir, schema) as writer:
+        for df in batches:
+            check_required_columns(df, name, required)
+            result = validate(df, rules)
+            _merge_stats(stats, result.stats)
+            writer.write(result.quarantine)
+            rows += len(df)
+            yield result.valid
+
+    if rows == 0:
+        raise DataQualityError(f"{name} is empty")
+    log_summary(name, rows, stats, writer.rows)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import duckdb
+
+# Sesiones de DuckDB del DW: un único sitio para la ruta del fichero y los
+# ajustes del motor. load_dw abre en lectura/escritura; dw_checks y
+# run_insights en solo lectura, así que varios lectores pueden convivir.
+# duckdb se importa al abrir la primera conexión: run_dag usa las rutas y
+# session() sin pagar la importación cuando no se ejecuta ninguna etapa.
+
+DB_PATH = Path("warehouse/dw.duckdb")
+
+# Instantáneas parquet del DW (ver src/load/export_snapshot.py):
+#   data/snapshots/<version>/<table>.parquet + manifest.json
+#   data/snapshots/LATEST   -> nombre de la última versión completa
+SNAPSHOT_DIR = Path("data/snapshots")
+MANIFEST = "manifest.json"
+LATEST = "LATEST"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """DuckDB settings for every connection (None = DuckDB's default).
+
+    threads: worker threads of the engine.
+    memory_limit: e.g. "4GB"; beyond it joins/aggregations spill to temp_directory.
+    temp_directory: where spilled data is written.
+    preserve_insertion_order: False lets large loads/exports use less memory
+    when the row order of the output does not matter.
+    """
+
+    threads: int | None = None
+    memory_limit: str | None = None
+    temp_directory: str | None = None
+    preserve_insertion_order: bool | None = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        # DUCKDB_THREADS=8 DUCKDB_MEMORY_LIMIT=4GB DUCKDB_TEMP_DIRECTORY=/tmp/duckdb ...
+        env = os.environ
+        order = env.get("DUCKDB_PRESERVE_INSERTION_ORDER")
+        return cls(
+            threads=int(env["DUCKDB_THREADS"]) if env.get("DUCKDB_THREADS") else None,
+            memory_limit=env.get("DUCKDB_MEMORY_LIMIT") or None,
+            temp_directory=env.get("DUCKDB_TEMP_DIRECTORY") or None,
+            preserve_insertion_order=None if not order else order.strip().lower() in ("1", "true", "yes", "on"),
+        )
+
+    def config(self) -> dict:
+        return {k: v for k, v in vars(self).items() if v is not None}
+
+
+# Sesión abierta con session(): la conexión se abre con el primer connect()
+_session: dict | None = None
+_lock = threading.Lock()
+
+
+def _open(path: Path, read_only: bool, settings: Settings | None) -> duckdb.DuckDBPyConnection:
+    import duckdb
+
+    settings = settings or Settings.from_env()
+    if not read_only:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    if settings.temp_directory:
+        Path(settings.temp_directory).mkdir(parents=True, exist_ok=True)
+    return duckdb.connect(str(path), read_only=read_only, config=settings.config())
+
+
+def connect(
+    read_only: bool = False,
+    path: Path = DB_PATH,
+    settings: Settings | None = None,
+) -> duckdb.DuckDBPyConnection:
+    """Returns a connection to the DW; the caller closes it.
+
+    Inside session() it is a cursor of the session's shared connection
+    instead, so the steps of an orchestrated run reuse one open database
+    (closing the cursor leaves the session open). DuckDB does not allow a
+    read-only and a read-write handle on the same file in one process, so
+    `read_only` is not enforced on session cursors.
+    """
+    with _lock:
+        if _session is not None and _session["path"] == path.resolve():
+            if _session["con"] is None:
+                _session["con"] = _open(path, read_only=False, settings=_session["settings"])
+            return _session["con"].cursor()
+    return _open(path, read_only, settings)
+
+
+@contextmanager
+def session(path: Path = DB_PATH, settings: Settings | None = None):
+    """Shares one read-write connection through connect() for the duration of the block.
+
+    The database is only opened if some step connects, so a run that skips
+    the warehouse steps does not create or lock the file.
+    """
+    global _session
+    current = {"path": path.resolve(), "settings": settings, "con": None}
+    with _lock:
+        previous, _session = _session, current
+    try:
+        yield
+    finally:
+        with _lock:
+            _session = previous
+        if current["con"] is not None:
+            current["con"].close()
+
+
+def sql_path(path: Path) -> str:
+    # Ruta como literal de cadena SQL
+    return path.as_posix().replace("'", "''")
+
+
+def snapshot_versions(snapshot_dir: Path = SNAPSHOT_DIR) -> list[str]:
+    """Complete snapshot versions, oldest first (in-progress .tmp directories excluded)."""
+    if not snapshot_dir.is_dir():
+        return []
+    return sorted(
+        p.name for p in snapshot_dir.iterdir()
+        if not p.name.startswith(".") and (p / MANIFEST).exists()
+    )
+
+
+def resolve_snapshot(path: Path = SNAPSHOT_DIR) -> Path:
+    """A snapshot version directory, or the LATEST one if `path` is the snapshots root."""
+    if (path / MANIFEST).exists():
+        return path
+    latest = path / LATEST
+    if latest.exists():
+        return path / latest.read_text(encoding="utf-8").strip()
+    raise FileNotFoundError(f"No snapshot in {path} (expected {MANIFEST} or {LATEST})")
+
+
+def connect_snapshot(path: Path = SNAPSHOT_DIR, settings: Settings | None = None) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB with one view per table of a parquet snapshot.
+
+    Queries written for the DW run unchanged, and nothing opens or locks the
+    warehouse file, so it can be used while a load is running.
+    """
+    import duckdb
+
+    path = resolve_snapshot(path)
+    manifest = json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+    con = duckdb.connect(":memory:", config=(settings or Settings.from_env()).config())
+    for table, meta in manifest["tables"].items():
+        con.execute(
+            f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{sql_path((path / meta['file']).resolve())}')"
+        )
+    return con
@@ -0,0 +1,125 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src import datasets, warehouse
+from src.load import dw_checks, load_dw
+
+ROOT = Path(__file__).resolve().parents[1]
+
+WINNERS = [
+    ("2024-07-21", "Hungary", "Hungaroring", "Oscar Piastri", "McLaren", 2024),
+    ("2025-07-06", "Great Britain", "Silverstone Circuit", "Lando Norris", "McLaren", 2025),
+    ("2025-08-03", "Hungary", "Hungaroring", "Lando Norris", "McLaren", 2025),
+]
+RESULTS = [
+    ("Lando Norris", 1, 2024, "Hungary", 2, 2),
+    ("Lando Norris", 1, 2025, "Britain", 3, 1),
+    ("Lando Norris", 2, 2025, "Hungary", 1, 1),
+]
+
+
+def _winners(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["date", "grand_prix", "circuit", "winner_name", "team", "year"])
+    df["date"] = pd.to_datetime(df["date"])
+    return df.assign(continent="Europe", time="01:35:21", laps=70.0)
+
+
+def _results(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["driver_name", "race_number", "year", "grand_prix", "grid_position", "race_position"])
+    return df.assign(
+        team="McLaren", driver_number=4, constructor="McLaren", car="MCL", engine_type="Mercedes", tyre="P",
+        event=pd.NA, race_position_raw=df["race_position"].astype(str), did_finish=1,
+    )
+
+
+def _stage(winners, results):
+    datasets.write_dataset(_winners(winners), "winners_clean")
+    datasets.write_dataset(_results(results), "results_clean")
+
+
+def _query(sql: str) -> list[tuple]:
+    con = warehouse.connect(read_only=True)
+    try:
+        return con.execute(sql).fetchall()
+    finally:
+        con.close()
+
+
+def _wins(year: int) -> dict[str, int]:
+    return dict(_query(f"""
+        SELECT d.driver_name, a.wins
+        FROM agg_driver_wins a
+        JOIN dim_driver d USING (driver_id)
+        JOIN dim_season s USING (season_id)
+        WHERE s.year = {year}
+    """))
+
+
+def _checks_pass() -> bool:
+    con = warehouse.connect(read_only=True)
+    try:
+        _, results = dw_checks.run_checks(con)
+    finally:
+        con.close()
+    return all(r.passed for r in results)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Las rutas del pipeline son relativas al directorio del proyecto
+    shutil.copytree(ROOT / "sql", tmp_path / "sql")
+    monkeypatch.chdir(tmp_path)
+    datasets.PROCESSED_DIR.mkdir(parents=True)
+    _stage(WINNERS, RESULTS)
+    load_dw.main()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_incremental_adds_new_rows(engine):
+    _stage(
+        WINNERS + [("2025-08-31", "Netherlands", "Circuit Zandvoort", "Oscar Piastri", "McLaren", 2025)],
+        RESULTS + [("Lando Norris", 3, 2025, "Netherlands", 3, 18)],
+    )
+    load_dw.main(incremental=True, engine=engine)
+
+    assert _wins(2025) == {"Lando Norris": 2, "Oscar Piastri": 1}
+    assert _query("SELECT COUNT(*) FROM fact_driver_race_results") == [(4,)]
+    assert _checks_pass()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_incremental_replaces_changed_winner(engine):
+    winners = WINNERS[:2] + [("2025-08-03", "Hungary", "Hungaroring", "Oscar Piastri", "McLaren", 2025)]
+    _stage(winners, RESULTS)
+    load_dw.main(incremental=True, engine=engine)
+
+    assert _wins(2025) == {"Lando Norris": 1, "Oscar Piastri": 1}
+    assert _query("SELECT COUNT(*) FROM fact_race_winners") == [(3,)]
+    assert _checks_pass()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_incremental_deletes_removed_rows(engine):
+    _stage(WINNERS, RESULTS[:2])
+    load_dw.main(incremental=True, engine=engine)
+
+    assert _query("""
+        SELECT s.year, a.races
+        FROM agg_driver_season_stats a
+        JOIN dim_season s USING (season_id)
+        ORDER BY s.year
+    """) == [(2024, 1), (2025, 1)]
+    assert _query("SELECT COUNT(*) FROM fact_driver_race_results") == [(2,)]
+    assert _checks_pass()
+
+
+def test_incremental_years_keeps_other_seasons():
+    # Solo se cargan las temporadas de --years: el resto no se toca
+    _stage(WINNERS[:1], RESULTS[:1])
+    load_dw.main(incremental=True, years=[2024])
+
+    assert _wins(2025) == {"Lando Norris": 2}
+    assert _query("SELECT COUNT(*) FROM fact_driver_race_results") == [(3,)]
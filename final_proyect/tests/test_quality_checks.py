@@ -0,0 +1,41 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.datasets import SCHEMAS
+from src.transform.quality_checks import RESULTS_REQUIRED, check_batches, run_all_checks
+
+
+def _results() -> pd.DataFrame:
+    df = pd.DataFrame({
+        "driver_name": ["Lando Norris", "Lando Norris", "Oscar Piastri"],
+        "race_number": pd.array([1, 2, 3], dtype="Int32"),
+        "year": pd.array([2025, None, 1890], dtype="Int16"),
+        "grand_prix": ["Britain", "Hungary", "Hungary"],
+    })
+    return df.assign(
+        team="McLaren", driver_number=4, constructor="McLaren", car="MCL", engine_type="Mercedes", tyre="P",
+        grid_position=1.0, race_position=1.0, event=pd.NA, race_position_raw="1", did_finish=1,
+    )
+
+
+def _winners() -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2025-07-06"]), "continent": "Europe", "grand_prix": "Great Britain",
+        "circuit": "Silverstone Circuit", "winner_name": "Lando Norris", "team": "McLaren",
+        "time": "01:35:21", "laps": 52.0, "year": 2025,
+    })
+
+
+def test_quarantine_schema_same_in_batch_and_stream(tmp_path):
+    run_all_checks(_results(), _winners(), quarantine_dir=tmp_path / "batch")
+    df = _results()
+    batches = [df.iloc[:2], df.iloc[2:].astype({"year": "float64"})]
+    list(check_batches(batches, "results", RESULTS_REQUIRED, tmp_path / "stream", SCHEMAS["results_clean"]))
+
+    batch = tmp_path / "batch" / "results.parquet"
+    stream = tmp_path / "stream" / "results.parquet"
+    assert pq.read_schema(batch) == pq.read_schema(stream)
+    for path in (batch, stream):
+        year = pd.read_parquet(path)["year"]
+        assert year.dtype == "Int64"
+        assert year.isna().tolist() == [True, False]